@@ -0,0 +1,100 @@
+"""
+Cache hit rate of the recalls by worker count,
+routed round robin vs by consistent hashing (bounded load).
+
+Each worker (a server process) has an LRU cache of the entities,
+the recalled entities follow a Zipf distribution.
+
+    python benchmark/affinity.py --requests 200000 --cache 2000
+"""
+
+import argparse
+from collections import OrderedDict
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "nlm"))
+
+from utils.hashring import HashRing
+
+
+class LRU:
+
+    def __init__(self, size: int):
+        self.size = size
+        self.items = OrderedDict()
+
+    def hit(self, key) -> bool:
+        if key in self.items:
+            self.items.move_to_end(key)
+            return True
+        self.items[key] = True
+        if len(self.items) > self.size:
+            self.items.popitem(last=False)
+        return False
+
+
+def zipf_keys(n: int, entities: int, s: float, seed: int) -> list:
+    rnd = random.Random(seed)
+    weights = [1 / (i + 1) ** s for i in range(entities)]
+    names = ["Entity{}".format(i) for i in range(entities)]
+    return rnd.choices(names, weights, k=n)
+
+
+def simulate(keys: list, workers: int, cache: int, policy: str,
+             concurrency: int, balance: float) -> tuple:
+    """
+    Returns
+    --------
+    out: (hit rate, max load of a worker relative to the average)
+    """
+    caches = [LRU(cache) for _ in range(workers)]
+    ring = HashRing(list(range(workers)), balance=balance)
+    served = [0] * workers
+    # the workers of the last `concurrency` requests, still in flight
+    inflight = []
+    load = [0] * workers
+    hits = 0
+    for i, key in enumerate(keys):
+        if policy == "round_robin":
+            w = i % workers
+        else:
+            w = ring.lookup(key, lambda w: load[w])
+        hits += caches[w].hit(key)
+        served[w] += 1
+        load[w] += 1
+        inflight.append(w)
+        if len(inflight) > concurrency:
+            load[inflight.pop(0)] -= 1
+    return hits / len(keys), max(served) / (len(keys) / workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--entities", type=int, default=50000)
+    parser.add_argument("--cache", type=int, default=2000,
+                        help="entities cached per worker")
+    parser.add_argument("--zipf", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="requests in flight")
+    parser.add_argument("--balance", type=float, default=1.25)
+    parser.add_argument("--workers", type=str, default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    keys = zipf_keys(args.requests, args.entities, args.zipf, seed=0)
+    print("{:>8} {:>16} {:>16} {:>16}".format(
+        "workers", "round_robin", "consistent_hash", "max_load"))
+    for workers in map(int, args.workers.split(",")):
+        rr, _ = simulate(keys, workers, args.cache, "round_robin",
+                         args.concurrency, args.balance)
+        ch, max_load = simulate(keys, workers, args.cache, "consistent_hash",
+                                args.concurrency, args.balance)
+        print("{:>8} {:>16.1%} {:>16.1%} {:>16.2f}".format(
+            workers, rr, ch, max_load))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,58 +1,771 @@
+import asyncio
+from collections import OrderedDict
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import wraps
+import queue
+import random
+import threading
+import time
+from typing import Callable, List
 import grpc
 
 import nlm_pb2
 import nlm_pb2_grpc
 
+from utils.tracing import tracer
+from utils.hashring import HashRing
+from utils.compression import grpc_compression
 
-def deco_exception(func):
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except grpc.RpcError as e:
-            print(e.details())
+
+RETRYABLE = (grpc.StatusCode.UNAVAILABLE,)
+
+
+def backoff_delay(attempt: int, backoff: float, max_backoff: float) -> float:
+    """The exponential backoff of the attempt, with full jitter."""
+    return random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+
+def keepalive_options(keepalive: float) -> list:
+    return [
+        ("grpc.keepalive_time_ms", int(keepalive * 1000)),
+        ("grpc.keepalive_timeout_ms", 10000),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+
+
+def deco_trace(func):
+    """
+    Run the call (or the coroutine) in a client span,
+    whose context goes with the metadata.
+    """
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            with tracer.span(type(self).__name__ + "." + func.__name__,
+                             kind="client"):
+                return await func(self, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with tracer.span(type(self).__name__ + "." + func.__name__,
+                         kind="client"):
+            return func(self, *args, **kwargs)
     return wrapper
 
 
+@dataclass
+class RecallCache:
+
+    """
+    The latest responses of the recalls, at most `size` (LRU).
+    A response younger than `ttl` seconds is trusted,
+    an older one is revalidated by its version, until `max_age` seconds
+    after it was recalled, then it is recalled again.
+    """
+
+    size: int = 10000
+    ttl: float = 1.0
+    max_age: float = 60.0
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def get(self, key) -> tuple:
+        """(the response, whether it is fresh), or (None, False)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            response, stored, recalled = entry
+            now = time.monotonic()
+            if self.max_age is not None and now - recalled >= self.max_age:
+                del self._entries[key]
+                return None, False
+            self._entries.move_to_end(key)
+            return response, now - stored < self.ttl
+
+    def put(self, key, response, revalidated: bool = False):
+        """
+        revalidated: the response is the cached one, answered not_modified.
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            recalled = entry[2] if revalidated and entry else now
+            self._entries[key] = (response, now, recalled)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses}
+
+
+@dataclass
+class Endpoint:
+
+    """One server: its channel, stub and outstanding calls."""
+
+    address: str
+    channel: grpc.Channel
+    stub: nlm_pb2_grpc.NLMStub
+    outstanding: int = 0
+
+
 @dataclass
 class NLMClient:
 
-    host: str
-    port: int
+    """
+    Parameters
+    -----------
+    host, port: the server, if no addresses.
+    addresses: the servers, as host:port, calls are balanced across them.
+    policy: "round_robin", "least_outstanding" or "consistent_hash".
+        By consistent_hash, the recalls of the same entity (label, name),
+        of a relation its start, go to the same server, so its cache
+        lives mostly there, the other calls go round robin.
+    hash_balance: by consistent_hash, a server is skipped if it has more
+        than so many times the average outstanding calls.
+    timeout: the deadline (seconds) of a call, retries included.
+    retries: max retries of a call failed with UNAVAILABLE,
+        after a jittered exponential backoff.
+    backoff, max_backoff: the backoff (seconds) of the first and any retry.
+    hedge_after: if a recall has not finished in so many seconds,
+        send it to another server too, the first answer wins.
+        None is disabled.
+    keepalive: seconds between the HTTP/2 keepalive pings.
+    compression: of the requests, "gzip", "deflate" or None.
+    cache_size: max recalls (node or relation) cached, 0 is disabled.
+    cache_ttl: seconds a cached recall is trusted without asking the server,
+        after that it is revalidated, the server answers only not_modified
+        if its version is not changed.
+    cache_max_age: seconds a cached recall is revalidated, after that it is
+        recalled again. A server versions by the writes it has seen only
+        (not those of other servers or processes), so this bounds how long
+        those are missed. None is unbounded.
+    server_defaults: the recall options the servers are started with,
+        e.g. {"add_inexistence": True}. Recalls that may write (by their
+        options or these) are neither cached nor hedged.
+
+    Failed calls raise grpc.RpcError.
+    """
+
+    host: str = "localhost"
+    port: int = 8080
+    addresses: List[str] = field(default_factory=list)
+    policy: str = "round_robin"
+    hash_balance: float = 1.25
+    timeout: float = 5.0
+    retries: int = 3
+    backoff: float = 0.05
+    max_backoff: float = 1.0
+    hedge_after: float = None
+    keepalive: float = 30.0
+    compression: str = None
+    cache_size: int = 0
+    cache_ttl: float = 1.0
+    cache_max_age: float = 60.0
+    server_defaults: dict = field(default_factory=dict)
 
     def __post_init__(self):
-        self.channel = grpc.insecure_channel(
-            "{}:{}".format(self.host, self.port))
-        self.stub = nlm_pb2_grpc.NLMStub(self.channel)
+        if self.policy not in ("round_robin", "least_outstanding",
+                               "consistent_hash"):
+            raise ValueError("unknown policy: {}".format(self.policy))
+        addresses = self.addresses or ["{}:{}".format(self.host, self.port)]
+        options = keepalive_options(self.keepalive)
+        self.endpoints = []
+        for address in addresses:
+            channel = grpc.insecure_channel(
+                address, options=options,
+                compression=grpc_compression(self.compression))
+            self.endpoints.append(
+                Endpoint(address, channel, nlm_pb2_grpc.NLMStub(channel)))
+        self._lock = threading.Lock()
+        self._next = 0
+        self._by_address = {e.address: e for e in self.endpoints}
+        self._ring = HashRing(list(self._by_address),
+                              balance=self.hash_balance)
+        self.cache = (RecallCache(self.cache_size, self.cache_ttl,
+                                  self.cache_max_age)
+                      if self.cache_size else None)
+
+    @property
+    def stub(self) -> nlm_pb2_grpc.NLMStub:
+        """the stub of the first server"""
+        return self.endpoints[0].stub
+
+    def close(self):
+        for endpoint in self.endpoints:
+            endpoint.channel.close()
+
+    def _pick(self, exclude: Endpoint = None, key: str = None) -> Endpoint:
+        with self._lock:
+            if (self.policy == "consistent_hash" and key is not None and
+                    exclude is None):
+                address = self._ring.lookup(
+                    key, lambda a: self._by_address[a].outstanding)
+                endpoint = self._by_address[address]
+                endpoint.outstanding += 1
+                return endpoint
+            endpoints = [e for e in self.endpoints if e is not exclude]
+            endpoints = endpoints or self.endpoints
+            i = self._next % len(endpoints)
+            self._next += 1
+            if self.policy == "least_outstanding":
+                # round robin among the least loaded ones
+                least = min(e.outstanding for e in endpoints)
+                endpoints = [e for e in endpoints if e.outstanding == least]
+                i = i % len(endpoints)
+            endpoint = endpoints[i]
+            endpoint.outstanding += 1
+        return endpoint
+
+    def _release(self, endpoint: Endpoint):
+        with self._lock:
+            endpoint.outstanding -= 1
+
+    def _call(self, method: str, request, hedge: bool = False,
+              timeout: float = None, key: str = None):
+        """
+        Call the method, retry UNAVAILABLE within the deadline.
+        The key is the entity, routed by consistent_hash.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            # a retry may go to another server
+            key = key if attempt == 0 else None
+            try:
+                if hedge and self.hedge_after is not None:
+                    return self._hedged(method, request, remaining, key)
+                return self._once(method, request, remaining, key)
+            except grpc.RpcError as e:
+                if e.code() not in RETRYABLE or attempt >= self.retries:
+                    raise
+                sleep = backoff_delay(attempt, self.backoff, self.max_backoff)
+                if time.monotonic() + sleep >= deadline:
+                    raise
+                time.sleep(sleep)
+                attempt += 1
+
+    def _cached_call(self, method: str, request, timeout: float = None,
+                     key: str = None, write: bool = False):
+        """
+        Call the recall method through the cache,
+        a recall that may write is always sent (to one server).
+        """
+        if write:
+            return self._call(method, request, False, timeout, key)
+        if self.cache is None:
+            return self._call(method, request, True, timeout, key)
+        cache_key = (method, request.SerializeToString(deterministic=True))
+        cached, fresh = self.cache.get(cache_key)
+        if cached is not None and fresh:
+            self.cache.hits += 1
+            return _copy(cached)
+        if cached is not None:
+            request.version = cached.version
+        response = self._call(method, request, True, timeout, key)
+        revalidated = response.not_modified and cached is not None
+        if revalidated:
+            self.cache.revalidated += 1
+            response = cached
+        else:
+            self.cache.misses += 1
+        self.cache.put(cache_key, response, revalidated)
+        return _copy(response)
+
+    def _once(self, method: str, request, timeout: float, key: str = None):
+        endpoint = self._pick(key=key)
+        try:
+            return getattr(endpoint.stub, method)(
+                request, timeout=timeout, metadata=tracer.metadata())
+        finally:
+            self._release(endpoint)
+
+    def _start(self, method: str, request, timeout: float,
+               finished: queue.Queue, exclude: Endpoint = None,
+               key: str = None) -> tuple:
+        endpoint = self._pick(exclude, key)
+        future = getattr(endpoint.stub, method).future(
+            request, timeout=timeout, metadata=tracer.metadata())
+
+        def done(f):
+            self._release(endpoint)
+            finished.put(f)
+        future.add_done_callback(done)
+        return endpoint, future
 
-    @deco_exception
-    def recall_node(self, label: str, name: str, props: dict = {}):
+    def _hedged(self, method: str, request, timeout: float,
+                key: str = None):
+        """
+        Send to one server, and to another one too if it is slow.
+        """
+        deadline = time.monotonic() + timeout
+        finished = queue.Queue()
+        endpoint, first = self._start(method, request, timeout, finished,
+                                      key=key)
+        futures = [first]
+        try:
+            winner = finished.get(timeout=self.hedge_after)
+        except queue.Empty:
+            # the hedge has the rest of the deadline, none if it is over
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                _, second = self._start(method, request, remaining, finished,
+                                        exclude=endpoint)
+                futures.append(second)
+            winner = finished.get()
+        if winner.exception() is not None and len(futures) > 1:
+            winner = finished.get()
+        for future in futures:
+            if future is not winner:
+                future.cancel()
+        return winner.result()
+
+    @deco_trace
+    def recall_node(self, label: str, name: str, props: dict = {},
+                    timeout: float = None, **options):
+        """
+        options: the RecallOptions, fuzzy_node, add_inexistence,
+            update_props, topn, limit and projection (the prop keys
+            returned, [] is none), the server defaults if not given.
+        """
         request = nlm_pb2.GraphNode(
-            label=label, name=name, props=json.dumps(props))
-        response = self.stub.NodeRecall(request)
-        return response
+            label=label, name=name, props=json.dumps(props),
+            options=_recall_options(options))
+        return self._cached_call("NodeRecall", request, timeout,
+                                 _entity_key(label, name),
+                                 may_write(options, self.server_defaults))
 
-    @deco_exception
+    @deco_trace
     def recall_relation(self, start: nlm_pb2.GraphNode, end: nlm_pb2.GraphNode,
-                        kind: str, props: dict = {}):
+                        kind: str, props: dict = {}, timeout: float = None,
+                        **options):
+        request = nlm_pb2.GraphRelation(
+            start=start, end=end, kind=kind, props=json.dumps(props),
+            options=_recall_options(options))
+        return self._cached_call("RelationRecall", request, timeout,
+                                 _entity_key(start.label, start.name),
+                                 may_write(options, self.server_defaults))
+
+    @deco_trace
+    def str_recall(self, text: str, timeout: float = None, **options):
+        request = nlm_pb2.RawString(
+            text=text, options=_recall_options(options))
+        hedge = not may_write(options, self.server_defaults)
+        return self._call("StrRecall", request, hedge=hedge, timeout=timeout)
+
+    @deco_trace
+    def nlu_recall(self, text: str, intent: str = "", entities: list = [],
+                   timeout: float = None, **options):
+        request = nlm_pb2.NLMInput(text=text, intent=intent, entities=entities,
+                                   options=_recall_options(options))
+        hedge = not may_write(options, self.server_defaults)
+        return self._call("NLURecall", request, hedge=hedge, timeout=timeout)
+
+    def cypher_recall(self, cypher: str, limit: int = 0,
+                      timeout: float = None):
+        """
+        Stream the rows, not retried.
+        """
+        request = nlm_pb2.CypherInput(cypher=cypher, limit=limit)
+        endpoint = self._pick()
+        try:
+            rows = endpoint.stub.CypherRecall(
+                request, timeout=timeout or self.timeout,
+                metadata=tracer.metadata())
+            for row in rows:
+                yield json.loads(row.data)
+        finally:
+            self._release(endpoint)
+
+    def changes(self, since: int = 0, follow: bool = False):
+        """
+        The change events after the write sequence `since` (a generator),
+        with follow, it keeps waiting for the new ones.
+        """
+        request = nlm_pb2.ChangesInput(since=since, follow=follow)
+        endpoint = self._pick()
+        try:
+            for change in endpoint.stub.Changes(
+                    request, metadata=tracer.metadata()):
+                yield change
+        finally:
+            self._release(endpoint)
+
+    @deco_trace
+    def lane_stats(self):
+        request = nlm_pb2.LaneStatsInput()
+        return self._call("LaneStats", request)
+
+    @deco_trace
+    def slow_queries(self, min_seconds: float = 0.0, limit: int = 100):
+        request = nlm_pb2.SlowQueryInput(min_seconds=min_seconds, limit=limit)
+        return self._call("SlowQueries", request)
+
+    @deco_trace
+    def profile(self, seconds: float = 10, top: int = 30):
+        request = nlm_pb2.ProfileInput(seconds=seconds, top=top)
+        return self._call("Profile", request, timeout=seconds + 10)
+
+
+def may_write(options: dict, defaults: dict = {}) -> bool:
+    """
+    Whether a recall with the options (over the server defaults) may write,
+    as NLMLayer.may_write.
+    """
+    options = {**defaults, **options}
+    return bool(options.get("add_inexistence") or
+                (options.get("update_props") and not options.get("fuzzy_node")))
+
+
+def _entity_key(label: str, name: str) -> str:
+    return json.dumps([label, name], ensure_ascii=False)
+
+
+def _copy(message):
+    """a copy of the protobuf message, the cached one is not shared"""
+    ret = type(message)()
+    ret.CopyFrom(message)
+    return ret
+
+
+def _recall_options(options: dict) -> nlm_pb2.RecallOptions:
+    options = dict(options)
+    if options.get("projection") == []:
+        # an empty repeated field is unset
+        options["projection"] = ["none"]
+    return nlm_pb2.RecallOptions(**options)
+
+
+def _node_request(item, options: dict = {}) -> nlm_pb2.GraphNode:
+    """(label, name) or (label, name, props) to a GraphNode request."""
+    label, name, *rest = item
+    props = rest[0] if rest else {}
+    return nlm_pb2.GraphNode(label=label, name=name, props=json.dumps(props),
+                             options=_recall_options(options))
+
+
+@dataclass
+class AsyncNLMClient:
+
+    """
+    The NLMClient of asyncio (grpc.aio), create it in the event loop.
+
+    Parameters
+    -----------
+    addresses: the servers, as host:port, calls are balanced across them.
+    policy, hash_balance, timeout, retries, backoff, max_backoff,
+    hedge_after, keepalive, compression, cache_size, cache_ttl,
+    cache_max_age, server_defaults: as NLMClient.
+
+    Failed calls raise grpc.RpcError (grpc.aio.AioRpcError).
+    """
+
+    host: str = "localhost"
+    port: int = 8080
+    addresses: List[str] = field(default_factory=list)
+    policy: str = "round_robin"
+    hash_balance: float = 1.25
+    timeout: float = 5.0
+    retries: int = 3
+    backoff: float = 0.05
+    max_backoff: float = 1.0
+    hedge_after: float = None
+    keepalive: float = 30.0
+    compression: str = None
+    cache_size: int = 0
+    cache_ttl: float = 1.0
+    cache_max_age: float = 60.0
+    server_defaults: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.policy not in ("round_robin", "least_outstanding",
+                               "consistent_hash"):
+            raise ValueError("unknown policy: {}".format(self.policy))
+        addresses = self.addresses or ["{}:{}".format(self.host, self.port)]
+        options = keepalive_options(self.keepalive)
+        compression = grpc_compression(self.compression)
+        self.endpoints = []
+        for address in addresses:
+            channel = grpc.aio.insecure_channel(address, options=options,
+                                                compression=compression)
+            self.endpoints.append(
+                Endpoint(address, channel, nlm_pb2_grpc.NLMStub(channel)))
+        self._lock = threading.Lock()
+        self._next = 0
+        self._by_address = {e.address: e for e in self.endpoints}
+        self._ring = HashRing(list(self._by_address),
+                              balance=self.hash_balance)
+        self.cache = (RecallCache(self.cache_size, self.cache_ttl,
+                                  self.cache_max_age)
+                      if self.cache_size else None)
+
+    async def __aenter__(self) -> "AsyncNLMClient":
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        for endpoint in self.endpoints:
+            await endpoint.channel.close()
+
+    # the same balancing as NLMClient
+    _pick = NLMClient._pick
+    _release = NLMClient._release
+
+    async def _call(self, method: str, request, hedge: bool = False,
+                    timeout: float = None, key: str = None):
+        """
+        Call the method, retry UNAVAILABLE within the deadline.
+        The key is the entity, routed by consistent_hash.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            # a retry may go to another server
+            key = key if attempt == 0 else None
+            try:
+                if hedge and self.hedge_after is not None:
+                    return await self._hedged(method, request, remaining, key)
+                return await self._once(method, request, remaining, key)
+            except grpc.RpcError as e:
+                if e.code() not in RETRYABLE or attempt >= self.retries:
+                    raise
+                sleep = backoff_delay(attempt, self.backoff, self.max_backoff)
+                if loop.time() + sleep >= deadline:
+                    raise
+                await asyncio.sleep(sleep)
+                attempt += 1
+
+    async def _cached_call(self, method: str, request, timeout: float = None,
+                           key: str = None, write: bool = False):
+        """
+        Call the recall method through the cache, as NLMClient.
+        """
+        if write:
+            return await self._call(method, request, False, timeout, key)
+        if self.cache is None:
+            return await self._call(method, request, True, timeout, key)
+        cache_key = (method, request.SerializeToString(deterministic=True))
+        cached, fresh = self.cache.get(cache_key)
+        if cached is not None and fresh:
+            self.cache.hits += 1
+            return _copy(cached)
+        if cached is not None:
+            request.version = cached.version
+        response = await self._call(method, request, True, timeout, key)
+        revalidated = response.not_modified and cached is not None
+        if revalidated:
+            self.cache.revalidated += 1
+            response = cached
+        else:
+            self.cache.misses += 1
+        self.cache.put(cache_key, response, revalidated)
+        return _copy(response)
+
+    async def _once(self, method: str, request, timeout: float,
+                    key: str = None):
+        endpoint = self._pick(key=key)
+        try:
+            return await getattr(endpoint.stub, method)(
+                request, timeout=timeout, metadata=tracer.metadata())
+        finally:
+            self._release(endpoint)
+
+    def _start(self, method: str, request, timeout: float,
+               exclude: Endpoint = None, key: str = None) -> tuple:
+        endpoint = self._pick(exclude, key)
+        task = asyncio.ensure_future(getattr(endpoint.stub, method)(
+            request, timeout=timeout, metadata=tracer.metadata()))
+        task.add_done_callback(lambda _: self._release(endpoint))
+        return endpoint, task
+
+    async def _hedged(self, method: str, request, timeout: float,
+                      key: str = None):
+        """
+        Send to one server, and to another one too if it is slow.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        endpoint, first = self._start(method, request, timeout, key=key)
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done:
+                # the hedge has the rest of the deadline, none if it is over
+                remaining = deadline - loop.time()
+                if remaining > 0:
+                    _, second = self._start(method, request, remaining,
+                                            exclude=endpoint)
+                    tasks.append(second)
+                done, _ = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED)
+            winner = min(done, key=lambda t: t.exception() is not None)
+            pending = [t for t in tasks if not t.done()]
+            if winner.exception() is not None and pending:
+                done, _ = await asyncio.wait(pending)
+                winner = done.pop()
+            return winner.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @deco_trace
+    async def recall_node(self, label: str, name: str, props: dict = {},
+                          timeout: float = None, **options):
+        """
+        options: the RecallOptions, as NLMClient.recall_node.
+        """
+        request = _node_request((label, name, props), options)
+        return await self._cached_call(
+            "NodeRecall", request, timeout, _entity_key(label, name),
+            may_write(options, self.server_defaults))
+
+    @deco_trace
+    async def recall_relation(self, start: nlm_pb2.GraphNode,
+                              end: nlm_pb2.GraphNode, kind: str,
+                              props: dict = {}, timeout: float = None,
+                              **options):
         request = nlm_pb2.GraphRelation(
-            start=start, end=end, kind=kind, props=json.dumps(props))
-        response = self.stub.RelationRecall(request)
-        return response
-
-    @deco_exception
-    def str_recall(self, text: str):
-        request = nlm_pb2.RawString(text=text)
-        response = self.stub.StrRecall(request)
-        return response
-
-    @deco_exception
-    def nlu_recall(self, text: str, intent: str = "", entities: list = []):
-        request = nlm_pb2.NLMInput(text=text, intent=intent, entities=entities)
-        response = self.stub.NLURecall(request)
-        return response
+            start=start, end=end, kind=kind, props=json.dumps(props),
+            options=_recall_options(options))
+        return await self._cached_call(
+            "RelationRecall", request, timeout,
+            _entity_key(start.label, start.name),
+            may_write(options, self.server_defaults))
 
+    @deco_trace
+    async def str_recall(self, text: str, timeout: float = None, **options):
+        request = nlm_pb2.RawString(
+            text=text, options=_recall_options(options))
+        hedge = not may_write(options, self.server_defaults)
+        return await self._call("StrRecall", request, hedge, timeout)
+
+    @deco_trace
+    async def nlu_recall(self, text: str, intent: str = "",
+                         entities: list = [], timeout: float = None,
+                         **options):
+        request = nlm_pb2.NLMInput(text=text, intent=intent, entities=entities,
+                                   options=_recall_options(options))
+        hedge = not may_write(options, self.server_defaults)
+        return await self._call("NLURecall", request, hedge, timeout)
+
+    async def cypher_recall(self, cypher: str, limit: int = 0,
+                            timeout: float = None):
+        """
+        Stream the rows, not retried.
+        """
+        request = nlm_pb2.CypherInput(cypher=cypher, limit=limit)
+        endpoint = self._pick()
+        try:
+            call = endpoint.stub.CypherRecall(
+                request, timeout=timeout or self.timeout,
+                metadata=tracer.metadata())
+            async for row in call:
+                yield json.loads(row.data)
+        finally:
+            self._release(endpoint)
+
+    async def changes(self, since: int = 0, follow: bool = False):
+        """
+        The change events after the write sequence `since`
+        (an async generator), as NLMClient.changes.
+        """
+        request = nlm_pb2.ChangesInput(since=since, follow=follow)
+        endpoint = self._pick()
+        try:
+            async for change in endpoint.stub.Changes(
+                    request, metadata=tracer.metadata()):
+                yield change
+        finally:
+            self._release(endpoint)
+
+    @deco_trace
+    async def lane_stats(self):
+        request = nlm_pb2.LaneStatsInput()
+        return await self._call("LaneStats", request)
+
+    @deco_trace
+    async def slow_queries(self, min_seconds: float = 0.0, limit: int = 100):
+        request = nlm_pb2.SlowQueryInput(min_seconds=min_seconds, limit=limit)
+        return await self._call("SlowQueries", request)
+
+    @deco_trace
+    async def profile(self, seconds: float = 10, top: int = 30):
+        request = nlm_pb2.ProfileInput(seconds=seconds, top=top)
+        return await self._call("Profile", request, timeout=seconds + 10)
+
+    async def recall_nodes_concurrently(self, items: list,
+                                        concurrency: int = 64,
+                                        progress: Callable = None,
+                                        return_exceptions: bool = False,
+                                        timeout: float = None,
+                                        **options) -> list:
+        """
+        Recall many nodes, by `concurrency` (at least 1) workers, so at most
+        so many recalls (and coroutines) at a time. If one fails (and not
+        return_exceptions), the others are cancelled and the error raised.
+
+        Parameters
+        ------------
+        items: (label, name) or (label, name, props) of the nodes.
+        progress: called with (done, total) after each recall.
+        options: the RecallOptions of all the recalls.
+        return_exceptions: put the errors in the results instead of raising.
+
+        Returns
+        --------
+        out: the GraphNode responses, in the order of the items.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        total = len(items)
+        results = [None] * total
+        todo = iter(enumerate(items))
+        write = may_write(options, self.server_defaults)
+        done = 0
+
+        async def worker():
+            nonlocal done
+            # the workers share the iterator, one item each at a time
+            for i, item in todo:
+                try:
+                    results[i] = await self._cached_call(
+                        "NodeRecall", _node_request(item, options), timeout,
+                        _entity_key(item[0], item[1]), write)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[i] = e
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+
+        workers = [asyncio.ensure_future(worker())
+                   for _ in range(min(concurrency, total))]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        return results
 
 if __name__ == '__main__':
     nlmc = NLMClient(host="localhost", port=8080)
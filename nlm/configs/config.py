@@ -11,10 +11,51 @@ neo_host = os.environ.get("NEO_HOST", "localhost")
 neo_port = os.environ.get("NEO_PORT", 7688)
 neo_user = os.environ.get("NEO_USER", "neo4j")
 neo_pass = os.environ.get("NEO_PASS", "password")
+# read replicas, host:port,host:port
+neo_readers = os.environ.get("NEO_READERS", "")
+read_policy = os.environ.get("READ_POLICY", "round_robin")
+replica_lag = float(os.environ.get("REPLICA_LAG", 1))
+# max seconds of one statement
+max_query_time = float(os.environ.get("MAX_QUERY_TIME", 5))
+# max rows of a user given Cypher query
+max_cypher_rows = int(os.environ.get("MAX_CYPHER_ROWS", 1000))
+# the RPC lanes, read only recalls and the ones may write
+read_workers = int(os.environ.get("READ_WORKERS", 16))
+read_queue = int(os.environ.get("READ_QUEUE", 64))
+write_workers = int(os.environ.get("WRITE_WORKERS", 4))
+write_queue = int(os.environ.get("WRITE_QUEUE", 16))
+# max concurrent Changes streams with follow, each holds a thread
+follow_streams = int(os.environ.get("FOLLOW_STREAMS", 4))
+# statements slower than so many seconds are logged, empty is disabled
+slow_query_time = os.environ.get("SLOW_QUERY_TIME", "1")
+slow_query_time = float(slow_query_time) if slow_query_time else None
+# ratio of the slow read statements re-run with PROFILE
+slow_query_profile_rate = float(os.environ.get("SLOW_QUERY_PROFILE_RATE", 0))
+slow_query_log_path = os.path.join(ROOT, "log", "slow_query.log")
+
+# change events, the journal file and the local socket, empty is disabled
+change_journal = os.environ.get("CHANGE_JOURNAL", "")
+change_socket = os.environ.get("CHANGE_SOCKET", "")
+
+# text props of at least so many bytes are stored compressed, empty is disabled
+compress_threshold = os.environ.get("COMPRESS_THRESHOLD", "")
+compress_threshold = int(compress_threshold) if compress_threshold else None
+# compression of the gRPC responses, "gzip", "deflate" or empty (disabled)
+rpc_compression = os.environ.get("GRPC_COMPRESSION", "")
+
+# tracing, "file" or empty (disabled)
+trace_exporter = os.environ.get("TRACE_EXPORTER", "")
+trace_file_path = os.path.join(ROOT, "log", "trace.jsonl")
 
 # model
 
 extract_model = os.environ.get("EXTRACT_MODEL")
+# module:function, builds the predictor from the model weights
+extract_model_builder = os.environ.get("EXTRACT_MODEL_BUILDER")
+linker_snapshot = os.environ.get("LINKER_SNAPSHOT")
+# seconds, how often the linker checks the graph changed and is rebuilt
+linker_refresh = os.environ.get("LINKER_REFRESH", "300")
+linker_refresh = float(linker_refresh) if linker_refresh else None
 
 # logging
 
@@ -26,22 +67,52 @@ if profile == "develop":
 else:
     log_level = logging.INFO
 
-logger.setLevel(log_level)
+log_queue_size = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+log_duplicate_interval = float(os.environ.get("LOG_DUPLICATE_INTERVAL", 10))
+
+
+def setup_logging(log_file_path: str = log_file_path,
+                  queue_size: int = log_queue_size,
+                  duplicate_interval: float = log_duplicate_interval):
+    """
+    Attach the handlers to the logger.
+    Called at server start, not at import.
+
+    Records go through a bounded queue, the handlers run in a listener
+    thread, so the request threads never wait for the logging I/O.
+    Duplicated records are suppressed for `duplicate_interval` seconds.
+
+    Returns
+    --------
+    out: the QueueListener, stop it at shutdown to flush,
+        it logs how many records were dropped (the queue was full).
+    """
+    import queue
+    from utils.log import JsonFormatter, DuplicateFilter
+    from utils.log import BoundedQueueHandler, BoundedQueueListener
+
+    logger.setLevel(log_level)
+
+    ch = logging.StreamHandler()
+    ch.setLevel(log_level)
+    ch.setFormatter(JsonFormatter())
 
+    # store errors
+    os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
+    fh = logging.FileHandler(log_file_path)
+    fh.setLevel(logging.ERROR)
+    fh.setFormatter(JsonFormatter())
 
-ch = logging.StreamHandler()
-ch.setLevel(log_level)
-ch_format = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
-ch.setFormatter(ch_format)
+    qh = BoundedQueueHandler(queue.Queue(queue_size))
+    qh.addFilter(DuplicateFilter(duplicate_interval))
+    listener = BoundedQueueListener(qh, ch, fh, respect_handler_level=True)
 
-# store errors
-fh = logging.FileHandler(log_file_path)
-fh.setLevel(logging.ERROR)
-fh_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-fh.setFormatter(fh_format)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(qh)
+    listener.start()
+    return listener
 
-logger.addHandler(ch)
-logger.addHandler(fh)
 
 if __name__ == '__main__':
     print(ROOT)
\ No newline at end of file
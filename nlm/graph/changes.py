@@ -0,0 +1,292 @@
+"""
+Changes
+====================================
+The write sequence of the graph and the change events,
+so caches (e.g. of other replicas) can be invalidated precisely.
+"""
+
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass, field, asdict
+import json
+import os
+import socket
+import threading
+import time
+from typing import Callable, List
+
+from configs.config import logger
+
+
+@dataclass
+class ChangeEvent:
+
+    """
+    Parameters
+    -----------
+    seq: the write sequence, monotonic.
+    op: "add_node", "add_relationship", "update_property" or "excute".
+    key: [label, name] of a node,
+        [start key, kind, end key] of a relationship, [] of excute.
+    props: the new props (the statement of excute).
+    """
+
+    seq: int
+    op: str
+    key: list
+    props: dict = field(default_factory=dict)
+    time: float = field(default_factory=time.time)
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False, default=str)
+
+    @classmethod
+    def loads(cls, line: str) -> "ChangeEvent":
+        return cls(**json.loads(line))
+
+
+class InProcessBus:
+
+    """Call the subscribers in the writing thread."""
+
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self, func: Callable):
+        self.subscribers.append(func)
+
+    def publish(self, event: ChangeEvent):
+        for func in self.subscribers:
+            func(event)
+
+
+class SocketBus:
+
+    """
+    Send the events as datagrams to a local (unix) socket, best effort:
+    if nobody listens, the events are dropped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def publish(self, event: ChangeEvent):
+        try:
+            self._sock.sendto(event.dumps().encode("utf8"), self.path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def listen(path: str, timeout: float = None):
+        """
+        Receive the events sent to the path (a generator).
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        if os.path.exists(path):
+            os.unlink(path)
+        sock.bind(path)
+        sock.settimeout(timeout)
+        try:
+            while True:
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    return
+                yield ChangeEvent.loads(data.decode("utf8"))
+        finally:
+            sock.close()
+            os.unlink(path)
+
+
+class FileJournalBus:
+
+    """
+    Append the events to a file, one JSON object per line.
+    A broken line (e.g. the last one of a crash) is skipped.
+
+    The file is indexed incrementally (the offset of every
+    `index_every` events), so `read` only reads from near the seq.
+    """
+
+    def __init__(self, path: str, index_every: int = 1000):
+        self.path = path
+        self.index_every = index_every
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # (seq, offset) of every index_every events, ascending
+        self._index = []
+        self._indexed = 0
+        self._lines = 0
+        self._last = 0
+        with open(path, "ab") as f:
+            if f.tell() and not _ends_with_newline(path):
+                # the partial line of a crash stays a line of its own
+                f.write(b"\n")
+        self._file = open(path, "a", encoding="utf8")
+
+    def publish(self, event: ChangeEvent):
+        with self._lock:
+            self._file.write(event.dumps() + "\n")
+            self._file.flush()
+
+    def read(self, since: int = 0) -> List[ChangeEvent]:
+        """the journaled events after the seq"""
+        with self._lock:
+            self._scan()
+            i = bisect_right(self._index, (since, float("inf")))
+            offset = self._index[i - 1][1] if i else 0
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            events = [_loads(line) for line in f]
+        return [e for e in events if e is not None and e.seq > since]
+
+    def last_seq(self) -> int:
+        """the max seq journaled, 0 if none"""
+        with self._lock:
+            self._scan()
+            return self._last
+
+    def _scan(self):
+        """index the lines appended since the last scan"""
+        with open(self.path, "rb") as f:
+            f.seek(self._indexed)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # being written
+                    break
+                event = _loads(line)
+                if event is not None:
+                    if self._lines % self.index_every == 0:
+                        self._index.append((event.seq, self._indexed))
+                    self._lines += 1
+                    self._last = max(self._last, event.seq)
+                self._indexed += len(line)
+
+
+def _scopes(key: list) -> list:
+    """the scopes of a change key, None is all"""
+    if not key:
+        return None
+    if len(key) == 2:
+        return [("node", key[0])]
+    start, _, end = key
+    return [("relation", start[0]), ("relation", end[0])]
+
+
+def _loads(line: bytes) -> ChangeEvent:
+    """the event of a journal line, None if broken"""
+    if not line.strip():
+        return None
+    try:
+        return ChangeEvent.loads(line.decode("utf8"))
+    except (ValueError, TypeError, KeyError) as e:
+        logger.warning("skipped a broken change journal line: %s", e)
+        return None
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+@dataclass
+class ChangeLog:
+
+    """
+    Number the writes and publish the change events to the buses.
+    The latest `retain` events are kept for `changes_since`.
+
+    The seq of the last write of each scope (nodes of a label, relations
+    from or to a label) gives the version of a recall (`version_of`),
+    only the writes of this process are seen.
+
+    Parameters
+    -----------
+    buses: where the events are published,
+        e.g. InProcessBus, SocketBus, FileJournalBus.
+    retain: the events kept in memory.
+    start: the seq to continue from, e.g. the last_seq of the journal.
+    """
+
+    buses: list = field(default_factory=list)
+    retain: int = 10000
+    start: int = 0
+
+    def __post_init__(self):
+        self._seq = self.start
+        self._events = deque(maxlen=self.retain)
+        self._cond = threading.Condition()
+        # the buses get the events in the seq order
+        self._publish_lock = threading.Lock()
+        # the scopes are not known before a restart, so is the seq
+        self.epoch = os.urandom(4).hex()
+        self._scopes = {}
+        # the last write of unknown entities (excute)
+        self._all = self.start
+
+    @property
+    def seq(self) -> int:
+        """the seq of the last write"""
+        return self._seq
+
+    def publish(self, op: str, key: list, props: dict = None) -> ChangeEvent:
+        """
+        Number a write and publish its event.
+        """
+        with self._publish_lock:
+            with self._cond:
+                self._seq += 1
+                event = ChangeEvent(self._seq, op, key, dict(props or {}))
+                self._events.append(event)
+                scopes = _scopes(key)
+                if scopes is None:
+                    self._all = self._seq
+                for scope in scopes or ():
+                    self._scopes[scope] = self._seq
+                self._cond.notify_all()
+            for bus in self.buses:
+                try:
+                    bus.publish(event)
+                except Exception as e:
+                    logger.warning("failed to publish change %d: %s",
+                                   event.seq, e)
+        return event
+
+    def version_of(self, qin) -> str:
+        """
+        The version of the recall of a GraphNode or GraphRelation
+        (the scheme or the protobuf message): the seq of the last write
+        which may change its result. Take it before the recall.
+        """
+        if hasattr(qin, "start"):
+            labels = {qin.start.label, qin.end.label}
+            scopes = [(kind, label) for kind in ("node", "relation")
+                      for label in labels]
+        else:
+            scopes = [("node", qin.label)]
+        with self._cond:
+            seq = max([self._all] + [self._scopes.get(scope, self.start)
+                                     for scope in scopes])
+        return "{}-{}".format(self.epoch, seq)
+
+    def changes_since(self, seq: int, limit: int = 1000) -> List[ChangeEvent]:
+        """
+        The events after the seq, the oldest first.
+        If the first one is not seq + 1, the events in between are not
+        retained any more, the caller should drop all its cache.
+        """
+        with self._cond:
+            return [e for e in self._events if e.seq > seq][:limit]
+
+    def wait(self, seq: int, timeout: float = None,
+             limit: int = 1000) -> List[ChangeEvent]:
+        """
+        Like changes_since, but wait at most `timeout` seconds
+        for the events if there is none yet.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq, timeout)
+        return self.changes_since(seq, limit)
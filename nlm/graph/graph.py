@@ -4,20 +4,273 @@ Graph
 The core module of Graph
 """
 
-from dataclasses import dataclass
-from typing import List
-import types
+from __future__ import annotations
 
-from py2neo.data import Node, Relationship, Subgraph
-from py2neo.database import Graph
-from py2neo.matching import NodeMatcher, RelationshipMatcher
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import List, TYPE_CHECKING
+import threading
+import time
+import types
+import uuid
 
 import re
 
 from schemes.graph import GraphNode, GraphRelation
+from graph.router import GraphRouter
+from graph.slowlog import SlowQueryLog, flatten_plan
+from graph.changes import ChangeLog
 from schemes.error import InputError, QueryError, DatabaseError, OverstepError
+from schemes.error import DeadlineError
 
 from utils.utils import raise_customized_error
+from utils.concurrency import Scheduler
+from utils.compression import compress_props, compress_stored_props
+from utils.compression import decompress_props, decompress_data
+from utils.tracing import tracer, statement_shape
+from configs.config import logger
+
+# py2neo is heavy, only imported when a NLMGraph is created.
+if TYPE_CHECKING:
+    from py2neo.data import Node, Relationship, Subgraph
+    from py2neo.database import Graph
+
+
+_local = threading.local()
+# times out the statements of all the graphs
+_scheduler = Scheduler("nlm-deadline")
+# re-runs the sampled slow statements with PROFILE, one at a time,
+# at most so many waiting, the others are recorded without a plan
+_profiler = ThreadPoolExecutor(1, thread_name_prefix="nlm-profile")
+_profile_slots = threading.BoundedSemaphore(8)
+
+PATTERN_MATCH = re.compile(r'^ ?MATCH')
+# the trailing LIMIT of the query
+PATTERN_LIMIT = re.compile(r'\bLIMIT\s+(\d+)\s*;?\s*$', re.IGNORECASE)
+# a LIMIT of a parameter, never given to a user query
+PATTERN_LIMIT_PARAMETER = re.compile(r'\bLIMIT\s+\$', re.IGNORECASE)
+# the query a trailing LIMIT could not cap: other LIMITs, or a UNION
+PATTERN_UNCAPPED = re.compile(r'\b(LIMIT|UNION)\b', re.IGNORECASE)
+# the clauses around the items of a RETURN
+PATTERN_CLAUSE = re.compile(
+    r'\b(RETURN(?:\s+DISTINCT)?|ORDER\s+BY|SKIP|LIMIT|UNION)\b', re.IGNORECASE)
+# an item of a RETURN with an alias
+PATTERN_ALIASED = re.compile(r'\sAS\s+(\w+|`[^`]*`)\s*$', re.IGNORECASE)
+
+
+@dataclass
+class Deadline:
+
+    """
+    The deadline of the statements run by one thread (e.g. one RPC).
+
+    Parameters
+    -----------
+    nlmg: NLMGraph
+        Where the statements run.
+    expire: float
+        The time.monotonic() the statements should end, None is never.
+    """
+
+    nlmg: NLMGraph
+    expire: float = None
+    cancelled: bool = False
+    # tag of the running statement
+    running: str = None
+
+    def remaining(self) -> float:
+        if self.expire is None:
+            return None
+        return self.expire - time.monotonic()
+
+    def cancel(self, *args):
+        """
+        Cancel the statements, terminate the running one.
+        """
+        self.cancelled = True
+        if self.running:
+            self.nlmg._terminate(self.running)
+
+
+@dataclass
+class Batch:
+
+    """
+    The creates and property updates of one thread, committed together.
+
+    Parameters
+    -----------
+    nlmg: NLMGraph
+        Where the batch commits.
+    max_ops: int
+        Flush (commit) automatically when so many operations are pending.
+    """
+
+    nlmg: NLMGraph
+    max_ops: int = 1000
+
+    def __post_init__(self):
+        # (label, name) -> Node, not committed yet
+        self.nodes = {}
+        self.relationships = []
+        self.updates = []
+        # the committed Nodes and Relationships
+        self.created = []
+
+    @property
+    def ops(self) -> int:
+        """pending operations"""
+        return len(self.nodes) + len(self.relationships) + len(self.updates)
+
+    def add_node(self, label: str, name: str, props: dict) -> Node:
+        """
+        Add a Node, or return the pending one with the same label and name.
+        """
+        if (label, name) in self.nodes:
+            return self.nodes[(label, name)]
+        from py2neo.data import Node
+        node = Node(label, name=name, **props)
+        # merged by label and name when committed
+        node.__primarylabel__ = label
+        node.__primarykey__ = "name"
+        self.nodes[(label, name)] = node
+        self._auto_flush()
+        return node
+
+    def pending_node(self, label: str, name: str) -> Node:
+        return self.nodes.get((label, name))
+
+    def add_relationship(self, relation: Relationship) -> Relationship:
+        self.relationships.append(relation)
+        self._auto_flush()
+        return relation
+
+    def push(self, neog_oj):
+        """
+        Push an updated Node or Relationship.
+        The pending ones need not, they will be committed with their props.
+        """
+        if neog_oj.identity is not None:
+            self.updates.append(neog_oj)
+            self._auto_flush()
+
+    def _auto_flush(self):
+        if self.ops >= self.max_ops:
+            self.flush()
+
+    @raise_customized_error(Exception, DatabaseError)
+    def flush(self):
+        """
+        Commit all the pending operations in one transaction.
+        """
+        if not self.ops:
+            return
+        entities = list(self.nodes.values()) + self.relationships
+        graph = self.nlmg.graph
+        tx = graph.begin()
+        try:
+            # each statement is guarded by the deadline
+            nodes = self._merge_nodes(tx)
+            relations = self._merge_relationships(tx)
+            self._push_updates(tx)
+            tx.commit()
+        except BaseException:
+            if not tx.closed:
+                try:
+                    tx.rollback()
+                except Exception as e:
+                    logger.warning("failed to rollback a batch: %s", e)
+            raise
+        for entity in entities:
+            entity.graph = graph
+        self.nlmg.router.wrote(_labels(*entities, *self.updates))
+        for node in nodes:
+            self.nlmg.changed("add_node", node)
+        for relation in relations:
+            self.nlmg.changed("add_relationship", relation)
+        for neog_oj in self.updates:
+            self.nlmg.changed("update_property", neog_oj)
+        self.created.extend(nodes + relations)
+        self.nodes = {}
+        self.relationships = []
+        self.updates = []
+
+    def _merge_nodes(self, tx) -> list:
+        """
+        MERGE the pending nodes by label and name, one statement a label,
+        the props are set only when created, as `NLMGraph.add_node`,
+        the existed ones get the stored props. Returns the created ones.
+        """
+        groups = {}
+        for (label, _), node in self.nodes.items():
+            groups.setdefault(label, []).append(node)
+        created = []
+        for label, nodes in groups.items():
+            cypher = ("UNWIND $rows AS row "
+                      "WITH row, size([(o:`{0}`) WHERE o.name = row.name | o])"
+                      " = 0 AS created "
+                      "MERGE (n:`{0}` {{name: row.name}}) "
+                      "ON CREATE SET n = row "
+                      "RETURN id(n) AS id, created, properties(n) AS props"
+                      ).format(_escape(label))
+            records = self.nlmg.run(cypher, {"rows": [dict(n) for n in nodes]},
+                                    tx=tx)
+            for node, record in zip(nodes, records):
+                node.identity = record["id"]
+                if record["created"]:
+                    created.append(node)
+                else:
+                    node.clear()
+                    node.update(record["props"])
+        return created
+
+    def _merge_relationships(self, tx) -> list:
+        """
+        MERGE the pending relationships, one statement a kind,
+        the props are set only when created, the existed ones get
+        the stored props. Returns the created ones.
+        """
+        groups = {}
+        for relation in self.relationships:
+            groups.setdefault(type(relation).__name__, []).append(relation)
+        created = []
+        for kind, relations in groups.items():
+            cypher = ("UNWIND $rows AS row "
+                      "MATCH (s) WHERE id(s) = row.start "
+                      "MATCH (e) WHERE id(e) = row.end "
+                      "WITH row, s, e, size([(s)-[o:`{0}`]->(e) | o]) = 0 "
+                      "AS created "
+                      "MERGE (s)-[r:`{0}`]->(e) ON CREATE SET r = row.props "
+                      "RETURN id(r) AS id, created, properties(r) AS props"
+                      ).format(_escape(kind))
+            rows = [{"start": r.start_node.identity, "end": r.end_node.identity,
+                     "props": dict(r)} for r in relations]
+            records = self.nlmg.run(cypher, {"rows": rows}, tx=tx)
+            for relation, record in zip(relations, records):
+                relation.identity = record["id"]
+                if record["created"]:
+                    created.append(relation)
+                else:
+                    relation.clear()
+                    relation.update(record["props"])
+        return created
+
+    def _push_updates(self, tx):
+        """SET the props of the updated nodes and relationships"""
+        from py2neo.data import Relationship
+        groups = {"(x)": [], "()-[x]->()": []}
+        for neog_oj in self.updates:
+            pattern = ("()-[x]->()" if isinstance(neog_oj, Relationship)
+                       else "(x)")
+            groups[pattern].append({"id": neog_oj.identity,
+                                    "props": dict(neog_oj)})
+        for pattern, rows in groups.items():
+            if rows:
+                cypher = ("UNWIND $rows AS row MATCH {} WHERE id(x) = row.id "
+                          "SET x = row.props").format(pattern)
+                self.nlmg.run(cypher, {"rows": rows}, tx=tx)
 
 
 @dataclass
@@ -30,27 +283,288 @@ class NLMGraph:
     -----------
     graph: Graph
         The Neo4j Graph instance.
+    max_query_time: float
+        The max seconds of one statement, None is unlimited.
+    max_cypher_rows: int
+        The max rows of a user given Cypher query.
+    readers: List[Graph]
+        The read replicas, queries go to them, writes go to `graph`.
+    read_policy: str
+        How to choose a reader, "round_robin" or "least_latency".
+    replica_lag: float
+        After a write, reads of its labels go to `graph` for so many seconds.
+    slow_log: SlowQueryLog
+        Records the slow statements, disabled by default.
+    changes: ChangeLog
+        Numbers the writes and publishes their change events.
+    compress_threshold: int
+        Text props of at least so many bytes are stored compressed
+        (never the name), None is disabled. They are decompressed when
+        converted to GraphNode or GraphRelation, in the rows of `stream`
+        and in the change events, but not in the results of `excute`
+        or `run`.
     """
 
     graph: Graph
+    max_query_time: float = None
+    max_cypher_rows: int = 1000
+    readers: List[Graph] = field(default_factory=list)
+    read_policy: str = "round_robin"
+    replica_lag: float = 1.0
+    slow_log: SlowQueryLog = field(default_factory=SlowQueryLog)
+    changes: ChangeLog = field(default_factory=ChangeLog)
+    compress_threshold: int = None
 
     def __post_init__(self):
+        from py2neo.matching import NodeMatcher, RelationshipMatcher
         self.nmatcher = NodeMatcher(self.graph)
         self.rmatcher = RelationshipMatcher(self.graph)
+        self.router = GraphRouter(self.graph, self.readers,
+                                  self.read_policy, self.replica_lag)
+        # the batch of each thread, only of this graph
+        self._batches = threading.local()
+
+    @contextmanager
+    def deadline(self, timeout: float = None) -> Deadline:
+        """
+        All the statements run by this thread in the context should end in
+        `timeout` seconds, or a DeadlineError is raised.
+        The running statement is terminated when expired or cancelled.
+        """
+        expire = None if timeout is None else time.monotonic() + timeout
+        outer = getattr(_local, "deadline", None)
+        scope = Deadline(self, expire)
+        _local.deadline = scope
+        try:
+            yield scope
+        finally:
+            _local.deadline = outer
+
+    def _statement_timeout(self) -> float:
+        """
+        The seconds left for the next statement, None is unlimited.
+        """
+        scope = getattr(_local, "deadline", None)
+        remaining = scope.remaining() if scope else None
+        if scope and scope.cancelled:
+            raise DeadlineError
+        if remaining is not None and remaining <= 0:
+            raise DeadlineError
+        timeouts = [t for t in (remaining, self.max_query_time)
+                    if t is not None]
+        return min(timeouts) if timeouts else None
+
+    @contextmanager
+    def origin(self, name: str):
+        """
+        Name the call the statements run by this thread in the context
+        come from, recorded by the slow query log. The outermost one wins.
+        """
+        outer = getattr(_local, "origin", None)
+        _local.origin = outer or name
+        try:
+            yield
+        finally:
+            _local.origin = outer
+
+    def run(self, cypher: str, parameters: dict = None,
+            consume=list, readonly: bool = False, tx=None, scope=None):
+        """
+        Run a Cypher statement within the deadline.
+
+        Parameters
+        ------------
+        consume: read the cursor while the statement is guarded,
+            default to all the records.
+        readonly: run in a read only transaction.
+        tx: run in the transaction (of the writer) instead,
+            e.g. of a batch, or `self.graph.auto(readonly=True)` to read
+            what is just written.
+        scope: the labels read or written, a read goes to the writer
+            shortly after a write of its labels, None is any label.
+        """
+        if tx is not None:
+            graph, runner = tx.graph, tx
+        else:
+            graph = self.router.reader(scope) if readonly else self.graph
+            runner = self._runner(graph, readonly)
+        start = time.monotonic()
+        ret = None
+        succeeded = False
+        try:
+            with tracer.span("cypher", statement=statement_shape(cypher),
+                             readonly=readonly) as span, \
+                    self._guard(parameters) as guarded:
+                ret = consume(runner.run(cypher, guarded))
+                if isinstance(ret, list):
+                    span.set(rows=len(ret))
+            succeeded = True
+        finally:
+            seconds = time.monotonic() - start
+            rows = len(ret) if isinstance(ret, list) else None
+            profilable = succeeded and readonly and tx is None
+            self._log_if_slow(cypher, parameters, seconds, rows,
+                              graph if profilable else None)
+        # a transaction is marked written when committed
+        if tx is None and readonly:
+            self.router.observe(graph, seconds)
+        elif tx is None:
+            self.router.wrote(scope)
+        return ret
+
+    def _log_if_slow(self, cypher: str, parameters: dict, seconds: float,
+                     rows: int = None, graph: Graph = None):
+        """
+        Record the statement if slow. A sample of the succeeded read
+        statements (given the graph) is re-run with PROFILE in the
+        background, within max_query_time.
+        """
+        if not self.slow_log.is_slow(seconds):
+            return
+        origin = getattr(_local, "origin", None)
+        args = (cypher, parameters, seconds, rows, origin)
+        if (graph is not None and self.slow_log.should_profile() and
+                _profile_slots.acquire(blocking=False)):
+            _profiler.submit(self._profile_slow, graph, *args)
+        else:
+            self.slow_log.record(*args)
+
+    def _profile_slow(self, graph: Graph, cypher: str, parameters: dict,
+                      *args):
+        plan = None
+        try:
+            # no deadline of the caller here, only max_query_time
+            with self._guard(parameters) as guarded:
+                cursor = self._runner(graph, readonly=True).run(
+                    "PROFILE " + cypher, guarded)
+                list(cursor)
+                plan = flatten_plan(cursor.plan())
+        except Exception as e:
+            logger.warning("failed to profile a slow query: %s", e)
+        finally:
+            _profile_slots.release()
+        self.slow_log.record(cypher, parameters, *args, plan=plan)
+
+    def _runner(self, graph: Graph, readonly: bool):
+        if readonly:
+            return graph.auto(readonly=True)
+        return graph
+
+    @contextmanager
+    def _guard(self, parameters: dict = None) -> dict:
+        """
+        Guard the statement run in the context by the deadline, yield the
+        parameters to run it with. It is tagged by the parameter `nlm_tag`,
+        so the statement is the same and its plan is cached.
+        """
+        timeout = self._statement_timeout()
+        if timeout is None:
+            yield parameters
+            return
+        scope = getattr(_local, "deadline", None)
+        tag = uuid.uuid4().hex
+        start = time.monotonic()
+        if scope:
+            scope.running = tag
+        timer = _scheduler.call_later(timeout, self._terminate, tag)
+        try:
+            yield dict(parameters or {}, nlm_tag=tag)
+        except Exception:
+            if (time.monotonic() - start >= timeout or
+                    (scope and scope.cancelled)):
+                raise DeadlineError
+            raise
+        finally:
+            timer.cancel()
+            if scope:
+                scope.running = None
+
+    def _terminate(self, tag: str):
+        """
+        Terminate the running statement tagged by `run`.
+        """
+        cypher = ("CALL dbms.listQueries() YIELD queryId, parameters "
+                  "WHERE parameters.nlm_tag = $tag "
+                  "CALL dbms.killQuery(queryId) YIELD queryId AS killed "
+                  "RETURN killed")
+        # it could be running on the writer or any reader
+        for graph in self.router.graphs:
+            try:
+                graph.run(cypher, tag=tag)
+            except Exception as e:
+                logger.warning("failed to terminate query %s: %s", tag, e)
+
+    def changed(self, op: str, neog_oj):
+        """
+        Publish the change of a written Node or Relationship.
+        """
+        self.changes.publish(op, _key(neog_oj),
+                             decompress_props(dict(neog_oj)))
+
+    def changes_since(self, seq: int, limit: int = 1000) -> list:
+        """
+        The change events after the write sequence `seq`.
+        """
+        return self.changes.changes_since(seq, limit)
+
+    @contextmanager
+    def batch(self, max_ops: int = 1000) -> Batch:
+        """
+        All the creates and property updates of this thread to this graph
+        in the context are committed in one transaction (or in chunks of `max_ops`)
+        at exit, then `created` of the batch are the entities created
+        (not the existed ones MERGE matched).
+        Pending nodes are found by `check_update_node` with label and name.
+
+        In an outer batch, it joins the outer one.
+        If an error is raised, the pending operations are discarded.
+        """
+        outer = getattr(self._batches, "batch", None)
+        if outer is not None:
+            yield outer
+            return
+        batch = Batch(self, max_ops)
+        self._batches.batch = batch
+        try:
+            yield batch
+            self._batches.batch = None
+            batch.flush()
+        finally:
+            self._batches.batch = None
 
     @raise_customized_error(Exception, DatabaseError)
     def push_graph(self, subgraph: Subgraph) -> bool:
         """
         Push a subgraph (node, relationship, subgraph) to the Neo database.
+        It is not terminated when the deadline expires,
+        only refused if already expired.
+        The new (not bound) entities are stored with their props compressed,
+        and published as added.
         """
+        self._statement_timeout()
+        nodes = [n for n in subgraph.nodes if n.graph is None]
+        relations = [r for r in subgraph.relationships if r.graph is None]
+        for entity in nodes + relations:
+            props = compress_props(dict(entity), self.compress_threshold)
+            entity.clear()
+            entity.update(props)
         tx = self.graph.begin()
         tx.create(subgraph)
         tx.commit()
+        self.router.wrote(_labels(*subgraph.nodes))
+        for node in nodes:
+            self.changed("add_node", node)
+        for relation in relations:
+            self.changed("add_relationship", relation)
         return tx.finished()
 
+    @raise_customized_error(Exception, DatabaseError)
     def add_node(self, label: str, name: str, props: dict) -> Node:
         """
         Add a Node to database.
+        It is a MERGE by label and name, so concurrent writers never
+        create duplicated nodes (with a unique constraint on name, also
+        across processes, see `create_name_constraint`).
 
         Parameters
         ------------
@@ -60,12 +574,30 @@ class NLMGraph:
 
         Returns
         --------
-        out: a Node.
+        out: a Node, the existed one if the name is already in the graph.
         """
-        node = Node(label, name=name, **props)
-        self.push_graph(node)
+        props = compress_props(props, self.compress_threshold)
+        batch = getattr(self._batches, "batch", None)
+        if batch is not None:
+            return batch.add_node(label, name, props)
+        cypher = ("MERGE (n:`{}` {{name: $name}}) "
+                  "ON CREATE SET n += $props RETURN n").format(_escape(label))
+        records, stats = self.run(
+            cypher, {"name": name, "props": props},
+            consume=lambda cursor: (list(cursor), cursor.stats()),
+            scope=[label])
+        node = records[0]["n"]
+        if stats.get("nodes_created"):
+            self.changed("add_node", node)
         return node
 
+    def create_name_constraint(self, label: str) -> dict:
+        """
+        Create a unique constraint on the name of the label.
+        """
+        cypher = "CREATE CONSTRAINT ON (n:`{}`) ASSERT n.name IS UNIQUE"
+        return self.excute(cypher.format(_escape(label)))
+
     def check_update_node(self, nlmgn: GraphNode,
                           update_props: bool = False) -> Node:
         """
@@ -85,8 +617,11 @@ class NLMGraph:
             If not, return the created Node (and need to commit to the graph).
         """
         label, name, props = nlmgn.label, nlmgn.name, nlmgn.props
-        neogn = self.nmatcher.match(label, name=name).first()
-        if neogn:
+        batch = getattr(self._batches, "batch", None)
+        neogn = batch.pending_node(label, name) if batch else None
+        if neogn is None:
+            neogn = self._match_node(label, name)
+        if neogn is not None:
             if update_props:
                 node = self.update_property(neogn, props)
             else:
@@ -108,13 +643,27 @@ class NLMGraph:
         --------
         out: updated  Node or Relationship
         """
+        if getattr(neog_oj, "projected", False):
+            # only some of its props, pushing it would drop the others
+            raise InputError
+        props = compress_props(props, self.compress_threshold)
         neog_oj_props = dict(neog_oj)
         if props and props != neog_oj_props:
             # make sure new props is behind the exisited props.
             neog_oj.update({**neog_oj_props, **props})
             # only can be pushed when neog_oj is already in the graph
             # so we do not need push_graph function here
-            self.graph.push(neog_oj)
+            batch = getattr(self._batches, "batch", None)
+            if batch is not None:
+                batch.push(neog_oj)
+            else:
+                from py2neo.data import Relationship
+                pattern = ("()-[x]->()" if isinstance(neog_oj, Relationship)
+                           else "(x)")
+                self.run("MATCH {} WHERE id(x) = $id SET x += $props".format(
+                    pattern), {"id": neog_oj.identity, "props": props},
+                    scope=_labels(neog_oj))
+                self.changed("update_property", neog_oj)
         return neog_oj
 
     def add_relationship(self, start: Node, end: Node,
@@ -133,10 +682,48 @@ class NLMGraph:
         --------
         out: a Relationship.
         """
+        from py2neo.data import Relationship
+        props = compress_props(props, self.compress_threshold)
         relation = Relationship(start, kind, end, **props)
-        self.push_graph(relation)
+        batch = getattr(self._batches, "batch", None)
+        if batch is not None:
+            return batch.add_relationship(relation)
+        # MERGE as the batch, so an existed one is not duplicated
+        cypher = ("MATCH (s) WHERE id(s) = $start MATCH (e) WHERE id(e) = $end "
+                  "WITH s, e, size([(s)-[o:`{0}`]->(e) | o]) = 0 AS created "
+                  "MERGE (s)-[r:`{0}`]->(e) ON CREATE SET r = $props "
+                  "RETURN r, created").format(_escape(type(relation).__name__))
+        record = self.run(cypher, {"start": start.identity,
+                                   "end": end.identity,
+                                   "props": props},
+                          scope=_labels(start, end))[0]
+        relation = record["r"]
+        if record["created"]:
+            self.changed("add_relationship", relation)
         return relation
 
+    def _match_node(self, label: str, name: str) -> Node:
+        """The node of the label and name, on the writer."""
+        cypher = ("MATCH (n:`{}`) WHERE n.name = $name "
+                  "RETURN n LIMIT 1").format(_escape(label))
+        records = self.run(cypher, {"name": name},
+                           tx=self.graph.auto(readonly=True))
+        return records[0]["n"] if records else None
+
+    def _match_relationship(self, start: Node, end: Node,
+                            kind: str = None) -> Relationship:
+        """A relationship (of the kind if given) from start to end,
+        on the writer. None if any of them is pending (in a batch)."""
+        if start.identity is None or end.identity is None:
+            return None
+        cypher = ("MATCH (s)-[r{}]->(e) WHERE id(s) = $start AND id(e) = $end "
+                  "RETURN r LIMIT 1").format(
+                      ":`{}`".format(_escape(kind)) if kind else "")
+        records = self.run(cypher, {"start": start.identity,
+                                    "end": end.identity},
+                           tx=self.graph.auto(readonly=True))
+        return records[0]["r"] if records else None
+
     def check_update_relationship(self, nlmgr: GraphRelation,
                                   update_props: bool = False) -> Relationship:
         """
@@ -153,7 +740,7 @@ class NLMGraph:
         kind, props = nlmgr.kind, nlmgr.props
         start = self.check_update_node(nlmgr.start, update_props)
         end = self.check_update_node(nlmgr.end, update_props)
-        neogr = self.rmatcher.match((start, end), r_type=kind).first()
+        neogr = self._match_relationship(start, end, kind)
         if neogr:
             if update_props:
                 relation = self.update_property(neogr, props)
@@ -179,12 +766,17 @@ class NLMGraph:
         if isinstance(gin, GraphNode):
             return self.add_node(gin.label, gin.name, gin.props)
         elif isinstance(gin, GraphRelation) and gin.kind:
-            start = self.check_update_node(gin.start)
-            end = self.check_update_node(gin.end)
-            return self.add_relationship(start, end, gin.kind, gin.props)
+            # the relation and its new nodes in one transaction
+            with self.batch():
+                start = self.check_update_node(gin.start)
+                end = self.check_update_node(gin.end)
+                relation = self.add_relationship(
+                    start, end, gin.kind, gin.props)
+            return relation
         elif isinstance(gin, GraphRelation) and gin.kind == None:
-            start = self.check_update_node(gin.start)
-            end = self.check_update_node(gin.end)
+            with self.batch():
+                start = self.check_update_node(gin.start)
+                end = self.check_update_node(gin.end)
             return (start, end)
         else:
             raise InputError
@@ -213,13 +805,19 @@ class NLMGraph:
         else:
             raise InputError
 
-    def query(self, qin, topn=1, limit=10, fuzzy=False) -> list:
+    def query(self, qin, topn=1, limit=10, fuzzy=False, candidates=5,
+              projection=None) -> list:
         """
         Query by user given.
         
         Parameters
         -----------
         qin: could be GraphNode, GraphRelation, or just Cypher.
+        candidates: how many start and end nodes to consider for a GraphRelation.
+        projection: the prop keys returned (besides name), None is all.
+            Only those are returned by Neo4j, plus the keys of the query
+            props (they rank the matches), the others are loaded lazily
+            when accessed (see `LazyProps`).
 
         Returns
         ---------
@@ -227,9 +825,10 @@ class NLMGraph:
 
         """
         if isinstance(qin, GraphNode):
-            ret = self._query_by_node(qin, topn, limit, fuzzy)
+            ret = self._query_by_node(qin, topn, limit, fuzzy, projection)
         elif isinstance(qin, GraphRelation):
-            ret = self._query_by_relation(qin, topn, limit, fuzzy)
+            ret = self._query_by_relation(qin, topn, limit, fuzzy, candidates,
+                                          projection)
         elif isinstance(qin, str):
             ret = self._query_by_cypher(qin)
         else:
@@ -242,83 +841,329 @@ class NLMGraph:
         """
         ret = []
         for node in matched_nodes:
-            nprops = dict(node)
-            num = 0
-            for k, v in props.items():
-                if k in nprops and nprops[k] == v:
-                    num += 1
-            ret.append((node, num))
+            ret.append((node, self._props_score(node, props)))
         sorted_ret = sorted(ret, key=lambda x: x[1], reverse=True)
         return [n for (n, _) in sorted_ret]
 
+    def _props_score(self, neog_oj, props: dict) -> int:
+        """
+        The number of props of a Node or Relationship equal to the given props.
+        """
+        nprops = decompress_props(dict(neog_oj))
+        num = 0
+        for k, v in props.items():
+            if k in nprops and nprops[k] == v:
+                num += 1
+        return num
+
     @raise_customized_error(Exception, QueryError)
     def _query_by_node(self, gn: GraphNode,
                        topn: int,
                        limit: int,
-                       fuzzy: bool) -> List[Node]:
+                       fuzzy: bool,
+                       projection: List[str] = None) -> List[Node]:
         """
         Query node by given label and name.
         If None, then by those nodes whose nodes contains the given name
         """
         label, name, props = gn.label, gn.name, gn.props
-        nmatch = self.nmatcher.match(label)
-        nodes = nmatch.where(name=name).limit(limit)
-        if fuzzy and nodes.first() == None:
-            nodes = nmatch.where(name__contains=name).limit(limit)
-        nmlst = list(nodes)
+        cypher = ("MATCH (n:`{}`) WHERE n.name {} $name "
+                  "RETURN {} AS n LIMIT $limit")
+        ret = _project("n", projection, props, node=True)
+        parameters = {"name": name, "limit": limit}
+        records = self.run(cypher.format(_escape(label), "=", ret),
+                           parameters, readonly=True, scope=[label])
+        if fuzzy and not records:
+            records = self.run(
+                cypher.format(_escape(label), "CONTAINS", ret), parameters,
+                readonly=True, scope=[label])
+        nmlst = [self._entity(record["n"]) for record in records]
         return self.__from_match_to_return(nmlst, props, topn)
 
     @raise_customized_error(Exception, QueryError)
     def _query_by_relation(self, gr: GraphRelation,
                            topn: int,
                            limit: int,
-                           fuzzy: bool) -> List[Relationship]:
+                           fuzzy: bool,
+                           candidates: int = 5,
+                           projection: List[str] = None) -> List[Relationship]:
         """
         Query relations by given start, end and kind.
         If start and end are None, return [].
         If start or end is None, then by kind and start or end.
 
-        If result is None, then by start or end, or by both.
+        The top `candidates` nodes of start and end are all considered,
+        every (start, end) pair is resolved in one single Cypher query.
+        If both start and end exist but no relation matches the kind,
+        then by start and end only.
+
+        Results are ranked by endpoint match quality plus props score.
         """
-        starts = self._query_by_node(gr.start, topn=1, limit=5, fuzzy=fuzzy)
-        ends = self._query_by_node(gr.end, topn=1, limit=5, fuzzy=fuzzy)
-        start = starts[0] if starts else None
-        end = ends[0] if ends else None
-        kind, props = gr.kind, gr.props
-        # print("start: ", start)
-        # print("end:", end)
-        if not start and not end:
+        # only the ids (and the props to rank) of the candidates are needed
+        starts = self._query_by_node(
+            gr.start, topn=candidates, limit=max(candidates, 5), fuzzy=fuzzy,
+            projection=[])
+        ends = self._query_by_node(
+            gr.end, topn=candidates, limit=max(candidates, 5), fuzzy=fuzzy,
+            projection=[])
+        if not starts and not ends:
             return []
-        # start, end could be None
-        # r_type could be None
-        relations = self.rmatcher.match((start, end), r_type=kind).limit(limit)
-        if relations.first() == None and start and end:
-            relations = self.rmatcher.match((start, end)).limit(limit)
-        rmlst = list(relations)
-        return self.__from_match_to_return(rmlst, props, topn)
+        rmlst = self._match_relations(starts, ends, gr.kind, limit,
+                                      projection, gr)
+        return self._rank_relations(rmlst, gr, starts, ends)[:topn]
 
-    def _query_by_cypher(self, cypher: str) -> types.GeneratorType:
+    def _match_relations(self, starts: List[Node], ends: List[Node],
+                         kind: str, limit: int,
+                         projection: List[str] = None,
+                         gr: GraphRelation = None) -> List[Relationship]:
         """
-        Return a generator, the content depends on your query input.
+        Match relations from any of starts to any of ends in one Cypher query.
+        If starts or ends is empty, it is not restricted.
+
+        If both starts and ends are given, relations of other kinds are
+        returned when none matches the kind.
+        """
+        gr = gr or GraphRelation(GraphNode("", ""), GraphNode("", ""))
+        conditions = []
+        if starts:
+            conditions.append("id(s) IN $S")
+        if ends:
+            conditions.append("id(e) IN $E")
+        # when both sides exist, relations of other kinds are the fallback,
+        # so only rank them behind instead of filtering them out.
+        if kind and not (starts and ends):
+            conditions.append("type(r) = $kind")
+        # return s and e as well, so the endpoints come with their props.
+        cypher = ("MATCH (s)-[r]->(e) WHERE {} "
+                  "RETURN {} AS s, {} AS r, {} AS e, "
+                  "type(r) = $kind AS same_kind "
+                  "ORDER BY same_kind DESC LIMIT $limit").format(
+                      " AND ".join(conditions),
+                      _project("s", projection, gr.start.props, node=True),
+                      _project("r", projection, gr.props, node=False),
+                      _project("e", projection, gr.end.props, node=True))
+        cursor = self.run(cypher, {"S": [n.identity for n in starts],
+                                   "E": [n.identity for n in ends],
+                                   "kind": kind, "limit": limit},
+                          readonly=True, scope=_labels(*starts, *ends))
+        records = [(self._relationship(record), record["same_kind"])
+                   for record in cursor]
+        if kind and any(same for (_, same) in records):
+            return [r for (r, same) in records if same]
+        return [r for (r, _) in records]
+
+    @raise_customized_error(Exception, QueryError)
+    def query_nodes(self, gns: List[GraphNode],
+                    topn: int = 1,
+                    limit: int = 10,
+                    fuzzy: bool = False,
+                    projection: List[str] = None) -> List[List[Node]]:
+        """
+        Query many nodes by given label and name in one batch.
+        If fuzzy, the ones not matched are then queried (in one batch) by
+        those nodes whose names contain the given name.
+
+        Returns
+        --------
+        out: matched nodes of each GraphNode, in the given order.
+        """
+        matched = self._match_nodes(gns, limit, "=", projection)
+        missing = [gn for gn in gns if not matched.get((gn.label, gn.name))]
+        if fuzzy and missing:
+            matched.update(self._match_nodes(missing, limit, "CONTAINS",
+                                             projection))
+        ret = []
+        for gn in gns:
+            nmlst = matched.get((gn.label, gn.name), [])
+            ret.append(self.__from_match_to_return(nmlst, gn.props, topn))
+        return ret
+
+    def _match_nodes(self, gns: List[GraphNode],
+                     limit: int, operator: str,
+                     projection: List[str] = None) -> dict:
+        """
+        One Cypher query, one part of each label, so the label index is used.
+        """
+        names = {}
+        keys = set()
+        for gn in gns:
+            names.setdefault(gn.label, set()).add(gn.name)
+            keys.update(gn.props)
+        if not names:
+            return {}
+        parts = []
+        params = {"limit": limit}
+        for i, (label, label_names) in enumerate(names.items()):
+            parts.append(
+                "UNWIND $names{i} AS name "
+                "MATCH (n:`{label}`) WHERE n.name {op} name "
+                "WITH name, collect({ret})[..$limit] AS nodes "
+                "RETURN $label{i} AS label, name, nodes".format(
+                    i=i, label=_escape(label), op=operator,
+                    ret=_project("n", projection, keys, node=True)))
+            params["names{}".format(i)] = list(label_names)
+            params["label{}".format(i)] = label
+        cursor = self.run(" UNION ALL ".join(parts), params, readonly=True,
+                          scope=list(names))
+        return {(record["label"], record["name"]):
+                [self._entity(n) for n in record["nodes"]]
+                for record in cursor}
+
+    @raise_customized_error(Exception, QueryError)
+    def query_relations_among(self, nodes: List[Node],
+                              kind: str = None,
+                              limit: int = 10,
+                              projection: List[str] = None
+                              ) -> List[Relationship]:
+        """
+        Query the relations among the given nodes, in one Cypher query.
+        Relations of the given kind are ranked ahead.
+        """
+        if len(nodes) < 2:
+            return []
+        cypher = ("MATCH (s)-[r]->(e) WHERE id(s) IN $ids AND id(e) IN $ids "
+                  "RETURN {} AS s, {} AS r, {} AS e "
+                  "ORDER BY type(r) = $kind DESC LIMIT $limit").format(
+                      _project("s", projection, node=True),
+                      _project("r", projection, node=False),
+                      _project("e", projection, node=True))
+        cursor = self.run(cypher, {"ids": [n.identity for n in nodes],
+                                   "kind": kind, "limit": limit},
+                          readonly=True, scope=_labels(*nodes))
+        return [self._relationship(record) for record in cursor]
+
+    def _entity(self, value, start: Node = None, end: Node = None):
+        """
+        A Node (or a Relationship of the start and end) of a projected
+        value, a Node or Relationship as it is.
+        """
+        if not isinstance(value, dict):
+            return value
+        from py2neo.data import Node, Relationship
+        if start is None:
+            entity = Node(*value["kind"], **value["props"])
+        else:
+            entity = Relationship(start, value["kind"], end, **value["props"])
+        entity.identity = value["id"]
+        # not bound (entity.graph), so it is never pushed with only the
+        # projected props, the rest of the props are loaded from the source.
+        entity.source = self.graph
+        entity.projected = True
+        return entity
+
+    def _relationship(self, record) -> Relationship:
+        if not isinstance(record["r"], dict):
+            return record["r"]
+        return self._entity(record["r"], self._entity(record["s"]),
+                            self._entity(record["e"]))
+
+    def _rank_relations(self, relations: list, gr: GraphRelation,
+                        starts: list, ends: list) -> list:
+        """
+        Sort relations by the match quality of their start and end nodes
+        plus the number of props equal to the given props.
+        """
+        def node_quality(node, gn: GraphNode, candidates: list) -> float:
+            if not candidates:
+                return 0
+            name = node.get("name") or ""
+            if name == gn.name:
+                score = 1.0
+            else:
+                # fuzzy matched, the closer the length, the better
+                score = len(gn.name) / len(name) if name else 0
+            return score + self._props_score(node, gn.props)
+
+        ret = []
+        for relation in relations:
+            score = (node_quality(relation.start_node, gr.start, starts) +
+                     node_quality(relation.end_node, gr.end, ends) +
+                     self._props_score(relation, gr.props))
+            ret.append((relation, score))
+        sorted_ret = sorted(ret, key=lambda x: x[1], reverse=True)
+        return [r for (r, _) in sorted_ret]
+
+    def _query_by_cypher(self, cypher: str) -> list:
+        """
+        Return a list, the content depends on your query input.
+        At most LIMIT (default 5) rows, never more than max_cypher_rows.
         """
-        pattern_match = re.compile(r'^ ?MATCH')
-        pattern_limit = re.compile(r'LIMIT \d')
-        if not pattern_match.search(cypher):
-            raise OverstepError
-        searched_limit = pattern_limit.search(cypher)
-        topn = int(searched_limit.group().split()[-1]) if searched_limit else 5
         try:
-            cursor = self.graph.run(cypher)
-            res = []
-            n = 0
-            for item in cursor:
-                res.append(item.data())
-                n += 1
-                if n == topn:
-                    return res
+            return list(self.stream(cypher, 5))
+        except (DeadlineError, OverstepError):
+            raise
         except Exception as e:
             raise QueryError
 
+    def stream(self, cypher: str, limit: int = None,
+               scope=None) -> types.GeneratorType:
+        """
+        Yield the rows of a read only Cypher query one by one.
+
+        The LIMIT of the query is injected or clamped, so Neo4j stops
+        at most at max_cypher_rows, it runs in a read transaction.
+        The driver receives the whole (capped) result before the first
+        row, so the rows are not held decompressed at once, but the
+        memory of the result is bounded by the LIMIT, not by streaming.
+
+        Parameters
+        ------------
+        limit: rows if the query has no LIMIT, default to max_cypher_rows.
+        scope: the labels the query reads, as `run`. The labels of a user
+            query are not known, so None (any label): shortly after any
+            write it reads the writer, never a stale replica.
+        """
+        if not PATTERN_MATCH.search(cypher):
+            raise OverstepError
+        cypher, rows = self._clamp_limit(cypher, limit)
+        graph = self.router.reader(scope)
+        start = time.monotonic()
+        streamed = 0
+        succeeded = False
+        try:
+            with tracer.span("cypher", statement=statement_shape(cypher),
+                             readonly=True) as span, \
+                    self._guard() as guarded:
+                cursor = self._runner(graph, readonly=True).run(cypher,
+                                                                guarded)
+                for record in islice(cursor, rows):
+                    streamed += 1
+                    span.set(rows=streamed)
+                    yield decompress_data(record.data())
+            succeeded = True
+        finally:
+            # includes the time the rows wait for the consumer
+            self._log_if_slow(cypher, None, time.monotonic() - start,
+                              streamed, graph if succeeded else None)
+
+    def _clamp_limit(self, cypher: str, limit: int = None) -> tuple:
+        """
+        A LIMIT of a parameter is refused (OverstepError). A query of other
+        LIMITs (e.g. an expression, or not trailing) or a UNION is capped
+        by a subquery, `CALL { query } RETURN * LIMIT rows`, the items
+        the query returns unaliased are aliased by their text, which is
+        the column name Neo4j gives them anyway.
+
+        Returns
+        --------
+        out: (the Cypher with a trailing LIMIT, max rows)
+        """
+        if PATTERN_LIMIT_PARAMETER.search(cypher):
+            raise OverstepError
+        cap = self.max_cypher_rows
+        cypher = cypher.rstrip().rstrip(";")
+        searched = PATTERN_LIMIT.search(cypher)
+        if searched and not PATTERN_UNCAPPED.search(
+                cypher[:searched.start()]):
+            rows = min(int(searched.group(1)), cap)
+            cypher = cypher[:searched.start()].rstrip()
+            return "{} LIMIT {}".format(cypher, rows), rows
+        rows = min(limit or cap, cap)
+        if PATTERN_UNCAPPED.search(cypher):
+            # a subquery has to alias what it returns
+            cypher = "CALL {{ {} }} RETURN *".format(_alias_returns(cypher))
+        return "{} LIMIT {}".format(cypher, rows), rows
+
     def __from_match_to_return(self, matched_list: list,
                                props: dict, topn: int) -> list:
         if not matched_list:
@@ -332,44 +1177,249 @@ class NLMGraph:
     @property
     def labels(self) -> frozenset:
         """all labels""" 
-        return self.graph.schema.node_labels
+        return self.router.reader().schema.node_labels
 
     @property
     def relationship_types(self) -> frozenset:
         """all relation types"""
-        return self.graph.schema.relationship_types
+        return self.router.reader().schema.relationship_types
 
     @property
     def nodes_num(self) -> int:
         """all nodes amounts"""
-        return len(self.graph.nodes)
+        return len(self.router.reader().nodes)
 
     @property
     def relationships_num(self) -> int:
         """all relations amounts"""
-        return len(self.graph.relationships)
+        return len(self.router.reader().relationships)
 
     @property
     def nodes(self) -> types.GeneratorType:
         """all nodes (a generator)"""
-        return iter(self.graph.nodes.match())
+        return iter(self.router.reader().nodes.match())
 
     @property
     def relationships(self) -> types.GeneratorType:
         """all relations (a generator)"""
-        return iter(self.graph.relationships.match())
+        return iter(self.router.reader().relationships.match())
 
-    def excute(self, cypher) -> dict:
+    def excute(self, cypher: str, parameters: dict = None) -> dict:
         """
         Be careful to use this function.
         Especially when you're updating the database.
         This function will not check the duplicated nodes or relationships.
+
+        Parameters
+        ------------
+        cypher: the Cypher statement, values should be given as $parameters.
+        parameters: the values of the parameters.
         """
         try:
-            run = self.graph.run(cypher)
-            return dict(run.stats())
+            stats = self.run(cypher, parameters,
+                             consume=lambda run: dict(run.stats()))
+        except DeadlineError:
+            raise
         except Exception as e:
             raise InputError
+        if stats.get("contained_updates"):
+            # the entities are unknown, the statement goes as the props
+            self.changes.publish("excute", [], {"cypher": cypher})
+        return stats
+
+    def excute_many(self, cypher: str, rows: List[dict],
+                    batch_size: int = 1000) -> dict:
+        """
+        Run the Cypher statement for each of the rows.
+        Rows are sent by `UNWIND $rows AS row`, one transaction per batch,
+        the statement should refer to the values as `row.key`.
+
+        e.g. excute_many("MATCH (n:Person {name: row.name}) SET n.age = row.age",
+                         [{"name": "Alice", "age": 20}, ...])
+
+        Returns
+        --------
+        out: stats summed up across the batches,
+            plus rows, batches, seconds and rows_per_second.
+        """
+        cypher = "UNWIND $rows AS row " + cypher
+        total = {}
+        batches = 0
+        start = time.monotonic()
+        for i in range(0, len(rows), batch_size):
+            stats = self.excute(cypher, {"rows": rows[i: i+batch_size]})
+            for k, v in stats.items():
+                if isinstance(v, bool):
+                    total[k] = total.get(k, False) or v
+                else:
+                    total[k] = total.get(k, 0) + v
+            batches += 1
+        seconds = time.monotonic() - start
+        total.update({"rows": len(rows),
+                      "batches": batches,
+                      "seconds": seconds,
+                      "rows_per_second": len(rows) / seconds if seconds else 0})
+        logger.info("excute_many: %d rows in %d batches, %.3fs, %.1f rows/s",
+                    len(rows), batches, seconds, total["rows_per_second"])
+        return total
+
+    def compress_existing(self, batch_size: int = 1000) -> dict:
+        """
+        Compress the long text props already in the graph,
+        by `compress_threshold`, page by page (of the ids).
+        Compressed values are skipped, so it could be run again after
+        an interruption.
+
+        Returns
+        --------
+        out: the numbers of nodes and relationships compressed.
+        """
+        if self.compress_threshold is None:
+            raise InputError
+        total = {}
+        for kind, pattern in (("nodes", "(x)"),
+                              ("relationships", "()-[x]->()")):
+            total[kind] = 0
+            after = -1
+            while True:
+                records = self.run(_page(pattern),
+                                   {"after": after, "size": batch_size})
+                if not records:
+                    break
+                after = records[-1]["id"]
+                rows = []
+                for record in records:
+                    props = compress_stored_props(record["props"],
+                                                  self.compress_threshold)
+                    changed = {k: v for k, v in props.items()
+                               if v != record["props"][k]}
+                    if changed:
+                        rows.append({"id": record["id"], "props": changed})
+                if rows:
+                    self.excute_many(
+                        "MATCH {} WHERE id(x) = row.id SET x += row.props"
+                        .format(pattern), rows, batch_size)
+                total[kind] += len(rows)
+                logger.info("compress_existing: %d %s compressed",
+                            total[kind], kind)
+        return total
+
+
+def _page(pattern: str) -> str:
+    return ("MATCH {} WHERE id(x) > $after "
+            "RETURN id(x) AS id, properties(x) AS props "
+            "ORDER BY id(x) LIMIT $size").format(pattern)
+
+
+def _project(var: str, projection: List[str] = None, keys=(),
+             node: bool = True) -> str:
+    """
+    The Cypher of the var to RETURN, only the props of the projection
+    and the keys (plus name of a node), a map of id, kind (labels of a node,
+    type of a relationship) and props. If projection is None, the var.
+    """
+    if projection is None:
+        return var
+    selected = (["name"] if node else []) + sorted(
+        (set(projection) | set(keys)) - {"name"})
+    return "{{id: id({v}), kind: {kind}({v}), props: {v} {{{props}}}}}".format(
+        v=var, kind="labels" if node else "type",
+        props=", ".join(".`{}`".format(_escape(k)) for k in selected))
+
+
+def _key(neog_oj) -> list:
+    """
+    The key of a change: [label, name] of a Node,
+    [start key, kind, end key] of a Relationship.
+    """
+    from py2neo.data import Relationship
+    if isinstance(neog_oj, Relationship):
+        return [_key(neog_oj.start_node), type(neog_oj).__name__,
+                _key(neog_oj.end_node)]
+    return [next(iter(neog_oj.labels), None), neog_oj.get("name")]
+
+
+def _labels(*entities) -> set:
+    """The labels of the Nodes, and of the start and end of the
+    Relationships, the scope of a read or write of them."""
+    from py2neo.data import Relationship
+    labels = set()
+    for entity in entities:
+        if isinstance(entity, Relationship):
+            labels |= _labels(entity.start_node, entity.end_node)
+        else:
+            labels.update(entity.labels)
+    return labels
+
+
+def _mask(cypher: str) -> str:
+    """
+    The Cypher of the same length, the content of the strings,
+    backticked names and brackets replaced by "_", so only
+    the top level clauses and commas are left.
+    """
+    pairs = {"(": ")", "[": "]", "{": "}"}
+    masked = []
+    closing = []
+    quote = None
+    escaped = False
+    for char in cypher:
+        if quote is not None:
+            if escaped:
+                escaped = False
+            elif char == "\\" and quote != "`":
+                escaped = True
+            elif char == quote:
+                quote = None
+                if not closing:
+                    masked.append(char)
+                    continue
+            masked.append("_")
+        elif char in "'\"`":
+            quote = char
+            masked.append("_" if closing else char)
+        elif char in pairs:
+            masked.append("_" if closing else char)
+            closing.append(pairs[char])
+        elif closing and char == closing[-1]:
+            closing.pop()
+            masked.append("_" if closing else char)
+        else:
+            masked.append("_" if closing else char)
+    return "".join(masked)
+
+
+def _alias_returns(cypher: str) -> str:
+    """
+    Alias the unaliased items of the top level RETURNs by their text,
+    e.g. `RETURN a.name, count(*) AS n` to
+    `RETURN a.name AS \`a.name\`, count(*) AS n`.
+    """
+    masked = _mask(cypher)
+    clauses = list(PATTERN_CLAUSE.finditer(masked))
+    items = []
+    for i, clause in enumerate(clauses):
+        if not clause.group(1).upper().startswith("RETURN"):
+            continue
+        end = clauses[i + 1].start() if i + 1 < len(clauses) else len(cypher)
+        start = clause.end()
+        for comma in [m.start() for m in re.finditer(",", masked)
+                      if start <= m.start() < end] + [end]:
+            items.append((start, comma))
+            start = comma + 1
+    ret = cypher
+    for start, end in reversed(items):
+        item = cypher[start:end].strip()
+        if item == "*" or PATTERN_ALIASED.search(masked[start:end]):
+            continue
+        aliased = " {} AS `{}` ".format(item, _escape(item))
+        ret = ret[:start] + aliased + ret[end:]
+    return ret
+
+
+def _escape(label: str) -> str:
+    """Escape a label to be used in Cypher with backticks."""
+    return label.replace("`", "``")
 
 
 if __name__ == '__main__':
@@ -377,6 +1427,7 @@ if __name__ == '__main__':
     import sys
     root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     sys.path.append(root)
+    from py2neo.database import Graph
     nlmg = NLMGraph(graph=Graph(port=7688))
 
     start = GraphNode("Person", "AliceThree")
@@ -0,0 +1,126 @@
+"""
+Router
+====================================
+Route the statements across a writer and read replicas.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Iterable, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from py2neo.database import Graph
+
+
+# the scope of the writes of unknown labels, e.g. a Cypher statement
+ANY = None
+
+
+@dataclass
+class GraphRouter:
+
+    """
+    Read statements go to the readers, writes go to the writer.
+
+    Parameters
+    -----------
+    writer: Graph
+        The primary.
+    readers: List[Graph]
+        The read replicas, if empty, reads go to the writer.
+    policy: str
+        "round_robin" or "least_latency" (EWMA of the statement time).
+    replica_lag: float
+        After a write of some labels, reads of them go to the writer
+        for so many seconds, so a recall right after a write sees it.
+        It stands for the causal consistency bookmarks,
+        which py2neo does not expose.
+    probe_every: float
+        Of "least_latency", a reader not read for so many seconds gets
+        the next read, so a reader once slow is measured again.
+    """
+
+    writer: Graph
+    readers: List[Graph] = field(default_factory=list)
+    policy: str = "round_robin"
+    replica_lag: float = 1.0
+    probe_every: float = 10.0
+
+    def __post_init__(self):
+        if self.policy not in ("round_robin", "least_latency"):
+            raise ValueError("unknown policy: {}".format(self.policy))
+        self._lock = threading.Lock()
+        self._next = 0
+        self._latency = [0.0] * len(self.readers)
+        self._observed = [time.monotonic()] * len(self.readers)
+        # scope (label, or ANY) -> the time of its last write
+        self._written = {}
+
+    def reader(self, scope: Iterable[str] = None) -> Graph:
+        """
+        The Graph the next read statement (of the labels in the scope,
+        None is any label) goes to.
+        """
+        if not self.readers or self.recently_written(scope):
+            return self.writer
+        with self._lock:
+            if self.policy == "least_latency":
+                i = self._least_latency()
+            else:
+                i = self._next
+                self._next = (i + 1) % len(self.readers)
+        return self.readers[i]
+
+    def _least_latency(self) -> int:
+        now = time.monotonic()
+        for i, observed in enumerate(self._observed):
+            if now - observed >= self.probe_every:
+                # only one read probes it
+                self._observed[i] = now
+                return i
+        return min(range(len(self.readers)), key=lambda i: self._latency[i])
+
+    def recently_written(self, scope: Iterable[str] = None) -> bool:
+        """
+        Whether the readers may not have seen the last write of the labels
+        in the scope (None is any label) yet.
+        """
+        since = time.monotonic() - self.replica_lag
+        with self._lock:
+            if scope is None:
+                return any(t > since for t in self._written.values())
+            return any(self._written.get(s, since) > since
+                       for s in (ANY, *scope))
+
+    def wrote(self, scope: Iterable[str] = None):
+        """
+        Record a write (of the labels in the scope, None is any label)
+        to the writer.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for s in (ANY,) if scope is None else scope:
+                self._written[s] = now
+            if len(self._written) > 1000:
+                self._written = {s: t for s, t in self._written.items()
+                                 if now - t < self.replica_lag}
+
+    def observe(self, graph: Graph, seconds: float, alpha: float = 0.2):
+        """
+        Record the time of a read statement run by the graph.
+        """
+        for i, reader in enumerate(self.readers):
+            if reader is graph:
+                with self._lock:
+                    self._latency[i] = (
+                        alpha * seconds + (1 - alpha) * self._latency[i])
+                    self._observed[i] = time.monotonic()
+                return
+
+    @property
+    def graphs(self) -> List[Graph]:
+        """the writer and all the readers"""
+        return [self.writer] + list(self.readers)
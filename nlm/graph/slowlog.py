@@ -0,0 +1,152 @@
+"""
+SlowLog
+====================================
+Record the statements slower than a threshold.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+import json
+import logging
+from logging.handlers import QueueListener, RotatingFileHandler
+import os
+import queue
+import random
+import threading
+import time
+from typing import List
+
+from utils.log import BoundedQueueHandler
+from configs.config import logger
+
+
+@dataclass
+class SlowQueryLog:
+
+    """
+    The slow statements, the latest ones in memory and all in a rotating file
+    (one JSON object per line). The file is written by a listener thread
+    through a bounded queue, as the logger of `setup_logging`, so the
+    statements never wait for it, `close` to flush.
+
+    Parameters
+    -----------
+    threshold: float
+        Statements taking more seconds are recorded, None is disabled.
+    path: str
+        The rotating file, None is memory only.
+    profile_rate: float
+        The sampled ratio of the slow read statements re-run with PROFILE.
+    max_entries: int
+        The entries kept in memory.
+    max_bytes, backup_count: the rotation of the file.
+    max_param_chars: the parameters are truncated to so many chars.
+    queue_size: the entries waiting for the file, more are dropped.
+    """
+
+    threshold: float = None
+    path: str = None
+    profile_rate: float = 0.0
+    max_entries: int = 1000
+    max_bytes: int = 10 * 1024 * 1024
+    backup_count: int = 5
+    max_param_chars: int = 1000
+    queue_size: int = 10000
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=self.max_entries)
+        self._file = None
+        self._queued = None
+        self._listener = None
+        if self.path:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            handler = RotatingFileHandler(self.path,
+                                          maxBytes=self.max_bytes,
+                                          backupCount=self.backup_count)
+            self._queued = BoundedQueueHandler(queue.Queue(self.queue_size))
+            self._listener = QueueListener(self._queued.queue, handler)
+            self._file = logging.getLogger("NLMLayer.slowlog")
+            self._file.propagate = False
+            self._file.setLevel(logging.INFO)
+            for h in list(self._file.handlers):
+                self._file.removeHandler(h)
+            self._file.addHandler(self._queued)
+            self._listener.start()
+
+    def close(self):
+        """
+        Write the queued entries to the file and stop the listener,
+        the entries dropped (the queue was full) are counted in the log.
+        """
+        if self._listener is None:
+            return
+        self._file.removeHandler(self._queued)
+        self._file = None
+        self._listener.stop()
+        self._listener = None
+        dropped = self._queued.stats()["dropped"]
+        if dropped:
+            logger.warning("%d slow queries not written, the queue was full",
+                           dropped)
+
+    def is_slow(self, seconds: float) -> bool:
+        return self.threshold is not None and seconds >= self.threshold
+
+    def should_profile(self) -> bool:
+        return self.profile_rate > 0 and random.random() < self.profile_rate
+
+    def record(self, cypher: str, parameters: dict, seconds: float,
+               rows: int = None, origin: str = None,
+               plan: List[dict] = None) -> dict:
+        """
+        Record a slow statement.
+        """
+        entry = {
+            "time": time.time(),
+            "seconds": seconds,
+            "cypher": cypher,
+            "parameters": json.dumps(
+                parameters or {}, ensure_ascii=False,
+                default=str)[:self.max_param_chars],
+            "rows": rows,
+            "origin": origin,
+            "plan": plan,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        file = self._file
+        if file is not None:
+            file.info(json.dumps(entry, ensure_ascii=False, default=str))
+        return entry
+
+    def entries(self, min_seconds: float = 0.0, limit: int = 100) -> List[dict]:
+        """
+        The latest slow statements, the slowest first.
+        """
+        with self._lock:
+            entries = [e for e in self._entries if e["seconds"] >= min_seconds]
+        entries.sort(key=lambda e: e["seconds"], reverse=True)
+        return entries[:limit]
+
+
+def flatten_plan(plan: dict) -> List[dict]:
+    """
+    Flatten a PROFILE plan (of the Bolt summary) into its operators,
+    with the db hits and rows of each one.
+    """
+    if not plan:
+        return []
+    ret = []
+    stack = [plan]
+    while stack:
+        op = stack.pop()
+        args = op.get("args", {})
+        ret.append({
+            "operator": op.get("operatorType"),
+            "db_hits": op.get("dbHits", args.get("DbHits")),
+            "rows": op.get("rows", args.get("Rows")),
+            "identifiers": op.get("identifiers", []),
+        })
+        stack.extend(reversed(op.get("children", [])))
+    return ret
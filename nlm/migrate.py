@@ -0,0 +1,38 @@
+"""
+Migrate
+====================================
+Compress the long text props already in the graph (of the Neo4j in config),
+in batches, e.g.
+
+    COMPRESS_THRESHOLD=1024 python migrate.py --batch-size 1000
+"""
+
+import argparse
+
+from graph.graph import NLMGraph
+from configs.config import neo_sche, neo_host, neo_port, neo_user, neo_pass
+from configs.config import compress_threshold, logger
+
+
+def parse_args(args: list = None):
+    parser = argparse.ArgumentParser(
+        description='Compress the long text props of the NLM graph.')
+    parser.add_argument(
+        '--threshold', type=int, default=compress_threshold,
+        help='Text props of at least so many bytes are compressed, \
+        default to COMPRESS_THRESHOLD.')
+    parser.add_argument(
+        '--batch-size', dest='batch_size', type=int, default=1000,
+        help='Nodes or relationships of one transaction.')
+    return parser.parse_args(args)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.threshold is None:
+        raise SystemExit("give --threshold or COMPRESS_THRESHOLD")
+    from py2neo.database import Graph
+    graph = Graph(scheme=neo_sche, host=neo_host, port=neo_port,
+                  user=neo_user, password=neo_pass)
+    nlmg = NLMGraph(graph=graph, compress_threshold=args.threshold)
+    logger.info("compressed: %s", nlmg.compress_existing(args.batch_size))
@@ -1,22 +1,183 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
-from dacite import from_dict
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
 
 from schemes.extractor import ExtractorInput
 from schemes.graph import GraphNode, GraphRelation
 
+from models.linker import EntityLinker
+from models.model import ExtractModel
+
+from configs.config import extract_model, extract_model_builder
+from configs.config import linker_snapshot, linker_refresh, logger
 
-from configs.config import extract_model
+if TYPE_CHECKING:
+    from py2neo.database import Graph
 
 
 @dataclass
 class NLMExtractor:
     """
+    Parameters
+    -----------
+    graph: the Neo4j Graph, the entity linker is built from its node names.
+    snapshot: the linker snapshot path, loaded (or saved after built) for fast startup.
+        It is loaded only if built from the graph of the same version.
+    model: the model extracts entities, default from EXTRACT_MODEL (loaded lazily).
+    refresh_every: seconds, how often the version of the graph is checked,
+        the linker is rebuilt (in the background) and saved if changed,
+        None is never. The node count stands for the version, so the nodes
+        added by other processes are linked after a refresh.
+
     Returns
     --------
     out: most related GraphRelation, if None, most related GraphNode
     """
-    model = extract_model
+    graph: Graph = None
+    snapshot: str = linker_snapshot
+    model: ExtractModel = None
+    refresh_every: float = linker_refresh
+
+    def __post_init__(self):
+        self._linker = None
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self._refreshing = False
+        # inserted while the linker is being rebuilt
+        self._inserted = []
+        if self.model is None and extract_model and extract_model_builder:
+            self.model = ExtractModel.from_config(
+                extract_model, extract_model_builder)
+
+    def warm_up(self):
+        """
+        Build the linker and load the model ahead of the first request.
+        """
+        self.linker
+        if self.model is not None:
+            self.model.warm_up()
+
+    @property
+    def linker(self) -> EntityLinker:
+        """the entity linker, built on first use, refreshed periodically"""
+        if self._linker is None:
+            with self._lock:
+                if self._linker is None:
+                    self._linker = self._load_linker()
+                    self._checked = time.monotonic()
+        elif self._refresh_due():
+            threading.Thread(target=self.refresh, name="nlm-linker",
+                             daemon=True).start()
+        return self._linker
+
+    def _refresh_due(self) -> bool:
+        if self.graph is None or self.refresh_every is None:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._refreshing or now - self._checked < self.refresh_every:
+                return False
+            self._checked = now
+            return True
+
+    def refresh(self) -> bool:
+        """
+        Rebuild the linker and save the snapshot, if the graph changed
+        since it was built. The current linker is used meanwhile.
+
+        Returns
+        --------
+        out: whether it is rebuilt.
+        """
+        with self._lock:
+            if self._refreshing or self._linker is None:
+                return False
+            self._refreshing = True
+        try:
+            version = self._graph_version()
+            if version == self._linker.version:
+                return False
+            linker = EntityLinker(version)
+            linker.build_from_graph(self.graph)
+            with self._lock:
+                for (label, name) in self._inserted:
+                    linker.insert(label, name)
+                self._linker = linker
+            self._save(linker)
+            return True
+        except Exception as e:
+            logger.warning("failed to refresh the entity linker: %s", e)
+            return False
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._inserted = []
+                self._checked = time.monotonic()
+
+    def _graph_version(self) -> int:
+        """the node count of the graph, None if no graph"""
+        if self.graph is None:
+            return None
+        return self.graph.run("MATCH (n) RETURN count(n)").evaluate()
+
+    def _load_linker(self) -> EntityLinker:
+        version = self._graph_version()
+        if self.snapshot and os.path.exists(self.snapshot):
+            try:
+                linker = EntityLinker.load(self.snapshot)
+            except (OSError, EOFError, ValueError) as e:
+                logger.warning("invalid linker snapshot %s: %s",
+                               self.snapshot, e)
+            else:
+                if version is None or linker.version == version:
+                    return linker
+        linker = EntityLinker(version)
+        if self.graph is not None:
+            linker.build_from_graph(self.graph)
+        self._save(linker)
+        return linker
+
+    def _save(self, linker: EntityLinker):
+        if not self.snapshot:
+            return
+        try:
+            linker.save(self.snapshot)
+        except OSError as e:
+            logger.warning("failed to save the linker snapshot %s: %s",
+                           self.snapshot, e)
+
+    def add_entity(self, label: str, name: str):
+        """
+        Insert a new node to the linker, if it is already built.
+        It is saved with the snapshot when the linker is refreshed.
+        """
+        if self._linker is None:
+            return
+        with self._lock:
+            if self._refreshing:
+                self._inserted.append((label, name))
+        self._linker.insert(label, name)
+
+    def candidates(self, ext_in: ExtractorInput) -> list:
+        """
+        All the GraphNode and GraphRelation candidates of the text.
+        """
+        nodes = self.linker.link(ext_in.text)
+        if self.model is not None:
+            for entity in self.model(ext_in.text):
+                gn = GraphNode(entity.entity, entity.value)
+                if gn not in nodes:
+                    nodes.append(gn)
+        relations = []
+        for i, start in enumerate(nodes):
+            for end in nodes[i+1:]:
+                relations.append(GraphRelation(start, end))
+        return relations + nodes
 
-    @classmethod
-    def extract(cls, ext_in: ExtractorInput) -> GraphRelation or GraphNode:
-        return ext_in
\ No newline at end of file
+    def extract(self, ext_in: ExtractorInput) -> GraphRelation or GraphNode:
+        candidates = self.candidates(ext_in)
+        return candidates[0] if candidates else None
@@ -0,0 +1,210 @@
+"""
+Linker
+====================================
+Entity linking over the node names of the graph.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+import gzip
+import json
+import os
+import threading
+from typing import List, Tuple
+
+from schemes.graph import GraphNode
+
+
+@dataclass
+class EntityLinker:
+
+    """
+    An Aho-Corasick automaton over all node names (per label),
+    finds the node mentions of a text in linear time.
+
+    Names could be inserted incrementally,
+    the failure links are rebuilt lazily before the next search.
+
+    `version` is the version of the graph it is built from
+    (see `NLMExtractor`), saved with the snapshot.
+    """
+
+    version: int = None
+
+    def __post_init__(self):
+        # state -> {char: next state}
+        self.goto = [{}]
+        # state -> failure state
+        self.fail = [0]
+        # state -> the name ends at this state
+        self.out = [None]
+        # state -> nearest state (by failure links) which has an output
+        self.dict_link = [0]
+        # name -> labels
+        self.names = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def insert(self, label: str, name: str):
+        """
+        Insert a node name (with its label) to the automaton.
+        """
+        if not name:
+            return
+        with self._lock:
+            if name in self.names:
+                self.names[name].add(label)
+                return
+            state = 0
+            for char in name:
+                nxt = self.goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(None)
+                    self.dict_link.append(0)
+                    self.goto[state][char] = nxt
+                state = nxt
+            self.out[state] = name
+            self.names[name] = {label}
+            self._dirty = True
+
+    def build_from_graph(self, graph) -> int:
+        """
+        Insert all the node names of a Neo4j Graph.
+
+        Returns
+        --------
+        out: the number of names.
+        """
+        cypher = ("MATCH (n) WHERE n.name IS NOT NULL "
+                  "RETURN labels(n) AS labels, n.name AS name")
+        for record in graph.run(cypher):
+            for label in record["labels"]:
+                self.insert(label, str(record["name"]))
+        return len(self)
+
+    def _build_links(self):
+        """
+        Build the failure links and dictionary links by BFS.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            queue = deque()
+            for state in self.goto[0].values():
+                self.fail[state] = 0
+                self.dict_link[state] = 0
+                queue.append(state)
+            while queue:
+                state = queue.popleft()
+                for char, nxt in self.goto[state].items():
+                    queue.append(nxt)
+                    fail = self.fail[state]
+                    while fail and char not in self.goto[fail]:
+                        fail = self.fail[fail]
+                    fail = self.goto[fail].get(char, 0)
+                    self.fail[nxt] = fail
+                    self.dict_link[nxt] = (
+                        fail if self.out[fail] else self.dict_link[fail])
+            self._dirty = False
+
+    def search(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Find all the mentions (could be overlapped) in the text.
+
+        Returns
+        --------
+        out: a list of (start, end, name).
+        """
+        if self._dirty:
+            self._build_links()
+        goto, fail, out, dict_link = (
+            self.goto, self.fail, self.out, self.dict_link)
+        ret = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            hit = state if out[state] else dict_link[state]
+            while hit:
+                name = out[hit]
+                ret.append((i + 1 - len(name), i + 1, name))
+                hit = dict_link[hit]
+        return ret
+
+    def link(self, text: str) -> List[GraphNode]:
+        """
+        Link the text to the graph nodes.
+        Leftmost longest mentions win, overlapped ones are dropped.
+
+        Returns
+        --------
+        out: distinct GraphNodes in the order of appearance.
+        """
+        mentions = sorted(self.search(text), key=lambda x: (x[0], -x[1]))
+        ret = []
+        seen = set()
+        last_end = 0
+        for (start, end, name) in mentions:
+            if start < last_end:
+                continue
+            last_end = end
+            for label in sorted(self.names[name]):
+                if (label, name) not in seen:
+                    seen.add((label, name))
+                    ret.append(GraphNode(label, name))
+        return ret
+
+    def save(self, path: str):
+        """
+        Save a snapshot of the automaton, gzipped JSON.
+        It is written to a temporary file then renamed,
+        so a reader never sees a partial one.
+        """
+        if self._dirty:
+            self._build_links()
+        with self._lock:
+            state = {"version": self.version,
+                     "goto": self.goto,
+                     "fail": self.fail,
+                     "out": self.out,
+                     "dict_link": self.dict_link,
+                     "names": {k: sorted(v) for k, v in self.names.items()}}
+            data = json.dumps(state, ensure_ascii=False).encode("utf8")
+        tmp = "{}.{}.tmp".format(path, threading.get_ident())
+        with gzip.open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "EntityLinker":
+        """
+        Load a snapshot saved by `save`.
+        Raises ValueError if it is not a valid snapshot.
+        """
+        with gzip.open(path, "rb") as f:
+            state = json.loads(f.read().decode("utf8"))
+        linker = cls(state.get("version"))
+        try:
+            linker.goto = [{c: int(n) for c, n in g.items()}
+                           for g in state["goto"]]
+            linker.fail = [int(x) for x in state["fail"]]
+            linker.out = [None if x is None else str(x) for x in state["out"]]
+            linker.dict_link = [int(x) for x in state["dict_link"]]
+            linker.names = {k: set(v) for k, v in state["names"].items()}
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError("invalid linker snapshot: {}".format(e))
+        size = len(linker.goto)
+        states = [n for g in linker.goto for n in g.values()]
+        if not (len(linker.fail) == len(linker.out) ==
+                len(linker.dict_link) == size) or any(
+                    not 0 <= n < size
+                    for n in states + linker.fail + linker.dict_link):
+            raise ValueError("invalid linker snapshot: {}".format(path))
+        return linker
@@ -0,0 +1,144 @@
+"""
+Model
+====================================
+Model-based extractor, loaded lazily and micro-batched.
+"""
+
+from concurrent.futures import Future, TimeoutError
+from dataclasses import dataclass
+import importlib
+import mmap
+import queue
+import threading
+import time
+from typing import Callable, List
+
+from schemes.extractor import Entity
+from schemes.error import DeadlineError
+
+
+@dataclass
+class ExtractModel:
+
+    """
+    A model (CPU only) which extracts entities from texts.
+
+    Parameters
+    -----------
+    path: the weights file.
+        It is memory-mapped read only,
+        so all the server processes share one copy in the page cache.
+    builder: build the predictor from the weights (a memoryview).
+        The predictor maps a batch of texts to a batch of List[Entity].
+    max_batch_size: max texts of one forward pass.
+    max_wait: max seconds to wait for the concurrent calls to group.
+    timeout: max seconds a call waits for its forward pass,
+        or a DeadlineError is raised. None is unlimited.
+    """
+
+    path: str
+    builder: Callable
+    max_batch_size: int = 32
+    max_wait: float = 0.005
+    timeout: float = 30.0
+
+    def __post_init__(self):
+        self._mmap = None
+        self._predictor = None
+        self._worker = None
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+
+    @classmethod
+    def from_config(cls, path: str, builder: str, **kwargs) -> "ExtractModel":
+        """
+        Create with the builder given as `module:function`.
+        """
+        module, _, func = builder.partition(":")
+        return cls(path, getattr(importlib.import_module(module), func),
+                   **kwargs)
+
+    @property
+    def loaded(self) -> bool:
+        """whether the model is loaded"""
+        return self._predictor is not None
+
+    def load(self) -> Callable:
+        """
+        Load the model on first use.
+        """
+        if self._predictor is None:
+            with self._lock:
+                if self._predictor is None:
+                    with open(self.path, "rb") as f:
+                        self._mmap = mmap.mmap(
+                            f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._predictor = self.builder(memoryview(self._mmap))
+        return self._predictor
+
+    def warm_up(self, texts: List[str] = None):
+        """
+        Load the model and run one forward pass.
+        """
+        self.predict(texts or ["warm up"])
+
+    def predict(self, texts: List[str]) -> List[List[Entity]]:
+        """
+        One forward pass of a batch of texts.
+        """
+        return self.load()(texts)
+
+    def __call__(self, text: str) -> List[Entity]:
+        """
+        Extract entities of one text.
+        Concurrent calls are grouped into one forward pass.
+        """
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run_batches, daemon=True)
+                    self._worker.start()
+        future = Future()
+        self._queue.put((text, future))
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise DeadlineError
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_batches(self):
+        while True:
+            batch = self._next_batch()
+            # the timed out calls are cancelled, not predicted
+            batch = [(text, future) for (text, future) in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                outs = list(self.predict([text for (text, _) in batch]))
+            except BaseException as e:
+                # the worker keeps running, whatever the predictor raised
+                for (_, future) in batch:
+                    future.set_exception(e)
+                continue
+            for i, (_, future) in enumerate(batch):
+                if i < len(outs):
+                    future.set_result(outs[i])
+                else:
+                    future.set_exception(ValueError(
+                        "the predictor returned {} outputs of {} texts"
+                        .format(len(outs), len(batch))))
@@ -4,8 +4,9 @@ Main
 The core module of NLM project
 """
 
-from dataclasses import dataclass
-from dacite import from_dict
+from concurrent.futures import TimeoutError
+from dataclasses import dataclass, asdict
+import json
 
 from typing import Any, List
 
@@ -14,9 +15,10 @@ from graph.graph import NLMGraph
 
 from schemes.extractor import ExtractorInput, RawString
 from schemes.graph import GraphNode, GraphRelation
-from schemes.error import ParameterError
+from schemes.error import ParameterError, DeadlineError
 
 from utils.utils import convert_query_to_scheme
+from utils.concurrency import SingleFlight, StripedLock
 
 
 
@@ -36,6 +38,12 @@ class NLMLayer(NLMGraph):
     add_inexistence: bool = False
     update_props: bool = False
 
+    def __post_init__(self):
+        super().__post_init__()
+        self.extractor = NLMExtractor(graph=self.graph)
+        self._flights = SingleFlight()
+        self._write_locks = StripedLock()
+
     @convert_query_to_scheme()
     def query_add_update(self, qin: GraphNode or GraphRelation, **kwargs
                          ) -> List[GraphNode or GraphRelation]:
@@ -63,22 +71,114 @@ class NLMLayer(NLMGraph):
         add_inexistence = kwargs.get("add_inexistence", self.add_inexistence)
         update_props = kwargs.get("update_props", self.update_props)
         topn = kwargs.get("topn", 1)
+        limit = kwargs.get("limit", 10)
+        projection = kwargs.get("projection")
+
+        if not self.may_write(fuzzy_node=fuzzy_node,
+                              add_inexistence=add_inexistence,
+                              update_props=update_props):
+            # read only, identical concurrent recalls share one execution.
+            key = _recall_key(qin, topn, limit, fuzzy_node, projection)
+            try:
+                return self._flights.do(
+                    key, lambda: self.query(qin, topn=topn, limit=limit,
+                                            fuzzy=fuzzy_node,
+                                            projection=projection),
+                    timeout=self._statement_timeout())
+            except TimeoutError:
+                raise DeadlineError
+
+        # may write, serialize per entity.
+        with self._write_locks.hold(*_entity_keys(qin)):
+            query = self.query(qin, topn=topn, limit=limit, fuzzy=fuzzy_node,
+                               projection=projection)
+
+            # ATTENTION: this will automatically update the query props.
+            # So the props of your query result will be changed.
+            if update_props and query and not fuzzy_node:
+                self.update(qin)
+
+            # However, this will not update the query props.
+            if add_inexistence and not query:
+                self.add(qin)
 
-        query = self.query(qin, topn=topn, fuzzy=fuzzy_node)
+        # print("QUERY: ", query)
+        return query
 
-        # ATTENTION: this will automatically update the query props.
-        # So the props of your query result will be changed.
-        if update_props and query and not fuzzy_node:
-            self.update(qin)
+    def may_write(self, **kwargs) -> bool:
+        """
+        Whether a recall with the options may write (add or update).
+        """
+        fuzzy_node = kwargs.get("fuzzy_node", self.fuzzy_node)
+        add_inexistence = kwargs.get("add_inexistence", self.add_inexistence)
+        update_props = kwargs.get("update_props", self.update_props)
+        return add_inexistence or (update_props and not fuzzy_node)
 
-        # However, this will not update the query props.
-        if add_inexistence and not query:
-            self.add(qin)
+    def changed(self, op: str, neog_oj):
+        super().changed(op, neog_oj)
+        # a node is published once created (a batch, once committed)
+        if op == "add_node":
+            for label in neog_oj.labels:
+                self.extractor.add_entity(label, neog_oj["name"])
 
-        # print("QUERY: ", query)
-        return query
+    @property
+    def write_lock_stats(self) -> dict:
+        """contention of the per entity write locks"""
+        return self._write_locks.stats()
+
+    @convert_query_to_scheme()
+    def query_entities(self, ext_in: ExtractorInput, **kwargs
+                       ) -> List[GraphNode or GraphRelation]:
+        """
+        Query the NLU entities (entity type as label, value as name)
+        in one batch, and the relations among them.
+
+        Relations of the intent kind are ranked ahead of other relations,
+        then the nodes of each entity, in the given order.
+
+        If add_inexistence, the entities not matched are added (and returned).
+        If update_props (and not fuzzy_node), the props of the matched
+        entities are updated, as query_add_update.
+        """
+        fuzzy_node = kwargs.get("fuzzy_node", self.fuzzy_node)
+        add_inexistence = kwargs.get("add_inexistence", self.add_inexistence)
+        update_props = kwargs.get("update_props", self.update_props)
+        topn = kwargs.get("topn", 1)
+        limit = kwargs.get("limit", 10)
+        projection = kwargs.get("projection")
+
+        gns = []
+        for entity in ext_in.entities:
+            gn = GraphNode(entity.entity, entity.value)
+            if gn not in gns:
+                gns.append(gn)
+        matched = self.query_nodes(gns, topn=topn, fuzzy=fuzzy_node,
+                                   limit=limit, projection=projection)
+
+        nodes = []
+        for gn, nmlst in zip(gns, matched):
+            if add_inexistence and not nmlst:
+                with self._write_locks.hold(*_entity_keys(gn)):
+                    nmlst = [self.add(gn)]
+            elif update_props and nmlst and not fuzzy_node:
+                with self._write_locks.hold(*_entity_keys(gn)):
+                    updated = self.update(gn)
+                # the matched one may be projected, only its props are set
+                for node in nmlst:
+                    if node.identity == updated.identity:
+                        node.update({k: updated[k] for k in gn.props
+                                     if k in updated})
+            for node in nmlst:
+                # by identity, the projected nodes are not bound (equal)
+                if all(node.identity != n.identity for n in nodes):
+                    nodes.append(node)
+        relations = self.query_relations_among(
+            nodes, kind=ext_in.intent or None, limit=limit,
+            projection=projection)
+        return relations + nodes
 
     def extract_relation_or_node(self, ext_in: ExtractorInput):
+        from dacite import from_dict
         try:
             from_dict(data_class=ExtractorInput,
                       data={"text": ext_in.text,
@@ -86,8 +186,7 @@ class NLMLayer(NLMGraph):
                             "entities": ext_in.entities})
         except Exception as e:
             raise ParameterError
-        ext_out = NLMExtractor.extract(ext_in)
-        return GraphNode("Demo", "demo_node")
+        return self.extractor.extract(ext_in)
 
     def __call__(self, inputs: Any, **kwargs) -> list:
         """
@@ -101,19 +200,41 @@ class NLMLayer(NLMGraph):
         --------
         out: A list of GraphNode or GraphRelations.
         """
+        with self.origin("{}({})".format(type(self).__name__,
+                                          type(inputs).__name__)):
+            return self._dispatch(inputs, **kwargs)
+
+    def _dispatch(self, inputs: Any, **kwargs) -> list:
         # print("INPUTS: ", inputs)
         if isinstance(inputs, GraphRelation) or isinstance(inputs, GraphNode):
             ext_out = inputs
         elif isinstance(inputs, RawString):
             ext_out = self.extract_relation_or_node(
                 ExtractorInput(text=inputs.text))
+        elif isinstance(inputs, ExtractorInput) and inputs.entities:
+            return self.query_entities(inputs, **kwargs)
         elif isinstance(inputs, ExtractorInput):
             ext_out = self.extract_relation_or_node(inputs)
         else:
             return []
+        if ext_out is None:
+            return []
         return self.query_add_update(ext_out, **kwargs)
 
 
+def _recall_key(qin: GraphNode or GraphRelation, *args) -> str:
+    """The identity of a recall: its type, content and options."""
+    return json.dumps([type(qin).__name__, asdict(qin), args],
+                      sort_keys=True, default=str)
+
+
+def _entity_keys(qin: GraphNode or GraphRelation) -> list:
+    """The (label, name) of the nodes a recall may write."""
+    if isinstance(qin, GraphNode):
+        return [(qin.label, qin.name)]
+    return _entity_keys(qin.start) + _entity_keys(qin.end)
+
+
 if __name__ == '__main__':
     from configs.config import neo_sche, neo_host, neo_port, neo_user, neo_pass
     from py2neo.database import Graph
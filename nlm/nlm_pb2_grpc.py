@@ -1,97 +1,330 @@
 # Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
 import grpc
 
 import nlm_pb2 as nlm__pb2
 
 
 class NLMStub(object):
-  # missing associated documentation comment in .proto file
-  pass
-
-  def __init__(self, channel):
-    """Constructor.
-
-    Args:
-      channel: A grpc.Channel.
-    """
-    self.StrRecall = channel.unary_unary(
-        '/nlm.NLM/StrRecall',
-        request_serializer=nlm__pb2.RawString.SerializeToString,
-        response_deserializer=nlm__pb2.GraphOutput.FromString,
-        )
-    self.NLURecall = channel.unary_unary(
-        '/nlm.NLM/NLURecall',
-        request_serializer=nlm__pb2.NLMInput.SerializeToString,
-        response_deserializer=nlm__pb2.GraphOutput.FromString,
-        )
-    self.NodeRecall = channel.unary_unary(
-        '/nlm.NLM/NodeRecall',
-        request_serializer=nlm__pb2.GraphNode.SerializeToString,
-        response_deserializer=nlm__pb2.GraphNode.FromString,
-        )
-    self.RelationRecall = channel.unary_unary(
-        '/nlm.NLM/RelationRecall',
-        request_serializer=nlm__pb2.GraphRelation.SerializeToString,
-        response_deserializer=nlm__pb2.GraphRelation.FromString,
-        )
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.StrRecall = channel.unary_unary(
+                '/nlm.NLM/StrRecall',
+                request_serializer=nlm__pb2.RawString.SerializeToString,
+                response_deserializer=nlm__pb2.GraphOutput.FromString,
+                )
+        self.NLURecall = channel.unary_unary(
+                '/nlm.NLM/NLURecall',
+                request_serializer=nlm__pb2.NLMInput.SerializeToString,
+                response_deserializer=nlm__pb2.GraphOutput.FromString,
+                )
+        self.NodeRecall = channel.unary_unary(
+                '/nlm.NLM/NodeRecall',
+                request_serializer=nlm__pb2.GraphNode.SerializeToString,
+                response_deserializer=nlm__pb2.GraphNode.FromString,
+                )
+        self.RelationRecall = channel.unary_unary(
+                '/nlm.NLM/RelationRecall',
+                request_serializer=nlm__pb2.GraphRelation.SerializeToString,
+                response_deserializer=nlm__pb2.GraphRelation.FromString,
+                )
+        self.CypherRecall = channel.unary_stream(
+                '/nlm.NLM/CypherRecall',
+                request_serializer=nlm__pb2.CypherInput.SerializeToString,
+                response_deserializer=nlm__pb2.CypherRow.FromString,
+                )
+        self.SlowQueries = channel.unary_unary(
+                '/nlm.NLM/SlowQueries',
+                request_serializer=nlm__pb2.SlowQueryInput.SerializeToString,
+                response_deserializer=nlm__pb2.SlowQueryOutput.FromString,
+                )
+        self.Profile = channel.unary_unary(
+                '/nlm.NLM/Profile',
+                request_serializer=nlm__pb2.ProfileInput.SerializeToString,
+                response_deserializer=nlm__pb2.ProfileOutput.FromString,
+                )
+        self.Changes = channel.unary_stream(
+                '/nlm.NLM/Changes',
+                request_serializer=nlm__pb2.ChangesInput.SerializeToString,
+                response_deserializer=nlm__pb2.Change.FromString,
+                )
+        self.LaneStats = channel.unary_unary(
+                '/nlm.NLM/LaneStats',
+                request_serializer=nlm__pb2.LaneStatsInput.SerializeToString,
+                response_deserializer=nlm__pb2.LaneStatsOutput.FromString,
+                )
 
 
 class NLMServicer(object):
-  # missing associated documentation comment in .proto file
-  pass
-
-  def StrRecall(self, request, context):
-    # missing associated documentation comment in .proto file
-    pass
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
-
-  def NLURecall(self, request, context):
-    # missing associated documentation comment in .proto file
-    pass
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
-
-  def NodeRecall(self, request, context):
-    # missing associated documentation comment in .proto file
-    pass
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
-
-  def RelationRecall(self, request, context):
-    # missing associated documentation comment in .proto file
-    pass
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
+    """Missing associated documentation comment in .proto file."""
+
+    def StrRecall(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def NLURecall(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def NodeRecall(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RelationRecall(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CypherRecall(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SlowQueries(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Profile(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Changes(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def LaneStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
 
 
 def add_NLMServicer_to_server(servicer, server):
-  rpc_method_handlers = {
-      'StrRecall': grpc.unary_unary_rpc_method_handler(
-          servicer.StrRecall,
-          request_deserializer=nlm__pb2.RawString.FromString,
-          response_serializer=nlm__pb2.GraphOutput.SerializeToString,
-      ),
-      'NLURecall': grpc.unary_unary_rpc_method_handler(
-          servicer.NLURecall,
-          request_deserializer=nlm__pb2.NLMInput.FromString,
-          response_serializer=nlm__pb2.GraphOutput.SerializeToString,
-      ),
-      'NodeRecall': grpc.unary_unary_rpc_method_handler(
-          servicer.NodeRecall,
-          request_deserializer=nlm__pb2.GraphNode.FromString,
-          response_serializer=nlm__pb2.GraphNode.SerializeToString,
-      ),
-      'RelationRecall': grpc.unary_unary_rpc_method_handler(
-          servicer.RelationRecall,
-          request_deserializer=nlm__pb2.GraphRelation.FromString,
-          response_serializer=nlm__pb2.GraphRelation.SerializeToString,
-      ),
-  }
-  generic_handler = grpc.method_handlers_generic_handler(
-      'nlm.NLM', rpc_method_handlers)
-  server.add_generic_rpc_handlers((generic_handler,))
+    rpc_method_handlers = {
+            'StrRecall': grpc.unary_unary_rpc_method_handler(
+                    servicer.StrRecall,
+                    request_deserializer=nlm__pb2.RawString.FromString,
+                    response_serializer=nlm__pb2.GraphOutput.SerializeToString,
+            ),
+            'NLURecall': grpc.unary_unary_rpc_method_handler(
+                    servicer.NLURecall,
+                    request_deserializer=nlm__pb2.NLMInput.FromString,
+                    response_serializer=nlm__pb2.GraphOutput.SerializeToString,
+            ),
+            'NodeRecall': grpc.unary_unary_rpc_method_handler(
+                    servicer.NodeRecall,
+                    request_deserializer=nlm__pb2.GraphNode.FromString,
+                    response_serializer=nlm__pb2.GraphNode.SerializeToString,
+            ),
+            'RelationRecall': grpc.unary_unary_rpc_method_handler(
+                    servicer.RelationRecall,
+                    request_deserializer=nlm__pb2.GraphRelation.FromString,
+                    response_serializer=nlm__pb2.GraphRelation.SerializeToString,
+            ),
+            'CypherRecall': grpc.unary_stream_rpc_method_handler(
+                    servicer.CypherRecall,
+                    request_deserializer=nlm__pb2.CypherInput.FromString,
+                    response_serializer=nlm__pb2.CypherRow.SerializeToString,
+            ),
+            'SlowQueries': grpc.unary_unary_rpc_method_handler(
+                    servicer.SlowQueries,
+                    request_deserializer=nlm__pb2.SlowQueryInput.FromString,
+                    response_serializer=nlm__pb2.SlowQueryOutput.SerializeToString,
+            ),
+            'Profile': grpc.unary_unary_rpc_method_handler(
+                    servicer.Profile,
+                    request_deserializer=nlm__pb2.ProfileInput.FromString,
+                    response_serializer=nlm__pb2.ProfileOutput.SerializeToString,
+            ),
+            'Changes': grpc.unary_stream_rpc_method_handler(
+                    servicer.Changes,
+                    request_deserializer=nlm__pb2.ChangesInput.FromString,
+                    response_serializer=nlm__pb2.Change.SerializeToString,
+            ),
+            'LaneStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.LaneStats,
+                    request_deserializer=nlm__pb2.LaneStatsInput.FromString,
+                    response_serializer=nlm__pb2.LaneStatsOutput.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'nlm.NLM', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class NLM(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def StrRecall(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/nlm.NLM/StrRecall',
+            nlm__pb2.RawString.SerializeToString,
+            nlm__pb2.GraphOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def NLURecall(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/nlm.NLM/NLURecall',
+            nlm__pb2.NLMInput.SerializeToString,
+            nlm__pb2.GraphOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def NodeRecall(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/nlm.NLM/NodeRecall',
+            nlm__pb2.GraphNode.SerializeToString,
+            nlm__pb2.GraphNode.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def RelationRecall(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/nlm.NLM/RelationRecall',
+            nlm__pb2.GraphRelation.SerializeToString,
+            nlm__pb2.GraphRelation.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def CypherRecall(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/nlm.NLM/CypherRecall',
+            nlm__pb2.CypherInput.SerializeToString,
+            nlm__pb2.CypherRow.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def SlowQueries(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/nlm.NLM/SlowQueries',
+            nlm__pb2.SlowQueryInput.SerializeToString,
+            nlm__pb2.SlowQueryOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Profile(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/nlm.NLM/Profile',
+            nlm__pb2.ProfileInput.SerializeToString,
+            nlm__pb2.ProfileOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Changes(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/nlm.NLM/Changes',
+            nlm__pb2.ChangesInput.SerializeToString,
+            nlm__pb2.Change.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def LaneStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/nlm.NLM/LaneStats',
+            nlm__pb2.LaneStatsInput.SerializeToString,
+            nlm__pb2.LaneStatsOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -29,6 +29,18 @@ class OverstepError(Error):
     desc = "Your input is overstepped."
 
 
+@dataclass
+class ProfilingError(Error):
+    code = 40002
+    desc = "A profile is already running."
+
+
+@dataclass
+class OverloadError(Error):
+    code = 40003
+    desc = "Too many requests are waiting, retry later."
+
+
 @dataclass
 class ServerError(Error):
     code = 50000
@@ -46,3 +58,8 @@ class QueryError(Error):
     code = 50002
     desc = "Qeury error, please check your input."
 
+
+@dataclass
+class DeadlineError(Error):
+    code = 50003
+    desc = "Query deadline exceeded or cancelled."
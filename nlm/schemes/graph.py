@@ -1,5 +1,36 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import Callable, List
+
+
+class LazyProps(dict):
+    """
+    The projected props of a queried node or relation.
+    The props not projected are loaded (once, by the loader) when accessed
+    (`[]`, `get` and `in`), while iterating, len and json only give
+    the projected ones.
+    """
+
+    def __init__(self, *args, loader: Callable = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loader = loader
+        self._loaded = None
+
+    def load(self) -> dict:
+        """all the props"""
+        if self._loaded is None:
+            self._loaded = self._loader() if self._loader else dict(self)
+        return self._loaded
+
+    def __missing__(self, key):
+        return self.load()[key]
+
+    def __contains__(self, key) -> bool:
+        return super().__contains__(key) or key in self.load()
+
+    def get(self, key, default=None):
+        if super().__contains__(key):
+            return super().get(key)
+        return self.load().get(key, default)
 
 @dataclass
 class GraphNode:
@@ -1,109 +1,377 @@
 import argparse
 from concurrent import futures
+from contextlib import nullcontext
+import json
 import grpc
 from grpc import StatusCode
 
 import nlm_pb2
 import nlm_pb2_grpc
 
-from py2neo.database import Graph
-
 
 from nlm import NLMLayer
+from graph.slowlog import SlowQueryLog
+from graph.changes import ChangeLog, FileJournalBus, SocketBus
 
-from utils.utils import raise_grpc_error, deco_log_error
+from utils.utils import raise_grpc_error, deco_log_error, propagate_deadline
+from utils.utils import profile_request, revalidate, run_in_lane
+from utils.utils import recall_options, time_remaining
+from utils.concurrency import Lane
+from utils.tracing import tracer, FileExporter
+from utils.compression import grpc_compression
 from utils.utils import convert_request_to, convert_graphobj_to_dict
 
 from schemes.extractor import ExtractorInput, RawString
 from schemes.graph import GraphNode, GraphRelation
+from schemes.error import DeadlineError, OverstepError, ProfilingError
+from schemes.error import OverloadError
 
 from configs.config import neo_sche, neo_host, neo_port, neo_user, neo_pass
-from configs.config import logger
+from configs.config import neo_readers, read_policy, replica_lag
+from configs.config import max_query_time, max_cypher_rows
+from configs.config import slow_query_time, slow_query_profile_rate
+from configs.config import slow_query_log_path
+from configs.config import trace_exporter, trace_file_path
+from configs.config import change_journal, change_socket
+from configs.config import compress_threshold, rpc_compression
+from configs.config import read_workers, read_queue, follow_streams
+from configs.config import write_workers, write_queue
+from configs.config import logger, setup_logging
+
 
+def str2bool(value: str) -> bool:
+    """
+    `type=bool` makes any non-empty value (even "False") True.
+    """
+    if value.lower() in ("true", "yes", "1"):
+        return True
+    if value.lower() in ("false", "no", "0"):
+        return False
+    raise argparse.ArgumentTypeError("a boolean is expected: " + value)
 
-parser = argparse.ArgumentParser(
-    description='Setup your NLM Server.')
-parser.add_argument(
-    '-fn', dest='fuzzy_node', type=bool, default=False,
-    help='Whether to use fuzzy node to query. \
-    If is, the props will never update.')
-parser.add_argument(
-    '-ai', dest='add_inexistence', type=bool, default=False,
-    help='Whether to add an inexistent Node or Relation.')
-parser.add_argument(
-    '-up', dest='update_props', type=bool, default=False,
-    help='Whether to update props of a Node or Relation.')
-args = parser.parse_args()
 
+def parse_args(args: list = None):
+    """
+    The server defaults of the recall options,
+    a request can override them by its options.
+    `-fn` alone is True, and `-fn false` is False.
+    """
+    parser = argparse.ArgumentParser(
+        description='Setup your NLM Server.')
+    parser.add_argument(
+        '-fn', dest='fuzzy_node', type=str2bool, nargs='?', const=True,
+        default=False,
+        help='Whether to use fuzzy node to query. \
+        If is, the props will never update.')
+    parser.add_argument(
+        '-ai', dest='add_inexistence', type=str2bool, nargs='?', const=True,
+        default=False,
+        help='Whether to add an inexistent Node or Relation.')
+    parser.add_argument(
+        '-up', dest='update_props', type=str2bool, nargs='?', const=True,
+        default=False,
+        help='Whether to update props of a Node or Relation.')
+    return parser.parse_args(args)
 
-graph = Graph(scheme=neo_sche, host=neo_host, port=neo_port,
-              user=neo_user, password=neo_pass)
-mem = NLMLayer(graph=graph,
-               fuzzy_node=args.fuzzy_node,
-               add_inexistence=args.add_inexistence,
-               update_props=args.update_props)
+
+def create_nlm_layer(fuzzy_node: bool = False,
+                     add_inexistence: bool = False,
+                     update_props: bool = False) -> NLMLayer:
+    """
+    Connect to the Neo4j database in config, and create the NLMLayer.
+    """
+    from py2neo.database import Graph
+    graph = Graph(scheme=neo_sche, host=neo_host, port=neo_port,
+                  user=neo_user, password=neo_pass)
+    readers = []
+    for reader in filter(None, neo_readers.split(",")):
+        host, port = reader.split(":")
+        readers.append(Graph(scheme=neo_sche, host=host, port=int(port),
+                             user=neo_user, password=neo_pass))
+    buses = []
+    if change_journal:
+        buses.append(FileJournalBus(change_journal))
+    if change_socket:
+        buses.append(SocketBus(change_socket))
+    # the seq continues from the journal after restarts
+    start = buses[0].last_seq() if change_journal else 0
+    return NLMLayer(graph=graph,
+                    max_query_time=max_query_time,
+                    max_cypher_rows=max_cypher_rows,
+                    readers=readers,
+                    read_policy=read_policy,
+                    replica_lag=replica_lag,
+                    slow_log=SlowQueryLog(slow_query_time,
+                                          slow_query_log_path,
+                                          slow_query_profile_rate),
+                    changes=ChangeLog(buses, start=start),
+                    compress_threshold=compress_threshold,
+                    fuzzy_node=fuzzy_node,
+                    add_inexistence=add_inexistence,
+                    update_props=update_props)
 
 
 class NLMService(nlm_pb2_grpc.NLMServicer):
 
+    def __init__(self, mem: NLMLayer = None,
+                 read_lane: Lane = None, write_lane: Lane = None,
+                 follow_lane: Lane = None):
+        self.mem = mem if mem is not None else create_nlm_layer()
+        self.read_lane = read_lane or Lane("read", read_workers, read_queue)
+        self.write_lane = write_lane or Lane(
+            "write", write_workers, write_queue)
+        # the follow streams never wait, more are rejected
+        self.follow_lane = follow_lane or Lane("follow", follow_streams, 0)
+
+    def lane(self, request) -> Lane:
+        """
+        The lane of a recall, classified before it runs.
+        """
+        if self.mem.may_write(**recall_options(request)):
+            return self.write_lane
+        return self.read_lane
+
     @raise_grpc_error(Exception, StatusCode.INTERNAL)
+    @raise_grpc_error(DeadlineError, StatusCode.DEADLINE_EXCEEDED)
+    @raise_grpc_error(OverloadError, StatusCode.RESOURCE_EXHAUSTED)
+    @run_in_lane()
     @deco_log_error(logger)
+    @profile_request()
+    @revalidate()
     @convert_request_to(GraphNode)
-    def NodeRecall(self, request, context):
-        result = mem(request)
+    @propagate_deadline()
+    def NodeRecall(self, request, context, **options):
+        result = self.mem(request, **options)
         gn = result[0] if result else request
         dctgn = convert_graphobj_to_dict(gn)
         return nlm_pb2.GraphNode(**dctgn)
 
     @raise_grpc_error(Exception, StatusCode.INTERNAL)
+    @raise_grpc_error(DeadlineError, StatusCode.DEADLINE_EXCEEDED)
+    @raise_grpc_error(OverloadError, StatusCode.RESOURCE_EXHAUSTED)
+    @run_in_lane()
     @deco_log_error(logger)
+    @profile_request()
+    @revalidate()
     @convert_request_to(GraphRelation)
-    def RelationRecall(self, request, context):
-        result = mem(request)
+    @propagate_deadline()
+    def RelationRecall(self, request, context, **options):
+        result = self.mem(request, **options)
         gr = result[0] if result else request
         dctgr = convert_graphobj_to_dict(gr)
         return nlm_pb2.GraphRelation(**dctgr)
 
     @raise_grpc_error(Exception, StatusCode.INTERNAL)
+    @raise_grpc_error(DeadlineError, StatusCode.DEADLINE_EXCEEDED)
+    @raise_grpc_error(OverloadError, StatusCode.RESOURCE_EXHAUSTED)
+    @run_in_lane()
     @deco_log_error(logger)
+    @profile_request()
     @convert_request_to(RawString)
-    def StrRecall(self, request, context):
-        result = mem(request)
-        go = result[0] if result else None
-        if isinstance(go, GraphNode):
-            dctgn = convert_graphobj_to_dict(go)
-            gop = nlm_pb2.GraphNode(**dctgn)
-        elif isinstance(go, GraphRelation):
-            dctgr = convert_graphobj_to_dict(go)
-            gop = nlm_pb2.GraphRelation(**dctgr)
-        else:
-            gop = nlm_pb2.GraphNode(**{})
-        return nlm_pb2.GraphOutput(gn=gop)
+    @propagate_deadline()
+    def StrRecall(self, request, context, **options):
+        result = self.mem(request, **options)
+        return convert_result_to_output(result)
 
     @raise_grpc_error(Exception, StatusCode.INTERNAL)
+    @raise_grpc_error(DeadlineError, StatusCode.DEADLINE_EXCEEDED)
+    @raise_grpc_error(OverloadError, StatusCode.RESOURCE_EXHAUSTED)
+    @run_in_lane()
     @deco_log_error(logger)
+    @profile_request()
     @convert_request_to(ExtractorInput)
-    def NLURecall(self, request, context):
-        result = mem(request)
-        go = result[0] if result else None
-        if isinstance(result, GraphNode):
-            dctgn = convert_graphobj_to_dict(result)
-            gop = nlm_pb2.GraphNode(**dctgn)
-        elif isinstance(go, GraphRelation):
-            dctgr = convert_graphobj_to_dict(result)
-            gop = nlm_pb2.GraphRelation(**dctgr)
-        else:
-            gop = nlm_pb2.GraphNode(**{})
-        return nlm_pb2.GraphOutput(gn=gop)
-
-
-def serve(host, port):
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    nlm_pb2_grpc.add_NLMServicer_to_server(NLMService(), server)
+    @propagate_deadline()
+    def NLURecall(self, request, context, **options):
+        result = self.mem(request, **options)
+        return convert_result_to_output(result)
+
+    def CypherRecall(self, request, context):
+        """
+        Stream the rows of a read only Cypher query.
+        """
+        try:
+            with self.read_lane.slot(time_remaining(context)), \
+                    self.mem.deadline(time_remaining(context)) as deadline:
+                context.add_callback(deadline.cancel)
+                for row in self.mem.stream(request.cypher, request.limit):
+                    yield nlm_pb2.CypherRow(data=json.dumps(row, default=str))
+        except OverstepError as e:
+            context.set_code(StatusCode.INVALID_ARGUMENT)
+            context.set_details(e.desc)
+        except OverloadError as e:
+            context.set_code(StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details(e.desc)
+        except DeadlineError as e:
+            context.set_code(StatusCode.DEADLINE_EXCEEDED)
+            context.set_details(e.desc)
+        except Exception as e:
+            logger.exception(e)
+            context.set_code(StatusCode.INTERNAL)
+            context.set_details("Maybe RPC Error.")
+
+    @raise_grpc_error(Exception, StatusCode.INTERNAL)
+    @deco_log_error(logger)
+    def SlowQueries(self, request, context):
+        """
+        The latest slow statements, the slowest first.
+        """
+        entries = self.mem.slow_log.entries(request.min_seconds,
+                                            request.limit or 100)
+        return nlm_pb2.SlowQueryOutput(queries=[
+            nlm_pb2.SlowQuery(
+                time=e["time"], seconds=e["seconds"], cypher=e["cypher"],
+                parameters=e["parameters"],
+                rows=-1 if e["rows"] is None else e["rows"],
+                origin=e["origin"] or "",
+                plan=json.dumps(e["plan"]) if e["plan"] else "")
+            for e in entries])
+
+    def Changes(self, request, context):
+        """
+        Stream the change events after the given write sequence,
+        and the new ones if follow. A follow stream holds a thread till
+        cancelled, so they run in the follow lane, RESOURCE_EXHAUSTED
+        if it is full.
+        """
+        seq = request.since
+        try:
+            with (self.follow_lane.slot(0) if request.follow
+                  else nullcontext()):
+                while context.is_active():
+                    if request.follow:
+                        events = self.mem.changes.wait(seq, timeout=1.0)
+                    else:
+                        events = self.mem.changes_since(seq)
+                        if not events:
+                            break
+                    for event in events:
+                        yield nlm_pb2.Change(
+                            seq=event.seq, op=event.op,
+                            key=json.dumps(event.key, ensure_ascii=False),
+                            props=json.dumps(event.props, ensure_ascii=False,
+                                             default=str),
+                            time=event.time)
+                        seq = event.seq
+        except OverloadError as e:
+            context.set_code(StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details(e.desc)
+        except Exception as e:
+            logger.exception(e)
+            context.set_code(StatusCode.INTERNAL)
+            context.set_details("Maybe RPC Error.")
+
+    @raise_grpc_error(Exception, StatusCode.INTERNAL)
+    @deco_log_error(logger)
+    def LaneStats(self, request, context):
+        """
+        The load of the read, the write and the follow lanes.
+        """
+        return nlm_pb2.LaneStatsOutput(lanes=[
+            nlm_pb2.LaneStats(**lane.stats())
+            for lane in (self.read_lane, self.write_lane,
+                         self.follow_lane)])
+
+    @raise_grpc_error(Exception, StatusCode.INTERNAL)
+    @raise_grpc_error(ProfilingError, StatusCode.FAILED_PRECONDITION)
+    @deco_log_error(logger)
+    def Profile(self, request, context):
+        """
+        Sample the stacks of the server and trace the allocations
+        for some seconds.
+        """
+        from utils.profiling import profile
+        seconds = min(request.seconds or 10, 60)
+        result = profile(seconds, top=request.top or 30)
+        return nlm_pb2.ProfileOutput(
+            collapsed=result["collapsed"],
+            samples=result["samples"],
+            allocations=[nlm_pb2.Allocation(**a)
+                         for a in result["allocations"]])
+
+
+class TracingInterceptor(grpc.ServerInterceptor):
+
+    """
+    Run each RPC in a span, the child of the client span given by
+    the `traceparent` metadata.
+    """
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or not tracer.enabled:
+            return handler
+        method = handler_call_details.method
+        metadata = dict(handler_call_details.invocation_metadata or ())
+        traceparent = metadata.get("traceparent")
+
+        if handler.unary_unary:
+            def unary_unary(request, context):
+                with tracer.span(method, traceparent, kind="server"):
+                    return handler.unary_unary(request, context)
+            return handler._replace(unary_unary=unary_unary)
+        if handler.unary_stream:
+            def unary_stream(request, context):
+                with tracer.span(method, traceparent, kind="server"):
+                    yield from handler.unary_stream(request, context)
+            return handler._replace(unary_stream=unary_stream)
+        return handler
+
+
+def convert_graphobj_to_output(go):
+    """
+    Convert a GraphNode or GraphRelation to GraphOutput.
+    """
+    if isinstance(go, GraphNode):
+        dctgn = convert_graphobj_to_dict(go)
+        return nlm_pb2.GraphOutput(gn=nlm_pb2.GraphNode(**dctgn))
+    elif isinstance(go, GraphRelation):
+        dctgr = convert_graphobj_to_dict(go)
+        return nlm_pb2.GraphOutput(gr=nlm_pb2.GraphRelation(**dctgr))
+    else:
+        return nlm_pb2.GraphOutput(gn=nlm_pb2.GraphNode(**{}))
+
+
+def convert_result_to_output(result: list):
+    """
+    The most related one as gn or gr, all the ranked ones as candidates.
+    """
+    go = result[0] if result else None
+    gop = convert_graphobj_to_output(go)
+    gop.candidates.extend([convert_graphobj_to_output(item)
+                           for item in result])
+    return gop
+
+
+def serve(host, port, mem: NLMLayer = None):
+    listener = setup_logging()
+    if trace_exporter == "file":
+        tracer.exporter = FileExporter(trace_file_path)
+    service = NLMService(mem)
+    service.mem.extractor.warm_up()
+    # accept the keepalive pings of the clients
+    options = [("grpc.keepalive_permit_without_calls", 1),
+               ("grpc.http2.min_ping_interval_without_data_ms", 10000)]
+    # the lanes limit the recalls, the other threads are for the queued
+    # ones and the admin RPCs
+    lanes = (service.read_lane, service.write_lane, service.follow_lane)
+    max_workers = sum(lane.workers + lane.max_queue for lane in lanes) + 8
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers),
+                         interceptors=[TracingInterceptor()],
+                         options=options,
+                         compression=grpc_compression(rpc_compression))
+    nlm_pb2_grpc.add_NLMServicer_to_server(service, server)
     server.add_insecure_port('{}:{}'.format(host, port))
     server.start()
-    server.wait_for_termination()
+    try:
+        server.wait_for_termination()
+    finally:
+        service.mem.slow_log.close()
+        listener.stop()
 
 
 if __name__ == '__main__':
-    serve("localhost", 8080)
+    args = parse_args()
+    mem = create_nlm_layer(fuzzy_node=args.fuzzy_node,
+                           add_inexistence=args.add_inexistence,
+                           update_props=args.update_props)
+    serve("localhost", 8080, mem)
@@ -0,0 +1,110 @@
+import os
+import sys
+import threading
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from graph.changes import ChangeLog, InProcessBus, FileJournalBus, SocketBus
+from schemes.graph import GraphNode, GraphRelation
+
+
+def test_change_log_seq_and_changes_since():
+    bus = InProcessBus()
+    received = []
+    bus.subscribe(received.append)
+    changes = ChangeLog([bus], retain=3)
+    for i in range(5):
+        changes.publish("add_node", ["Person", "P{}".format(i)], {"age": i})
+    assert changes.seq == 5
+    assert [e.seq for e in received] == [1, 2, 3, 4, 5]
+    assert [e.seq for e in changes.changes_since(3)] == [4, 5]
+    # 1 is not retained, so the first one is not since + 1
+    assert changes.changes_since(0)[0].seq == 3
+    assert changes.changes_since(5) == []
+
+
+def test_change_log_version_of():
+    changes = ChangeLog()
+    alice = GraphNode("Person", "Alice")
+    lives = GraphRelation(alice, GraphNode("City", "Paris"), "LIVES_IN")
+    node, relation = changes.version_of(alice), changes.version_of(lives)
+    changes.publish("add_node", ["Dog", "Rex"])
+    assert changes.version_of(alice) == node
+    changes.publish("add_relationship",
+                    [["Person", "Bob"], "KNOWS", ["Person", "Carol"]])
+    assert changes.version_of(alice) == node
+    assert changes.version_of(lives) != relation
+    relation = changes.version_of(lives)
+    changes.publish("excute", [], {"cypher": "MATCH (n) SET n.x = 1"})
+    assert changes.version_of(alice) != node
+    assert changes.version_of(lives) != relation
+
+
+def test_change_log_wait():
+    changes = ChangeLog()
+    assert changes.wait(0, timeout=0.01) == []
+    timer = threading.Timer(0.05, changes.publish,
+                            ("update_property", ["Person", "Alice"]))
+    timer.start()
+    events = changes.wait(0, timeout=2)
+    assert [(e.seq, e.op) for e in events] == [(1, "update_property")]
+
+
+def test_file_journal_bus(tmp_path):
+    path = str(tmp_path / "changes.jsonl")
+    journal = FileJournalBus(path)
+    changes = ChangeLog([journal])
+    changes.publish("add_node", ["Person", "Alice"], {"age": 20})
+    changes.publish("excute", [], {"cypher": "MATCH (n) SET n.x = 1"})
+    assert journal.last_seq() == 2
+    assert [e.op for e in journal.read(1)] == ["excute"]
+    assert ChangeLog([journal], start=journal.last_seq()).publish(
+        "add_node", ["Person", "Bob"]).seq == 3
+
+
+def test_file_journal_bus_recovery(tmp_path):
+    path = str(tmp_path / "changes.jsonl")
+    journal = FileJournalBus(path, index_every=2)
+    changes = ChangeLog([journal])
+    for i in range(5):
+        changes.publish("add_node", ["Person", "P{}".format(i)])
+    assert [e.seq for e in journal.read(3)] == [4, 5]
+    # a crash in the middle of a line, and a line out of the seq order
+    with open(path, "a", encoding="utf8") as f:
+        f.write('{"seq": 2, "op": "add_node", "key": []}\n{"seq": 6, "op')
+    journal = FileJournalBus(path)
+    assert journal.last_seq() == 5
+    changes = ChangeLog([journal], start=journal.last_seq())
+    changes.publish("add_node", ["Person", "Bob"])
+    assert journal.last_seq() == 6
+    assert [e.seq for e in journal.read(4)] == [5, 6]
+
+
+def test_change_log_publish_in_order(tmp_path):
+    path = str(tmp_path / "changes.jsonl")
+    journal = FileJournalBus(path)
+    changes = ChangeLog([journal])
+    threads = [threading.Thread(target=lambda: [
+        changes.publish("add_node", ["Person", "P"]) for _ in range(50)])
+        for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [e.seq for e in journal.read()] == list(range(1, 201))
+
+
+def test_socket_bus(tmp_path):
+    path = str(tmp_path / "changes.sock")
+    listener = SocketBus.listen(path, timeout=0.5)
+    received = []
+    thread = threading.Thread(target=lambda: received.extend(listener))
+    thread.start()
+    while not os.path.exists(path):
+        pass
+    changes = ChangeLog([SocketBus(path)])
+    changes.publish("add_node", ["Person", "Alice"], {"age": 20})
+    thread.join()
+    assert [(e.seq, e.key) for e in received] == [(1, ["Person", "Alice"])]
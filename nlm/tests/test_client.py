@@ -0,0 +1,362 @@
+import os
+import sys
+import asyncio
+from concurrent import futures
+import socket
+import time
+import types
+import grpc
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+import nlm_pb2
+import nlm_pb2_grpc
+from client import NLMClient, AsyncNLMClient, may_write
+from utils.utils import revalidate
+from graph.changes import ChangeLog
+
+
+class EchoService(nlm_pb2_grpc.NLMServicer):
+
+    def __init__(self, name, delay=0.0):
+        self.name = name
+        self.delay = delay
+        self.calls = 0
+
+    def NodeRecall(self, request, context):
+        self.calls += 1
+        time.sleep(self.delay)
+        return nlm_pb2.GraphNode(label=self.name, name=request.name)
+
+
+class VersionedService(nlm_pb2_grpc.NLMServicer):
+
+    def __init__(self):
+        self.props = '{"age": 20}'
+        self.calls = 0
+        self.mem = types.SimpleNamespace(changes=ChangeLog(),
+                                         may_write=lambda **kwargs: False)
+
+    def update(self, props):
+        self.props = props
+        self.mem.changes.publish("update_property", ["Person", "Alice"])
+
+    @revalidate()
+    def NodeRecall(self, request, context):
+        self.calls += 1
+        return nlm_pb2.GraphNode(label=request.label, name=request.name,
+                                 props=self.props)
+
+
+def start_server(service):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    nlm_pb2_grpc.add_NLMServicer_to_server(service, server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    return server, "localhost:{}".format(port)
+
+
+def unused_address():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return "localhost:{}".format(sock.getsockname()[1])
+
+
+@pytest.fixture
+def servers():
+    services = [EchoService("A"), EchoService("B")]
+    started = [start_server(s) for s in services]
+    yield services, [address for (_, address) in started]
+    for server, _ in started:
+        server.stop(None)
+
+
+def test_round_robin(servers):
+    services, addresses = servers
+    client = NLMClient(addresses=addresses)
+    labels = [client.recall_node("Person", "Alice").label for _ in range(4)]
+    assert sorted(labels) == ["A", "A", "B", "B"]
+    client.close()
+
+
+def test_compression(servers):
+    services, addresses = servers
+    client = NLMClient(addresses=addresses[:1], compression="gzip")
+    assert client.recall_node("Person", "Alice", {"bio": "x" * 1000}
+                              ).label == "A"
+    client.close()
+
+
+def test_least_outstanding(servers):
+    services, addresses = servers
+    client = NLMClient(addresses=addresses, policy="least_outstanding")
+    client.endpoints[0].outstanding = 10
+    assert client.recall_node("Person", "Alice").label == "B"
+    client.close()
+
+
+def test_consistent_hash(servers):
+    services, addresses = servers
+    client = NLMClient(addresses=addresses, policy="consistent_hash")
+    for name in ["Alice", "Bob", "Carol", "Dave"]:
+        labels = {client.recall_node("Person", name).label for _ in range(3)}
+        assert len(labels) == 1
+    client.close()
+
+
+def test_consistent_hash_with_cache(servers):
+    services, addresses = servers
+    client = NLMClient(addresses=addresses, policy="consistent_hash",
+                       cache_size=10, cache_ttl=100)
+    label = client.recall_node("Person", "Alice").label
+    assert client.recall_node("Person", "Alice").label == label
+    assert sum(s.calls for s in services) == 1
+    client.close()
+
+
+def test_retry_unavailable(servers):
+    services, addresses = servers
+    client = NLMClient(addresses=[unused_address(), addresses[0]],
+                       retries=3, backoff=0.01)
+    for _ in range(3):
+        assert client.recall_node("Person", "Alice").label == "A"
+    client.close()
+
+
+def test_raise_error():
+    client = NLMClient(addresses=[unused_address()], retries=1,
+                       backoff=0.01, timeout=1)
+    with pytest.raises(grpc.RpcError):
+        client.recall_node("Person", "Alice")
+    client.close()
+
+
+def test_hedged_recall():
+    slow, fast = EchoService("slow", delay=1.0), EchoService("fast")
+    started = [start_server(slow), start_server(fast)]
+    client = NLMClient(addresses=[address for (_, address) in started],
+                       hedge_after=0.05)
+    start = time.monotonic()
+    assert client.recall_node("Person", "Alice").label == "fast"
+    assert time.monotonic() - start < 0.5
+    # the slow one is cancelled
+    time.sleep(0.1)
+    assert all(e.outstanding == 0 for e in client.endpoints)
+    client.close()
+    for server, _ in started:
+        server.stop(None)
+
+
+def test_async_recall_nodes_concurrently(servers):
+    services, addresses = servers
+    progress = []
+
+    async def main():
+        async with AsyncNLMClient(addresses=addresses) as client:
+            node = await client.recall_node("Person", "Alice")
+            assert node.name == "Alice"
+            return await client.recall_nodes_concurrently(
+                [("Person", "P{}".format(i)) for i in range(20)],
+                concurrency=4,
+                progress=lambda done, total: progress.append((done, total)))
+
+    results = asyncio.run(main())
+    assert [r.name for r in results] == ["P{}".format(i) for i in range(20)]
+    assert {r.label for r in results} == {"A", "B"}
+    assert progress[-1] == (20, 20)
+    assert len(progress) == 20
+
+
+def test_async_retry_and_errors(servers):
+    services, addresses = servers
+
+    async def main():
+        async with AsyncNLMClient(addresses=[unused_address(), addresses[0]],
+                                  backoff=0.01) as client:
+            node = await client.recall_node("Person", "Alice")
+            assert node.label == "A"
+        async with AsyncNLMClient(addresses=[unused_address()], retries=1,
+                                  backoff=0.01, timeout=1) as client:
+            results = await client.recall_nodes_concurrently(
+                [("Person", "Alice")], return_exceptions=True)
+            assert isinstance(results[0], grpc.RpcError)
+
+    asyncio.run(main())
+
+
+def test_async_policies_and_hedging():
+    slow, fast = EchoService("slow", delay=0.5), EchoService("fast")
+    started = [start_server(slow), start_server(fast)]
+    addresses = [address for (_, address) in started]
+
+    async def main():
+        async with AsyncNLMClient(addresses=addresses,
+                                  hedge_after=0.05) as client:
+            start = time.monotonic()
+            for _ in range(2):
+                node = await client.recall_node("Person", "Alice")
+                assert node.label == "fast"
+            assert time.monotonic() - start < 1
+            await asyncio.sleep(0.1)
+            assert all(e.outstanding == 0 for e in client.endpoints)
+        async with AsyncNLMClient(addresses=addresses,
+                                  policy="consistent_hash") as client:
+            labels = {(await client.recall_node("Person", "Bob",
+                                                timeout=2)).label
+                      for _ in range(3)}
+            assert len(labels) == 1
+
+    asyncio.run(main())
+    for server, _ in started:
+        server.stop(None)
+
+
+def test_hedge_within_deadline():
+    slow, fast = EchoService("slow", delay=0.5), EchoService("fast")
+    started = [start_server(slow), start_server(fast)]
+    addresses = [address for (_, address) in started]
+    # the deadline is over before the hedge
+    client = NLMClient(addresses=addresses, hedge_after=0.2, timeout=0.1)
+    with pytest.raises(grpc.RpcError) as e:
+        client.recall_node("Person", "Alice")
+    assert e.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+    client.close()
+
+    async def main():
+        async with AsyncNLMClient(addresses=addresses, hedge_after=0.2,
+                                  timeout=0.1) as client:
+            with pytest.raises(grpc.RpcError):
+                await client.recall_node("Person", "Alice")
+
+    asyncio.run(main())
+    assert fast.calls == 0
+    for server, _ in started:
+        server.stop(None)
+
+
+class StatsService(EchoService):
+
+    def Changes(self, request, context):
+        for seq in range(request.since + 1, 4):
+            yield nlm_pb2.Change(seq=seq, op="add_node")
+
+    def LaneStats(self, request, context):
+        return nlm_pb2.LaneStatsOutput(lanes=[nlm_pb2.LaneStats(name="read")])
+
+
+def test_async_cache_changes_and_lane_stats():
+    service = VersionedService()
+    server, address = start_server(service)
+    stats_server, stats_address = start_server(StatsService("A"))
+
+    async def main():
+        async with AsyncNLMClient(addresses=[address], cache_size=10,
+                                  cache_ttl=100) as client:
+            for _ in range(2):
+                node = await client.recall_node("Person", "Alice")
+                assert node.props == '{"age": 20}'
+            assert client.cache.stats() == {"hits": 1, "revalidated": 0,
+                                            "misses": 1}
+            with pytest.raises(ValueError):
+                await client.recall_nodes_concurrently(
+                    [("Person", "Alice")], concurrency=0)
+        async with AsyncNLMClient(addresses=[stats_address]) as client:
+            seqs = [c.seq async for c in client.changes(since=1)]
+            assert seqs == [2, 3]
+            stats = await client.lane_stats()
+            assert [lane.name for lane in stats.lanes] == ["read"]
+
+    asyncio.run(main())
+    assert service.calls == 1
+    server.stop(None)
+    stats_server.stop(None)
+
+
+class FailingService(EchoService):
+
+    def NodeRecall(self, request, context):
+        if request.name == "Bad":
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "bad")
+        return super().NodeRecall(request, context)
+
+
+def test_async_recall_nodes_cancelled_on_failure():
+    service = FailingService("A", delay=0.05)
+    server, address = start_server(service)
+    items = [("Person", "Bad")] + [("Person", "P{}".format(i))
+                                   for i in range(20)]
+
+    async def main():
+        async with AsyncNLMClient(addresses=[address]) as client:
+            with pytest.raises(grpc.RpcError):
+                await client.recall_nodes_concurrently(items, concurrency=2)
+
+    asyncio.run(main())
+    # the other worker stopped, not all the items were recalled
+    assert service.calls < 5
+    server.stop(None)
+
+
+def test_recall_cache():
+    service = VersionedService()
+    server, address = start_server(service)
+    client = NLMClient(addresses=[address], cache_size=10, cache_ttl=0.1)
+
+    first = client.recall_node("Person", "Alice")
+    assert first.props == '{"age": 20}' and first.version
+    assert client.recall_node("Person", "Alice").props == '{"age": 20}'
+    assert service.calls == 1
+
+    time.sleep(0.15)
+    node = client.recall_node("Person", "Alice")
+    assert node.props == '{"age": 20}' and not node.not_modified
+    # not modified, answered without the recall
+    assert service.calls == 1
+    assert client.cache.stats() == {"hits": 1, "revalidated": 1, "misses": 1}
+
+    # writes of other labels do not change the version
+    service.mem.changes.publish("add_node", ["City", "Paris"])
+    time.sleep(0.15)
+    client.recall_node("Person", "Alice")
+    assert service.calls == 1
+
+    service.update('{"age": 21}')
+    time.sleep(0.15)
+    assert client.recall_node("Person", "Alice").props == '{"age": 21}'
+    assert service.calls == 2
+    assert client.cache.misses == 2
+    client.close()
+    server.stop(None)
+
+
+def test_recall_cache_max_age():
+    service = VersionedService()
+    server, address = start_server(service)
+    client = NLMClient(addresses=[address], cache_size=10, cache_ttl=0.05,
+                       cache_max_age=0.3)
+    client.recall_node("Person", "Alice")
+    # written by another process, the version is not changed
+    service.props = '{"age": 21}'
+    time.sleep(0.1)
+    assert client.recall_node("Person", "Alice").props == '{"age": 20}'
+    time.sleep(0.25)
+    assert client.recall_node("Person", "Alice").props == '{"age": 21}'
+    assert service.calls == 2
+    client.close()
+    server.stop(None)
+
+
+def test_write_recalls_not_cached_nor_hedged(servers):
+    services, addresses = servers
+    client = NLMClient(addresses=addresses[:1], cache_size=10, cache_ttl=100,
+                       hedge_after=0.0)
+    for _ in range(3):
+        client.recall_node("Person", "Alice", add_inexistence=True)
+    assert services[0].calls == 3
+    client.close()
+    assert may_write({"update_props": True})
+    assert not may_write({"update_props": True, "fuzzy_node": True})
+    assert may_write({}, {"add_inexistence": True})
+    assert not may_write({"add_inexistence": False}, {"add_inexistence": True})
@@ -0,0 +1,49 @@
+import base64
+import os
+import sys
+import grpc
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from utils.compression import compress_props, decompress_props
+from utils.compression import compress_stored_props, decompress_data
+from utils.compression import compress_value, is_compressed, grpc_compression
+
+
+def test_compress_props():
+    bio = "Alice was born in a small town. " * 20
+    props = {"name": bio, "bio": bio, "age": 20, "sex": "female"}
+    compressed = compress_props(props, threshold=100)
+    assert is_compressed(compressed["bio"])
+    assert len(compressed["bio"]) < len(bio)
+    # never the name, nor the short or non text ones
+    assert compressed["name"] == bio
+    assert compressed["age"] == 20 and compressed["sex"] == "female"
+    assert decompress_props(compressed) == props
+    assert compress_props(props, threshold=None) == props
+    # compressed once by the migration
+    assert compress_stored_props(compressed, 100) == compressed
+
+
+def test_compress_incompressible():
+    # no shorter after compressed (and base64)
+    text = base64.b64encode(os.urandom(300)).decode()
+    assert compress_value(text, 100) == text
+    assert decompress_props({"text": text}) == {"text": text}
+
+
+def test_marker_collision():
+    props = {"note": "nlm:zlib: is our marker prefix", "raw": "nlm:raw:x"}
+    stored = compress_props(props)
+    assert stored != props
+    assert decompress_props(stored) == props
+    # stored before escaping, as it is
+    assert decompress_props({"note": props["note"]}) == {"note": props["note"]}
+    assert decompress_data([{"bio": stored["note"], "name": "nlm:raw:"}]) == [
+        {"bio": props["note"], "name": "nlm:raw:"}]
+
+
+def test_grpc_compression():
+    assert grpc_compression() == grpc.Compression.NoCompression
+    assert grpc_compression("gzip") == grpc.Compression.Gzip
@@ -0,0 +1,190 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from utils.concurrency import SingleFlight, StripedLock, Lane, Scheduler
+from schemes.error import DeadlineError, OverloadError
+
+
+def run_concurrently(func, num):
+    barrier = threading.Barrier(num)
+    res = [None] * num
+
+    def call(i):
+        barrier.wait()
+        res[i] = func(i)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(num)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return res
+
+
+def test_single_flight_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return ["AliceOne"]
+
+    res = run_concurrently(lambda i: flights.do("AliceOne", slow), 8)
+    assert len(calls) == 1
+    assert res == [["AliceOne"]] * 8
+    # finished, a new call runs again
+    assert flights.do("AliceOne", slow) == ["AliceOne"]
+    assert len(calls) == 2
+
+
+def test_single_flight_different_keys():
+    flights = SingleFlight()
+    res = run_concurrently(lambda i: flights.do(i % 2, lambda: i % 2), 8)
+    assert res == [0, 1] * 4
+
+
+def test_single_flight_share_exception():
+    flights = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError
+
+    def call(i):
+        try:
+            flights.do("key", fail)
+        except ValueError:
+            return "error"
+
+    assert run_concurrently(call, 4) == ["error"] * 4
+
+
+def test_single_flight_leader_deadline_not_shared():
+    flights = SingleFlight()
+    calls = []
+
+    def call(i):
+        def query():
+            calls.append(i)
+            time.sleep(0.1)
+            # only the first caller has a short deadline
+            if len(calls) == 1:
+                raise DeadlineError
+            return "result"
+        try:
+            return flights.do("key", query, timeout=2)
+        except DeadlineError:
+            return "deadline"
+
+    res = run_concurrently(call, 4)
+    assert sorted(res) == ["deadline"] + ["result"] * 3
+    assert len(calls) == 2
+
+
+def test_single_flight_follower_timeout():
+    flights = SingleFlight()
+
+    def leader():
+        time.sleep(0.1)
+        raise DeadlineError
+
+    thread = threading.Thread(target=lambda: pytest.raises(
+        DeadlineError, flights.do, "key", leader))
+    thread.start()
+    time.sleep(0.02)
+    with pytest.raises(TimeoutError):
+        flights.do("key", lambda: "result", timeout=0.05)
+    thread.join()
+
+
+def test_striped_lock_no_duplicates():
+    locks = StripedLock(stripes=4)
+    # check then add, like query_add_update with add_inexistence
+    store = []
+
+    def add_inexistence(i):
+        key = ("Person", "Alice{}".format(i % 3))
+        with locks.hold(key):
+            if key not in store:
+                time.sleep(0.01)
+                store.append(key)
+
+    run_concurrently(add_inexistence, 30)
+    assert len(store) == 3
+    stats = locks.stats()
+    assert stats["acquired"] == 30
+    assert stats["contended"] > 0
+    assert stats["wait_seconds"] > 0
+
+
+def test_striped_lock_many_keys_no_deadlock():
+    locks = StripedLock(stripes=8)
+    keys = [("Person", "Alice{}".format(i)) for i in range(8)]
+
+    def hold(i):
+        with locks.hold(keys[i % 8], keys[(i + 3) % 8], keys[(i + 5) % 8]):
+            time.sleep(0.001)
+        return True
+
+    assert all(run_concurrently(hold, 16))
+
+
+def test_lane_limits_and_rejects():
+    lane = Lane("write", workers=1, max_queue=1)
+    release = threading.Event()
+
+    def slow():
+        with lane.slot():
+            release.wait()
+
+    running = threading.Thread(target=slow)
+    running.start()
+    time.sleep(0.05)
+    waiting = threading.Thread(target=slow)
+    waiting.start()
+    time.sleep(0.05)
+    assert lane.stats()["active"] == 1
+    assert lane.stats()["queued"] == 1
+    with pytest.raises(OverloadError):
+        with lane.slot():
+            pass
+    release.set()
+    running.join()
+    waiting.join()
+    stats = lane.stats()
+    assert stats["completed"] == 2
+    assert stats["rejected"] == 1
+    assert stats["max_wait_seconds"] > 0
+
+
+def test_lane_wait_timeout():
+    lane = Lane("write", workers=1, max_queue=10)
+    with lane.slot():
+        with pytest.raises(DeadlineError):
+            with lane.slot(timeout=0.01):
+                pass
+    # an independent lane is not blocked
+    with Lane("read", workers=1, max_queue=0).slot(timeout=0.01):
+        pass
+    assert lane.stats()["queued"] == 0
+
+
+def test_scheduler():
+    scheduler = Scheduler()
+    called = []
+    scheduler.call_later(0.05, called.append, "late")
+    scheduler.call_later(0.01, called.append, "early")
+    scheduler.call_later(0.02, called.append, "cancelled").cancel()
+    time.sleep(0.1)
+    assert called == ["early", "late"]
+    assert scheduler.pending() == 0
+    # one thread for all the calls
+    assert sum(t.name == "scheduler" for t in threading.enumerate()) == 1
@@ -1,5 +1,9 @@
 import os
 import sys
+import threading
+import time
+import types
+from types import SimpleNamespace
 import pytest
 
 from py2neo.database import Graph
@@ -11,6 +15,8 @@ sys.path.append(ROOT_PATH)
 
 from schemes.graph import GraphNode, GraphRelation
 from graph.graph import NLMGraph
+from graph.slowlog import SlowQueryLog
+from schemes.error import InputError, OverstepError
 
 
 nlmg = NLMGraph(graph=Graph(port=7688))
@@ -130,6 +136,19 @@ def test_add_relation_not_exist():
     nlmg.graph.delete(new)
 
 
+def test_add_relation_existed_not_duplicated():
+    start = nlmg.add_node("Person", "Bob", {})
+    end = nlmg.add_node("Person", "Alice", {})
+    first = nlmg.add_relationship(start, end, "LOVES", {"roles": "boyfriend"})
+    seq = nlmg.changes.seq
+    second = nlmg.add_relationship(start, end, "LOVES", {"roles": "husband"})
+    assert second.identity == first.identity
+    assert dict(second) == {"roles": "boyfriend"}
+    assert nlmg.changes.seq == seq
+    assert nlmg.relationships_num == 1
+    nlmg.graph.delete_all()
+
+
 def test_add_relation_is_exist_not_update(make_relation):
     relation = nlmg.check_update_relationship(make_relation)
     new = nlmg.check_update_relationship(make_relation)
@@ -225,6 +244,56 @@ def test_update_with_invalid_input():
         assert e.code == 20000
 
 
+def test_batch(make_relation):
+    with nlmg.batch() as batch:
+        start = nlmg.check_update_node(make_relation.start)
+        again = nlmg.check_update_node(make_relation.start)
+        end = nlmg.check_update_node(make_relation.end)
+        relation = nlmg.add_relationship(start, end, "LOVES", {})
+        assert again is start
+        assert start.identity is None
+    assert len(batch.created) == 3
+    assert relation.identity >= 0
+    assert start.identity >= 0
+    nlmg.graph.delete_all()
+
+
+def test_batch_auto_flush():
+    with nlmg.batch(max_ops=2) as batch:
+        for i in range(5):
+            nlmg.add_node("Person", "Batch{}".format(i), {})
+        assert len(batch.created) == 4
+    assert len(batch.created) == 5
+    assert nlmg.nodes_num == 5
+    nlmg.graph.delete_all()
+
+
+def test_batch_create_only():
+    nlmg.add_node("Person", "Existed", {"age": 1})
+    other = NLMGraph(graph=nlmg.graph)
+    with nlmg.batch() as batch:
+        existed = nlmg.add_node("Person", "Existed", {"age": 2})
+        # not in the batch of nlmg
+        other.add_node("Person", "Other", {})
+        assert other.nodes_num == 2
+    assert existed["age"] == 1
+    assert nlmg.nmatcher.match("Person", name="Existed").first()["age"] == 1
+    # Existed is matched, not created
+    assert len(batch.created) == 0
+    nlmg.graph.delete_all()
+
+
+def test_batch_rollback_not_published():
+    seq = nlmg.changes.seq
+    with pytest.raises(Exception):
+        with nlmg.batch():
+            nlmg.add_node("Person", "RolledBack", {})
+            # a map is not a valid prop, the commit fails
+            nlmg.add_node("Person", "Invalid", {"x": {"nested": 1}})
+    assert nlmg.changes.seq == seq
+    assert nlmg.nodes_num == 0
+
+
 def test_query_with_invalid_input():
     try:
         qres = nlmg.query(123)
@@ -346,6 +415,35 @@ def test_query_with_graph_relation_with_fuzzy_node():
     assert len(res3) == 0
 
 
+def test_query_with_graph_relation_with_fuzzy_node_candidates():
+    # AliceT matches both AliceTwo and AliceThree,
+    # only AliceThree LOVES AliceOne.
+    qin = GraphRelation(GraphNode("Person", "AliceT"), GraphNode("Person", "AliceOne"), "LOVES")
+    res = nlmg.query(qin, topn=5, fuzzy=True)
+    assert len(res) == 1
+    assert res[0].start_node["name"] == "AliceThree"
+    assert dict(res[0]) == {"roles": "husband", "from": 2011}
+
+    # only the top candidate start (ranked by the props) is considered
+    male = GraphRelation(GraphNode("Person", "AliceT", {"sex": "male"}),
+                         GraphNode("Person", "AliceOne"), "LOVES")
+    res = nlmg.query(male, topn=5, fuzzy=True, candidates=1)
+    assert len(res) == 1
+    assert res[0].start_node["name"] == "AliceThree"
+    assert type(res[0]).__name__ == "LOVES"
+    # AliceTwo has no relation to AliceOne, AliceThree is not a candidate
+    aged = GraphRelation(GraphNode("Person", "AliceT", {"age": 21}),
+                            GraphNode("Person", "AliceOne"), "LOVES")
+    assert nlmg.query(aged, topn=5, fuzzy=True, candidates=1) == []
+    assert len(nlmg.query(aged, topn=5, fuzzy=True, candidates=2)) == 1
+
+
+def test_query_with_graph_relation_rank_by_props():
+    qin = GraphRelation(GraphNode("Person", "AliceThree"), GraphNode("Person", "AliceOne"), None, {"from": 2009})
+    res = nlmg.query(qin, topn=2)
+    assert len(res) == 2
+    assert dict(res[0]) == {"roles": "boss", "from": 2009}
+
 
 def test_query_with_graph_relation_without_fuzzy_node():
     qin1 = GraphRelation(GraphNode("Person", "Alice"), GraphNode("Animal", "Monkey"), "LOVES")
@@ -391,6 +489,106 @@ def test_query_with_cypher():
     assert "a.age" in res[0]
 
 
+def test_query_with_deadline_exceeded():
+    try:
+        with nlmg.deadline(0):
+            nlmg.query(GraphNode("Person", "AliceOne"))
+        assert False
+    except Exception as e:
+        assert e.code == 50003
+
+
+def test_query_with_deadline():
+    with nlmg.deadline(5) as deadline:
+        res = nlmg.query(GraphNode("Person", "AliceOne"))
+        assert deadline.remaining() > 0
+    assert dict(res[0])["name"] == "AliceOne"
+
+
+def test_write_with_deadline_exceeded():
+    for write in (lambda: nlmg.add(GraphNode("Person", "Late")),
+                  lambda: nlmg.update(GraphNode("Person", "AliceOne",
+                                                {"age": 99}))):
+        try:
+            with nlmg.deadline(0):
+                write()
+            assert False
+        except Exception as e:
+            assert e.code == 50003
+    assert nlmg.query(GraphNode("Person", "Late")) == []
+
+
+def test_terminate_tagged_statement():
+    errors = []
+
+    def long_running():
+        try:
+            nlmg.graph.run("UNWIND range(1, 10000000000) AS x "
+                           "RETURN count(x)", nlm_tag="terminated").evaluate()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=long_running)
+    start = time.monotonic()
+    thread.start()
+    time.sleep(0.5)
+    nlmg._terminate("terminated")
+    thread.join(10)
+    assert not thread.is_alive()
+    assert time.monotonic() - start < 10
+    assert errors
+
+
+def test_query_with_cypher_limit_over_ten():
+    q = "MATCH (a:Person) RETURN a.name LIMIT 50"
+    res = nlmg.query(q)
+    assert len(res) == 6
+
+
+def test_stream_cypher():
+    rows = nlmg.stream("MATCH (a:Person) RETURN a.name", limit=2)
+    assert isinstance(rows, types.GeneratorType)
+    assert len(list(rows)) == 2
+
+    nlmg.max_cypher_rows = 3
+    rows = nlmg.stream("MATCH (a:Person) RETURN a.name LIMIT 50")
+    assert len(list(rows)) == 3
+    nlmg.max_cypher_rows = 1000
+
+
+def test_stream_cypher_uncapped_limit():
+    nlmg.max_cypher_rows = 3
+    rows = nlmg.stream("MATCH (a:Person) RETURN a.name AS name UNION "
+                       "MATCH (b:Person) RETURN b.name AS name LIMIT 50")
+    assert len(list(rows)) == 3
+    rows = list(nlmg.stream("MATCH (a:Person) RETURN a.name LIMIT 2 + 48"))
+    assert len(rows) == 3
+    # aliased by the text, the column name as not wrapped
+    assert list(rows[0]) == ["a.name"]
+    rows = list(nlmg.stream(
+        "MATCH (a:Person) RETURN a.name, {n: 1, m: 'x,y'} LIMIT 2 + 48"))
+    assert list(rows[0]) == ["a.name", "{n: 1, m: 'x,y'}"]
+    nlmg.max_cypher_rows = 1000
+    with pytest.raises(OverstepError):
+        list(nlmg.stream("MATCH (a:Person) RETURN a.name LIMIT $n"))
+
+
+def test_stream_cypher_reads_writer_after_write():
+    reader = SimpleNamespace()
+    mem = NLMGraph(graph=nlmg.graph, readers=[reader], replica_lag=60)
+    mem.router.wrote(["Person"])
+    rows = mem.stream("MATCH (a:Person) RETURN a.name", 1, scope=["Person"])
+    assert len(list(rows)) == 1
+
+
+def test_stream_cypher_read_only():
+    try:
+        list(nlmg.stream("MATCH (a:Person) DELETE a"))
+        assert False
+    except Exception as e:
+        assert nlmg.nodes_num == 6
+
+
 def test_labels():
     labels = nlmg.labels
     assert len(labels) == 1
@@ -431,6 +629,105 @@ def test_excute_pass():
     assert res["labels_added"] == 1
 
 
+def test_excute_with_parameters():
+    res = nlmg.excute("CREATE (n:Person {name: $name})", {"name": "Andy2"})
+    assert res["nodes_created"] == 1
+
+
+def test_excute_many():
+    rows = [{"name": "Bulk{}".format(i), "age": i} for i in range(5)]
+    res = nlmg.excute_many("CREATE (n:Person {name: row.name, age: row.age})",
+                           rows, batch_size=2)
+    assert res["nodes_created"] == 5
+    assert res["properties_set"] == 10
+    assert res["contained_updates"] == True
+    assert res["batches"] == 3
+    assert res["rows"] == 5
+    assert res["rows_per_second"] > 0
+
+
+def test_slow_query_log():
+    slow = NLMGraph(graph=nlmg.graph, slow_log=SlowQueryLog(threshold=0))
+    with slow.origin("test"):
+        slow.query(GraphNode("Person", "Andy"))
+    entry = slow.slow_log.entries()[0]
+    assert "MATCH" in entry["cypher"]
+    assert "Andy" in entry["parameters"]
+    assert entry["origin"] == "test"
+    assert entry["rows"] >= 1
+
+
+def test_slow_query_failed_not_profiled():
+    slow = NLMGraph(graph=nlmg.graph,
+                    slow_log=SlowQueryLog(threshold=0, profile_rate=1))
+    with pytest.raises(Exception):
+        slow.run("MATCH (n:Person RETURN n", readonly=True)
+    # recorded at once, without re-running it
+    assert slow.slow_log.entries()[0]["plan"] is None
+
+
+def test_push_graph_changed():
+    seq = nlmg.changes.seq
+    alice, bob = Node("Person", name="Pushed"), Node("Person", name="Pushed2")
+    nlmg.push_graph(Relationship(alice, "KNOWS", bob))
+    events = nlmg.changes_since(seq)
+    assert [e.op for e in events] == ["add_node", "add_node",
+                                      "add_relationship"]
+    nlmg.graph.run("MATCH (n:Person) WHERE n.name STARTS WITH 'Pushed' "
+                   "DETACH DELETE n")
+
+
+def test_changes_since():
+    seq = nlmg.changes.seq
+    nlmg.add_node("Person", "Changed", {"age": 1})
+    node = nlmg.nmatcher.match("Person", name="Changed").first()
+    nlmg.update_property(node, {"age": 2})
+    # existed, not changed
+    nlmg.add_node("Person", "Changed", {"age": 3})
+    with nlmg.batch():
+        nlmg.add(GraphRelation(GraphNode("Person", "Changed"),
+                               GraphNode("Person", "Changed2"), "KNOWS"))
+    events = nlmg.changes_since(seq)
+    assert [e.op for e in events] == ["add_node", "update_property",
+                                      "add_node", "add_relationship"]
+    assert events[0].key == ["Person", "Changed"]
+    assert events[1].props == {"name": "Changed", "age": 2}
+    assert events[3].key[1] == "KNOWS"
+    assert [e.seq for e in events] == list(range(seq + 1, seq + 5))
+
+
+
+def test_query_projection():
+    nlmg.add_node("Person", "Projected", {"age": 3, "bio": "long text"})
+    gn = GraphNode("Person", "Projected", {"sex": "male"})
+    node = nlmg.query(gn, projection=["age"])[0]
+    assert dict(node) == {"name": "Projected", "age": 3}
+    assert node.projected and node.identity is not None
+    node = nlmg.query(gn, projection=[])[0]
+    assert dict(node) == {"name": "Projected"}
+    # only some of its props, never pushed
+    assert node.graph is None
+    with pytest.raises(InputError):
+        nlmg.update_property(node, {"age": 4})
+    node = nlmg.query(gn)[0]
+    assert dict(node)["bio"] == "long text"
+
+
+
+def test_compress_threshold():
+    bio = "Alice was born in a small town. " * 20
+    compressing = NLMGraph(graph=nlmg.graph, compress_threshold=100)
+    compressing.add_node("Person", "Compressed", {"bio": bio})
+    raw = nlmg.graph.run("MATCH (n:Person {name: 'Compressed'}) "
+                         "RETURN n.bio AS bio").evaluate()
+    assert raw != bio and len(raw) < len(bio)
+    nlmg.add_node("Person", "Uncompressed", {"bio": bio})
+    assert compressing.compress_existing(batch_size=2)["nodes"] >= 1
+    raw = nlmg.graph.run("MATCH (n:Person {name: 'Uncompressed'}) "
+                         "RETURN n.bio AS bio").evaluate()
+    assert raw != bio
+
+
 if __name__ == '__main__':
     print(ROOT_PATH)
     print(nlmg)
@@ -0,0 +1,35 @@
+import os
+import sys
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from utils.hashring import HashRing
+
+
+def test_hash_ring_stable():
+    ring = HashRing(["a:1", "b:1", "c:1"])
+    keys = ["Entity{}".format(i) for i in range(1000)]
+    owners = [ring.lookup(k) for k in keys]
+    assert owners == [HashRing(["a:1", "b:1", "c:1"]).lookup(k) for k in keys]
+    assert set(owners) == {"a:1", "b:1", "c:1"}
+
+    # adding a node only moves the keys to the new one
+    bigger = HashRing(["a:1", "b:1", "c:1", "d:1"])
+    moved = [(o, bigger.lookup(k)) for o, k in zip(owners, keys)
+             if bigger.lookup(k) != o]
+    assert all(new == "d:1" for (_, new) in moved)
+    assert len(moved) < 500
+
+
+def test_hash_ring_bounded_load():
+    ring = HashRing(["a", "b"], balance=1.0)
+    owner = ring.lookup("Alice")
+    other = "b" if owner == "a" else "a"
+    load = {owner: 3, other: 0}
+    assert ring.lookup("Alice", lambda n: load[n]) == other
+    load = {owner: 1, other: 1}
+    assert ring.lookup("Alice", lambda n: load[n]) == owner
+    with pytest.raises(ValueError):
+        HashRing(["a"], balance=0.5)
@@ -0,0 +1,43 @@
+import os
+import sys
+import subprocess
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# microseconds
+IMPORT_BUDGET = 300000
+HEAVY_MODULES = ["py2neo", "grpc", "google.protobuf",
+                 "protobuf_to_dict", "dacite"]
+
+
+def import_times(module: str) -> dict:
+    """
+    Parse the `-X importtime` output to {module: cumulative us}.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        cwd=ROOT_PATH, capture_output=True, text=True, check=True)
+    ret = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        ret[name.strip()] = int(cumulative)
+    return ret
+
+
+def test_import_nlm_in_budget():
+    times = import_times("nlm")
+    assert times["nlm"] < IMPORT_BUDGET
+
+
+def test_import_nlm_without_heavy_modules():
+    times = import_times("nlm")
+    for name in times:
+        for heavy in HEAVY_MODULES:
+            assert not (name == heavy or name.startswith(heavy + "."))
+
+
+def test_import_config_without_handlers():
+    code = "from configs.config import logger; assert not logger.handlers"
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT_PATH, check=True)
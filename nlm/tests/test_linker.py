@@ -0,0 +1,108 @@
+import os
+import sys
+import gzip
+import json
+from types import SimpleNamespace
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from schemes.graph import GraphNode
+from models.linker import EntityLinker
+from models.extractor import NLMExtractor
+
+
+@pytest.fixture
+def make_linker():
+    linker = EntityLinker()
+    for name in ["Alice", "AliceOne", "AliceThree", "Bob"]:
+        linker.insert("Person", name)
+    linker.insert("Animal", "Monkey")
+    return linker
+
+
+def test_search_overlapped(make_linker):
+    res = make_linker.search("AliceOne and Bob")
+    assert (0, 5, "Alice") in res
+    assert (0, 8, "AliceOne") in res
+    assert (13, 16, "Bob") in res
+    assert len(res) == 3
+
+
+def test_link_longest(make_linker):
+    res = make_linker.link("AliceThree 和 AliceOne 是什么关系？")
+    assert res == [GraphNode("Person", "AliceThree"),
+                   GraphNode("Person", "AliceOne")]
+
+
+def test_link_not_exist(make_linker):
+    assert make_linker.link("not exist text") == []
+
+
+def test_insert_incrementally(make_linker):
+    assert make_linker.link("a Monkey and a Cat") == [
+        GraphNode("Animal", "Monkey")]
+    make_linker.insert("Animal", "Cat")
+    make_linker.insert("Person", "Monkey")
+    assert make_linker.link("a Monkey and a Cat") == [
+        GraphNode("Animal", "Monkey"),
+        GraphNode("Person", "Monkey"),
+        GraphNode("Animal", "Cat")]
+
+
+def test_snapshot(make_linker, tmp_path):
+    path = str(tmp_path / "linker.json.gz")
+    make_linker.version = 3
+    make_linker.save(path)
+    linker = EntityLinker.load(path)
+    assert linker.version == 3
+    assert len(linker) == len(make_linker)
+    assert linker.link("Bob likes AliceOne") == [
+        GraphNode("Person", "Bob"), GraphNode("Person", "AliceOne")]
+
+
+def test_snapshot_invalid(make_linker, tmp_path):
+    path = str(tmp_path / "linker.json.gz")
+    make_linker.save(path)
+    with gzip.open(path, "rb") as f:
+        state = json.loads(f.read())
+    state["fail"].append(len(state["goto"]))
+    with gzip.open(path, "wb") as f:
+        f.write(json.dumps(state).encode("utf8"))
+    with pytest.raises(ValueError):
+        EntityLinker.load(path)
+
+
+class FakeGraph:
+
+    """the node names of a graph, run by the linker"""
+
+    def __init__(self, names):
+        self.names = names
+
+    def run(self, cypher):
+        if "count" in cypher:
+            return SimpleNamespace(evaluate=lambda: len(self.names))
+        return [{"labels": ["Person"], "name": name} for name in self.names]
+
+
+def test_extractor_snapshot_and_refresh(tmp_path):
+    path = str(tmp_path / "linker.json.gz")
+    graph = FakeGraph(["Alice"])
+    extractor = NLMExtractor(graph, snapshot=path, refresh_every=None)
+    assert extractor.linker.link("Alice") == [GraphNode("Person", "Alice")]
+    assert EntityLinker.load(path).version == 1
+    # by another process, and by this one
+    graph.names.extend(["Bob", "Carol"])
+    extractor.add_entity("Person", "Carol")
+    assert extractor.refresh()
+    assert extractor.linker.link("Alice Bob Carol") == [
+        GraphNode("Person", "Alice"), GraphNode("Person", "Bob"),
+        GraphNode("Person", "Carol")]
+    assert not extractor.refresh()
+    # the snapshot of an older graph is not loaded
+    graph.names.append("Dave")
+    extractor = NLMExtractor(graph, snapshot=path, refresh_every=None)
+    assert len(extractor.linker) == 4
+    assert EntityLinker.load(path).version == 4
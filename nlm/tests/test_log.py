@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import logging
+import queue
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from utils.log import JsonFormatter, DuplicateFilter, BoundedQueueHandler
+from utils.log import BoundedQueueListener
+
+
+def make_record(msg, exc_info=None):
+    return logging.LogRecord("NLMLayer", logging.ERROR, __file__, 1,
+                             msg, None, exc_info)
+
+
+def test_json_formatter():
+    try:
+        raise ValueError("Neo4j is down")
+    except ValueError:
+        record = make_record("query failed", sys.exc_info())
+    dct = json.loads(JsonFormatter().format(record))
+    assert dct["level"] == "ERROR"
+    assert dct["message"] == "query failed"
+    assert "ValueError: Neo4j is down" in dct["exception"]
+
+
+def test_duplicate_filter():
+    dfilter = DuplicateFilter(interval=60)
+    assert dfilter.filter(make_record("Neo4j is down")) == True
+    assert dfilter.filter(make_record("Neo4j is down")) == False
+    assert dfilter.filter(make_record("Neo4j is down")) == False
+    assert dfilter.filter(make_record("another")) == True
+
+    dfilter.interval = 0
+    record = make_record("Neo4j is down")
+    assert dfilter.filter(record) == True
+    assert record.suppressed == 2
+
+
+def test_bounded_queue_handler():
+    handler = BoundedQueueHandler(queue.Queue(2))
+    for i in range(5):
+        handler.handle(make_record("error {}".format(i)))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert handler.stats() == {"dropped": 3}
+    # the next record queued carries them
+    handler.queue.get_nowait()
+    record = make_record("error 5")
+    handler.handle(record)
+    assert handler.queue.queue[-1].dropped == 3
+    assert json.loads(JsonFormatter().format(handler.queue.queue[-1])
+                      )["dropped"] == 3
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_bounded_queue_listener_reports_dropped():
+    handler = BoundedQueueHandler(queue.Queue(1))
+    target = ListHandler()
+    listener = BoundedQueueListener(handler, target)
+    for i in range(3):
+        handler.handle(make_record("error {}".format(i)))
+    listener.start()
+    listener.stop()
+    assert [r.getMessage() for r in target.records] == [
+        "error 0", "2 log records dropped, the log queue was full"]
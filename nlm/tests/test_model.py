@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+import time
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from schemes.extractor import Entity
+from models.model import ExtractModel
+from schemes.error import DeadlineError
+
+
+batches = []
+
+
+def build_predictor(weights):
+    label = bytes(weights).decode()
+
+    def predictor(texts):
+        batches.append(len(texts))
+        return [[Entity(label, w) for w in text.split()] for text in texts]
+    return predictor
+
+
+@pytest.fixture
+def make_model(tmp_path):
+    path = tmp_path / "weights.bin"
+    path.write_bytes(b"Person")
+    batches.clear()
+    return ExtractModel(str(path), build_predictor, max_wait=0.05)
+
+
+def test_load_lazily(make_model):
+    assert make_model.loaded == False
+    assert make_model("Alice") == [Entity("Person", "Alice")]
+    assert make_model.loaded == True
+
+
+def test_warm_up(make_model):
+    make_model.warm_up()
+    assert make_model.loaded == True
+    assert batches == [1]
+
+
+def test_micro_batch(make_model):
+    make_model.warm_up()
+    res = {}
+    barrier = threading.Barrier(8)
+
+    def call(i):
+        barrier.wait()
+        res[i] = make_model("Alice{}".format(i))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert res[3] == [Entity("Person", "Alice3")]
+    assert sum(batches[1:]) == 8
+    assert len(batches[1:]) < 8
+
+
+def test_predictor_failures(tmp_path):
+    path = tmp_path / "weights.bin"
+    path.write_bytes(b"weights")
+    failures = [KeyboardInterrupt(), "short"]
+
+    def predictor(texts):
+        failure = failures.pop(0) if failures else None
+        if isinstance(failure, BaseException):
+            raise failure
+        if failure == "short":
+            return []
+        return [[Entity("Person", text)] for text in texts]
+
+    model = ExtractModel(str(path), lambda weights: predictor, timeout=1)
+    with pytest.raises(KeyboardInterrupt):
+        model("Alice")
+    # every call of the batch is answered
+    with pytest.raises(ValueError):
+        model("Alice")
+    # the worker still runs
+    assert model("Alice") == [Entity("Person", "Alice")]
+
+
+def test_timeout(tmp_path):
+    path = tmp_path / "weights.bin"
+    path.write_bytes(b"weights")
+
+    def predictor(texts):
+        time.sleep(0.2)
+        return [[] for _ in texts]
+
+    model = ExtractModel(str(path), lambda weights: predictor, timeout=0.05)
+    with pytest.raises(DeadlineError):
+        model("Alice")
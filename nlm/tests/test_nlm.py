@@ -1,5 +1,6 @@
 import os
 import sys
+import threading
 import pytest
 
 ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -7,7 +8,7 @@ sys.path.append(ROOT_PATH)
 
 from py2neo.database import Graph
 from schemes.graph import GraphNode, GraphRelation
-from schemes.extractor import Entity, ExtractorInput
+from schemes.extractor import Entity, ExtractorInput, RawString
 from nlm import NLMLayer
 
 
@@ -40,8 +41,13 @@ def test_nlm_instance_call_graphrelation():
 
 
 def test_nlm_instance_call_str():
-    # mem()
-    pass
+    res = mem(RawString("AliceThree 和 AliceOne 是什么关系？"))
+    query = res[0]
+    assert isinstance(query, GraphRelation)
+    assert query.start.name == "AliceThree"
+    assert query.end.name == "AliceOne"
+
+    assert mem(RawString("not exist text")) == []
 
 
 def test_nlm_instance_call_extractorinput():
@@ -52,8 +58,58 @@ def test_nlm_instance_call_extractorinput():
     entity2 = Entity("Person", "AliceOne")
     entities = [entity1, entity2]
     ext_in1 = ExtractorInput(text, intent, entities)
-
-    ext_in2 = ExtractorInput(text)
+    res = mem(ext_in1)
+    assert isinstance(res[0], GraphRelation)
+    assert res[0].start.name == "AliceThree"
+    assert res[0].end.name == "AliceOne"
+    assert [gn.name for gn in res if isinstance(gn, GraphNode)] == [
+        "AliceThree", "AliceOne"]
+
+    ext_in2 = ExtractorInput(text, "LOVES", entities)
+    res = mem(ext_in2)
+    assert res[0].kind == "LOVES"
+
+    ext_in3 = ExtractorInput(text, intent, [Entity("Person", "AliceNotExist")])
+    assert mem(ext_in3) == []
+
+
+def test_nlm_extractorinput_limit(monkeypatch):
+    limits = []
+    query_nodes = mem.query_nodes
+
+    def spy(gns, **kwargs):
+        limits.append(kwargs.get("limit"))
+        return query_nodes(gns, **kwargs)
+    monkeypatch.setattr(mem, "query_nodes", spy)
+    ext_in = ExtractorInput("AliceThree 是谁？", "",
+                            [Entity("Person", "AliceThree")])
+    mem(ext_in, limit=3)
+    assert limits == [3]
+
+
+def test_nlm_extractorinput_add_inexistence():
+    ext_in = ExtractorInput("AliceAdded 是谁？", "",
+                            [Entity("Person", "AliceAdded")])
+    res = mem(ext_in, add_inexistence=True)
+    assert [(gn.label, gn.name) for gn in res] == [("Person", "AliceAdded")]
+    res = mem(ext_in, update_props=True)
+    assert [gn.name for gn in res] == ["AliceAdded"]
+    graph.run("MATCH (n:Person {name: 'AliceAdded'}) DELETE n")
+
+
+def test_nlm_concurrent_add_inexistence():
+    gn = GraphNode("Person", "AliceConcurrent", {"age": 30})
+    threads = [threading.Thread(target=mem, args=(gn,),
+                                kwargs={"add_inexistence": True})
+               for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cypher = "MATCH (n:Person {name: 'AliceConcurrent'}) RETURN count(n) AS num"
+    assert graph.run(cypher).evaluate() == 1
+    assert mem.write_lock_stats["acquired"] >= 16
+    graph.run("MATCH (n:Person {name: 'AliceConcurrent'}) DELETE n")
 
 
 def test_nlm_instance_call_otherinput():
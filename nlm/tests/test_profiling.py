@@ -0,0 +1,49 @@
+import os
+import sys
+import threading
+import time
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from utils.profiling import profile, profile_call
+from schemes.error import ProfilingError
+
+
+def busy_loop(stop):
+    data = []
+    while not stop.is_set():
+        data.append(bytearray(1024))
+        if len(data) > 100:
+            data = []
+
+
+def test_profile():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    try:
+        result = profile(0.2, top=5, interval=0.001)
+    finally:
+        stop.set()
+        worker.join()
+    assert result["samples"] > 0
+    assert "busy_loop" in result["collapsed"]
+    assert 0 < len(result["allocations"]) <= 5
+    assert result["allocations"][0]["size"] > 0
+
+
+def test_profile_one_at_a_time():
+    worker = threading.Thread(target=profile, args=(0.3,))
+    worker.start()
+    time.sleep(0.05)
+    with pytest.raises(ProfilingError):
+        profile(0.1)
+    worker.join()
+
+
+def test_profile_call():
+    result, stats = profile_call(sorted, [3, 1, 2])
+    assert result == [1, 2, 3]
+    assert "function calls" in stats
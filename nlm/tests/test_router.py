@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from graph.router import GraphRouter
+
+
+# the router only routes, any object could stand for a Graph
+writer, reader1, reader2 = "writer", "reader1", "reader2"
+
+
+def test_no_readers():
+    router = GraphRouter(writer)
+    assert router.reader() is writer
+
+
+def test_round_robin():
+    router = GraphRouter(writer, [reader1, reader2])
+    assert [router.reader() for _ in range(4)] == [
+        reader1, reader2, reader1, reader2]
+
+
+def test_least_latency():
+    router = GraphRouter(writer, [reader1, reader2], policy="least_latency")
+    router.observe(reader1, 0.5)
+    router.observe(reader2, 0.1)
+    assert router.reader() is reader2
+    for _ in range(10):
+        router.observe(reader2, 2)
+    assert router.reader() is reader1
+
+
+def test_least_latency_probe():
+    router = GraphRouter(writer, [reader1, reader2], policy="least_latency",
+                         probe_every=0.05)
+    for _ in range(10):
+        router.observe(reader1, 2)
+    router.observe(reader2, 0.1)
+    assert router.reader() is reader2
+    time.sleep(0.05)
+    # reader1 is not read for a while, then probed once
+    assert router.reader() is reader1
+    assert router.reader() is reader2
+
+
+def test_read_after_write():
+    router = GraphRouter(writer, [reader1, reader2], replica_lag=0.1)
+    router.wrote()
+    assert router.reader() is writer
+    assert router.reader(["Person"]) is writer
+    time.sleep(0.1)
+    assert router.reader() is reader1
+
+
+def test_read_after_write_scoped():
+    router = GraphRouter(writer, [reader1, reader2], replica_lag=0.1)
+    router.wrote(["Person"])
+    assert router.reader(["Person", "City"]) is writer
+    assert router.reader() is writer
+    assert router.reader(["City"]) is reader1
+    time.sleep(0.1)
+    assert router.reader(["Person"]) is reader2
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        GraphRouter(writer, policy="random")
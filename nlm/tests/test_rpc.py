@@ -238,8 +238,18 @@ def test_recall_nlu_not_exist(grpc_stub):
     assert response.gn.props == ""
 
 
-
-
-
-
-
+def test_recall_cypher(grpc_stub):
+    request = nlm_pb2.CypherInput(
+        cypher="MATCH (a:Person) RETURN a.name, a.age", limit=2)
+    rows = [json.loads(row.data) for row in grpc_stub.CypherRecall(request)]
+    assert len(rows) == 2
+    assert "a.name" in rows[0]
+
+
+def test_recall_cypher_overstep(grpc_stub):
+    request = nlm_pb2.CypherInput(cypher="CREATE (n:Person {name: 'Andy'})")
+    try:
+        list(grpc_stub.CypherRecall(request))
+        assert False
+    except grpc.RpcError as e:
+        assert e.code() == grpc.StatusCode.INVALID_ARGUMENT
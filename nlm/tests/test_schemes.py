@@ -0,0 +1,26 @@
+import os
+import sys
+import json
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from schemes.graph import LazyProps
+
+
+def test_lazy_props():
+    loaded = []
+
+    def loader():
+        loaded.append(1)
+        return {"age": 20, "bio": "long text"}
+
+    props = LazyProps({"age": 20}, loader=loader)
+    assert json.dumps(props) == '{"age": 20}'
+    assert props["age"] == 20 and not loaded
+    assert "bio" in props and "sex" not in props
+    assert props["bio"] == "long text"
+    assert props.get("sex", "unknown") == "unknown"
+    assert props.load() == {"age": 20, "bio": "long text"}
+    assert len(loaded) == 1
+    assert dict(props) == {"age": 20}
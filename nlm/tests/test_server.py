@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+import nlm_pb2
+from server import parse_args, NLMService
+from utils.utils import recall_options, run_in_lane
+from utils.concurrency import Lane
+from graph.changes import ChangeLog
+from grpc import StatusCode
+
+
+def test_parse_args():
+    args = parse_args([])
+    assert (args.fuzzy_node, args.add_inexistence, args.update_props) == (
+        False, False, False)
+    args = parse_args(["-fn", "-ai", "false", "-up", "True"])
+    assert (args.fuzzy_node, args.add_inexistence, args.update_props) == (
+        True, False, True)
+    with pytest.raises(SystemExit):
+        parse_args(["-ai", "maybe"])
+
+
+def test_recall_options():
+    request = nlm_pb2.GraphNode(label="Person", name="Alice")
+    assert recall_options(request) == {}
+    request = nlm_pb2.GraphNode(
+        label="Person", name="Alice",
+        options=nlm_pb2.RecallOptions(add_inexistence=False, topn=3))
+    # set to the default value, still given
+    assert recall_options(request) == {"add_inexistence": False, "topn": 3}
+    request = nlm_pb2.RawString(
+        text="Alice", options=nlm_pb2.RecallOptions(fuzzy_node=True))
+    assert recall_options(request) == {"fuzzy_node": True}
+    request = nlm_pb2.GraphNode(
+        label="Person", name="Alice",
+        options=nlm_pb2.RecallOptions(projection=["none"]))
+    assert recall_options(request) == {"projection": []}
+    request.options.projection[:] = ["age"]
+    assert recall_options(request) == {"projection": ["age"]}
+
+
+class LaneService:
+
+    def __init__(self):
+        self.write_lane = Lane("write", workers=1, max_queue=1)
+
+    def lane(self, request):
+        return self.write_lane
+
+    @run_in_lane()
+    def Recall(self, request, context):
+        return request
+
+
+def test_run_in_lane_queued_without_deadline():
+    service = LaneService()
+    # grpc gives this when the client sets no deadline
+    context = SimpleNamespace(time_remaining=lambda: 9.2e18)
+    res = []
+    with service.write_lane.slot():
+        thread = threading.Thread(
+            target=lambda: res.append(service.Recall("queued", context)))
+        thread.start()
+        time.sleep(0.05)
+        assert service.write_lane.stats()["queued"] == 1
+    thread.join(1)
+    assert res == ["queued"]
+
+
+class StreamContext:
+
+    def __init__(self):
+        self.active = True
+        self.code = None
+
+    def is_active(self):
+        return self.active
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        pass
+
+
+def test_changes_follow_streams_capped():
+    changes = ChangeLog()
+    changes.publish("add_node", ["Person", "Alice"])
+    mem = SimpleNamespace(changes=changes,
+                          changes_since=changes.changes_since)
+    service = NLMService(mem, follow_lane=Lane("follow", 1, 0))
+    request = nlm_pb2.ChangesInput(since=0, follow=True)
+    first = service.Changes(request, StreamContext())
+    assert next(first).seq == 1
+    context = StreamContext()
+    assert list(service.Changes(request, context)) == []
+    assert context.code == StatusCode.RESOURCE_EXHAUSTED
+    # not follow, not limited
+    assert len(list(service.Changes(nlm_pb2.ChangesInput(since=0),
+                                    StreamContext()))) == 1
+    first.close()
+    assert service.follow_lane.stats()["active"] == 0
@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from graph.slowlog import SlowQueryLog, flatten_plan
+
+
+def test_slow_query_log(tmp_path):
+    path = str(tmp_path / "log" / "slow_query.log")
+    slow_log = SlowQueryLog(threshold=0.5, path=path)
+    assert slow_log.is_slow(0.1) == False
+    assert slow_log.is_slow(0.5) == True
+    slow_log.record("MATCH (n) RETURN n", {"name": "Alice"}, 0.6, 3, "test")
+    slow_log.record("MATCH (n) RETURN n.name", None, 2.0)
+
+    entries = slow_log.entries()
+    assert [e["seconds"] for e in entries] == [2.0, 0.6]
+    assert len(slow_log.entries(min_seconds=1)) == 1
+    assert json.loads(entries[1]["parameters"]) == {"name": "Alice"}
+
+    # written by the listener, flushed by close
+    slow_log.close()
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]["origin"] == "test"
+    assert lines[0]["rows"] == 3
+
+
+def test_slow_query_log_queue_full(tmp_path):
+    path = str(tmp_path / "log" / "slow_query.log")
+    slow_log = SlowQueryLog(threshold=0.5, path=path, queue_size=1)
+    # the listener is not writing, the queue is full after one
+    slow_log._listener.stop()
+    for i in range(3):
+        slow_log.record("MATCH (n) RETURN n", None, 1.0 + i)
+    # never waits, the entries are kept in memory anyway
+    assert len(slow_log.entries()) == 3
+    assert slow_log._queued.stats() == {"dropped": 2}
+
+
+def test_slow_query_log_disabled():
+    assert SlowQueryLog().is_slow(100) == False
+    assert SlowQueryLog().should_profile() == False
+
+
+def test_flatten_plan():
+    plan = {"operatorType": "ProduceResults", "dbHits": 0, "rows": 1,
+            "children": [{"operatorType": "NodeByLabelScan",
+                          "dbHits": 101, "rows": 100}]}
+    ops = flatten_plan(plan)
+    assert [op["operator"] for op in ops] == ["ProduceResults",
+                                              "NodeByLabelScan"]
+    assert ops[1]["db_hits"] == 101
+    assert flatten_plan(None) == []
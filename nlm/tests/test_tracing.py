@@ -0,0 +1,75 @@
+import os
+import sys
+from concurrent import futures
+import grpc
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_PATH)
+
+from utils.tracing import Tracer, InMemoryExporter, tracer, extract
+from server import TracingInterceptor
+
+
+def test_tracer_nested_spans():
+    exporter = InMemoryExporter()
+    trc = Tracer(exporter)
+    with trc.span("parent") as parent:
+        with trc.span("child", statement="MATCH (n) RETURN n") as child:
+            child.set(rows=3)
+    assert [s.name for s in exporter.spans] == ["child", "parent"]
+    assert child.trace_id == parent.trace_id
+    assert child.parent_id == parent.span_id
+    assert child.attributes == {"statement": "MATCH (n) RETURN n", "rows": 3}
+    assert trc.current() is None
+
+
+def test_tracer_remote_parent_and_error():
+    exporter = InMemoryExporter()
+    trc = Tracer(exporter)
+    with trc.span("client") as client:
+        metadata = trc.metadata()
+    with pytest.raises(ValueError):
+        with trc.span("server", dict(metadata)["traceparent"]):
+            raise ValueError
+    server = exporter.spans[-1]
+    assert server.trace_id == client.trace_id
+    assert server.parent_id == client.span_id
+    assert server.status == "error"
+
+
+def test_tracer_disabled():
+    trc = Tracer()
+    with trc.span("noop") as span:
+        span.set(rows=1)
+    assert trc.metadata() == []
+    assert extract("invalid") is None
+
+
+def test_tracing_interceptor():
+    exporter = InMemoryExporter()
+    tracer.exporter = exporter
+
+    def echo(request, context):
+        return request
+
+    handler = grpc.method_handlers_generic_handler("test", {
+        "Echo": grpc.unary_unary_rpc_method_handler(
+            echo, lambda x: x, lambda x: x)})
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2),
+                         interceptors=[TracingInterceptor()])
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    try:
+        channel = grpc.insecure_channel("localhost:{}".format(port))
+        call = channel.unary_unary("/test/Echo")
+        with tracer.span("client") as client:
+            assert call(b"ping", metadata=tracer.metadata()) == b"ping"
+        channel.close()
+    finally:
+        server.stop(None)
+        tracer.exporter = None
+    served = [s for s in exporter.spans if s.name == "/test/Echo"][0]
+    assert served.trace_id == client.trace_id
+    assert served.parent_id == client.span_id
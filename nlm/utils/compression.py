@@ -0,0 +1,128 @@
+"""
+Compression
+====================================
+Store the long text props compressed: zlib, then base64 behind a marker,
+so they are still strings in Neo4j. And the compression of gRPC messages.
+"""
+
+import base64
+import zlib
+
+
+MARKER = "nlm:zlib:"
+# the user values starting with a marker are stored behind it, escaped
+ESCAPE = "nlm:raw:"
+# the indexed (and matched) props, never compressed
+UNCOMPRESSED = frozenset({"name"})
+
+
+def compress_value(value, threshold: int = None, level: int = 6):
+    """
+    The stored value of a user value: compressed if it is a str of at least
+    `threshold` bytes (utf8) and the compressed one is shorter,
+    escaped if it starts with a marker, or the value as it is.
+    """
+    if not isinstance(value, str):
+        return value
+    if value.startswith((MARKER, ESCAPE)):
+        return ESCAPE + value
+    data = value.encode("utf8")
+    if threshold is None or len(data) < threshold:
+        return value
+    compressed = MARKER + base64.b64encode(
+        zlib.compress(data, level)).decode("ascii")
+    return compressed if len(compressed) < len(data) else value
+
+
+def decompress_value(value):
+    """
+    The user value of a stored one. A marked value which could not be
+    decompressed (stored before escaping) is returned as it is.
+    """
+    if not isinstance(value, str):
+        return value
+    if value.startswith(ESCAPE):
+        return value[len(ESCAPE):]
+    if not value.startswith(MARKER):
+        return value
+    try:
+        data = base64.b64decode(value[len(MARKER):], validate=True)
+        return zlib.decompress(data).decode("utf8")
+    except (ValueError, zlib.error):
+        return value
+
+
+def is_compressed(value) -> bool:
+    return isinstance(value, str) and value.startswith(MARKER)
+
+
+def _is_stored(value) -> bool:
+    """compressed or escaped"""
+    return isinstance(value, str) and value.startswith((MARKER, ESCAPE))
+
+
+def grpc_compression(name: str = None):
+    """
+    The gRPC compression (of the messages) of "gzip", "deflate",
+    or None (no compression).
+    """
+    import grpc
+    compressions = {None: grpc.Compression.NoCompression,
+                    "": grpc.Compression.NoCompression,
+                    "gzip": grpc.Compression.Gzip,
+                    "deflate": grpc.Compression.Deflate}
+    if name not in compressions:
+        raise ValueError("unknown compression: {}".format(name))
+    return compressions[name]
+
+
+def compress_props(props: dict, threshold: int = None) -> dict:
+    """
+    The stored props of the user props, the long text values compressed
+    (None is disabled) and those starting with a marker escaped.
+    """
+    if not props:
+        return props
+    return {k: v if k in UNCOMPRESSED else compress_value(v, threshold)
+            for k, v in props.items()}
+
+
+def compress_stored_props(props: dict, threshold: int) -> dict:
+    """
+    The stored props with the long text values compressed,
+    the compressed or escaped ones are kept.
+    """
+    return {k: v if k in UNCOMPRESSED or _is_stored(v)
+            else compress_value(v, threshold)
+            for k, v in props.items()}
+
+
+def decompress_props(props: dict) -> dict:
+    """
+    The user props of the stored props,
+    the same dict if none is compressed or escaped.
+    """
+    if not any(_is_stored(v) for k, v in props.items()
+               if k not in UNCOMPRESSED):
+        return props
+    return {k: v if k in UNCOMPRESSED else decompress_value(v)
+            for k, v in props.items()}
+
+
+def decompress_data(value):
+    """
+    The user data of the stored data (e.g. a row of Cypher), recursively.
+    Nodes and Relationships (dicts of props) are decompressed in place.
+    """
+    if isinstance(value, str):
+        return decompress_value(value)
+    if isinstance(value, list):
+        return [decompress_data(v) for v in value]
+    if type(value) is dict:
+        return {k: v if k in UNCOMPRESSED else decompress_data(v)
+                for k, v in value.items()}
+    if isinstance(value, dict):
+        props = decompress_props(value)
+        if props is not value:
+            value.update(props)
+    return value
@@ -0,0 +1,278 @@
+from concurrent.futures import (CancelledError, Future, ThreadPoolExecutor,
+                                TimeoutError)
+from contextlib import contextmanager
+from dataclasses import dataclass
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Hashable
+
+from schemes.error import DeadlineError, OverloadError
+from configs.config import logger
+
+
+@dataclass
+class SingleFlight:
+
+    """
+    Concurrent calls with the same key share one execution and its result.
+
+    The errors of the call are shared as well, but not the DeadlineError
+    or the cancellation of the leader: they are of its caller only,
+    the waiting callers run it again (one of them leads) within their
+    own timeout.
+    """
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, func: Callable, timeout: float = None):
+        """
+        Call func, or wait for the result of the running call with the key.
+
+        Parameters
+        ------------
+        timeout: max seconds to wait for the running call.
+            If exceeded, concurrent.futures.TimeoutError is raised.
+        """
+        expire = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = Future()
+                    self._calls[key] = call
+            if leader:
+                break
+            remaining = (None if expire is None
+                         else max(expire - time.monotonic(), 0))
+            try:
+                return call.result(remaining)
+            except Exception as e:
+                if not isinstance(e, (DeadlineError, CancelledError)):
+                    raise
+            except BaseException:
+                pass
+            # of the leader only, run again if this caller has time left
+            if expire is not None and time.monotonic() >= expire:
+                raise TimeoutError
+        try:
+            result = func()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+@dataclass
+class StripedLock:
+
+    """
+    A fixed number of locks, the same key always gets the same lock.
+    Keys are serialized without a global lock.
+
+    The contention is counted: how many acquisitions had to wait,
+    and how long they waited in total.
+    """
+
+    stripes: int = 64
+
+    def __post_init__(self):
+        self._locks = [threading.Lock() for _ in range(self.stripes)]
+        self._stats_lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+
+    @contextmanager
+    def hold(self, *keys: Hashable):
+        """
+        Hold the locks of all the keys.
+        Locks are always acquired in the same order, so no deadlock.
+        """
+        indexes = sorted({hash(key) % self.stripes for key in keys})
+        locks = [self._locks[i] for i in indexes]
+        for lock in locks:
+            self._acquire(lock)
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _acquire(self, lock: threading.Lock):
+        waited = None
+        if not lock.acquire(blocking=False):
+            start = time.monotonic()
+            lock.acquire()
+            waited = time.monotonic() - start
+        with self._stats_lock:
+            self.acquired += 1
+            if waited is not None:
+                self.contended += 1
+                self.wait_seconds += waited
+
+    def stats(self) -> dict:
+        """the contention metric"""
+        with self._stats_lock:
+            return {"acquired": self.acquired,
+                    "contended": self.contended,
+                    "wait_seconds": self.wait_seconds}
+
+
+@dataclass
+class Lane:
+
+    """
+    At most `workers` calls run in the lane at a time,
+    at most `max_queue` calls wait for a worker, more are rejected
+    with OverloadError, so a burst in one lane never blocks another one.
+    """
+
+    name: str
+    workers: int
+    max_queue: int
+
+    def __post_init__(self):
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @contextmanager
+    def slot(self, timeout: float = None):
+        """
+        Run the context in a worker of the lane, wait at most `timeout`
+        seconds for it, or a DeadlineError is raised.
+        """
+        waited = 0.0
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.queued >= self.max_queue:
+                    self.rejected += 1
+                    raise OverloadError
+                self.queued += 1
+            start = time.monotonic()
+            acquired = self._slots.acquire(
+                timeout=None if timeout is None
+                else min(timeout, threading.TIMEOUT_MAX))
+            waited = time.monotonic() - start
+            with self._lock:
+                self.queued -= 1
+            if not acquired:
+                raise DeadlineError
+        with self._lock:
+            self.active += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """the load metric"""
+        with self._lock:
+            return {"name": self.name,
+                    "workers": self.workers,
+                    "max_queue": self.max_queue,
+                    "active": self.active,
+                    "queued": self.queued,
+                    "completed": self.completed,
+                    "rejected": self.rejected,
+                    "wait_seconds": self.wait_seconds,
+                    "max_wait_seconds": self.max_wait_seconds}
+
+
+@dataclass
+class Scheduled:
+
+    """A call of the Scheduler, not called if cancelled before its time."""
+
+    when: float
+    func: Callable
+    args: tuple
+    cancelled: bool = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+@dataclass
+class Scheduler:
+
+    """
+    Call functions after delays, all timed by one thread (started lazily)
+    instead of a timer thread each. The due calls run in a small pool,
+    so a slow one never delays the others.
+    """
+
+    name: str = "scheduler"
+    workers: int = 2
+
+    def __post_init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._order = itertools.count()
+        self._thread = None
+        self._executor = None
+
+    def call_later(self, delay: float, func: Callable, *args) -> Scheduled:
+        scheduled = Scheduled(time.monotonic() + delay, func, args)
+        with self._cond:
+            heapq.heappush(self._heap,
+                           (scheduled.when, next(self._order), scheduled))
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix=self.name)
+                self._thread = threading.Thread(
+                    target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return scheduled
+
+    def pending(self) -> int:
+        """the calls not due yet, cancelled ones included"""
+        with self._cond:
+            return len(self._heap)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        scheduled = heapq.heappop(self._heap)[2]
+                        break
+                    self._cond.wait(wait)
+            self._executor.submit(self._call, scheduled)
+
+    @staticmethod
+    def _call(scheduled: Scheduled):
+        if scheduled.cancelled:
+            return
+        try:
+            scheduled.func(*scheduled.args)
+        except Exception as e:
+            logger.warning("scheduled call %s failed: %s",
+                           scheduled.func.__name__, e)
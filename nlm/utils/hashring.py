@@ -0,0 +1,65 @@
+"""
+HashRing
+====================================
+Consistent hashing with bounded loads.
+"""
+
+from bisect import bisect
+import hashlib
+import math
+from typing import Callable, Hashable, List
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+
+    """
+    Each key goes to the next node clockwise on the ring,
+    the same key always to the same node, and adding or removing a node
+    only moves the keys of its neighbours.
+
+    With bounded loads, a node already having more than `balance` times
+    the average load is skipped, the key goes to the next one.
+
+    Parameters
+    -----------
+    nodes: the nodes, any hashable with a stable str.
+    replicas: virtual points of each node on the ring.
+    balance: the max load of a node relative to the average, >= 1.
+    """
+
+    def __init__(self, nodes: List[Hashable], replicas: int = 100,
+                 balance: float = 1.25):
+        if balance < 1:
+            raise ValueError("balance should be >= 1")
+        self.nodes = list(nodes)
+        self.balance = balance
+        points = sorted((_hash("{}#{}".format(node, i)), j)
+                        for j, node in enumerate(self.nodes)
+                        for i in range(replicas))
+        self._hashes = [h for (h, _) in points]
+        self._owners = [j for (_, j) in points]
+
+    def lookup(self, key: str, load: Callable = None) -> Hashable:
+        """
+        The node of the key.
+
+        Parameters
+        ------------
+        load: the current load of a node, if given, the load is bounded.
+        """
+        start = bisect(self._hashes, _hash(key)) % len(self._hashes)
+        if load is None:
+            return self.nodes[self._owners[start]]
+        loads = [load(node) for node in self.nodes]
+        # the load including the new one
+        cap = math.ceil(self.balance * (sum(loads) + 1) / len(self.nodes))
+        for i in range(len(self._hashes)):
+            j = self._owners[(start + i) % len(self._hashes)]
+            if loads[j] < cap:
+                return self.nodes[j]
+        return self.nodes[self._owners[start]]
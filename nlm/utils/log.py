@@ -0,0 +1,126 @@
+import copy
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import threading
+import time
+
+
+class JsonFormatter(logging.Formatter):
+
+    """
+    One JSON object per record.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        dct = {
+            "time": self.formatTime(record),
+            "name": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            dct["exception"] = self.formatException(record.exc_info)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            dct["suppressed"] = suppressed
+        dropped = getattr(record, "dropped", 0)
+        if dropped:
+            dct["dropped"] = dropped
+        return json.dumps(dct, ensure_ascii=False, default=str)
+
+
+class DuplicateFilter(logging.Filter):
+
+    """
+    The same record (level, message and exception type) passes at most
+    once per `interval` seconds, the next one passing carries how many
+    were suppressed.
+    """
+
+    def __init__(self, interval: float = 10.0, max_keys: int = 1000):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> [last passed time, suppressed]
+        self._seen = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        exc_type = record.exc_info[0] if record.exc_info else None
+        key = (record.levelno, str(record.msg), exc_type)
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen and now - seen[0] < self.interval:
+                seen[1] += 1
+                return False
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            record.suppressed = seen[1] if seen else 0
+            self._seen[key] = [now, 0]
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+
+    """
+    Never blocks: records are dropped (and counted) when the queue is full,
+    and the formatting (e.g. the traceback) is left to the listener thread.
+    The next record queued carries how many were dropped before it.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self._count_lock = threading.Lock()
+        self.dropped = 0
+        # dropped, not carried by a queued record yet
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+    def enqueue(self, record: logging.LogRecord):
+        with self._count_lock:
+            unreported = self._unreported
+        record.dropped = unreported
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._count_lock:
+                self.dropped += 1
+                self._unreported += 1
+        else:
+            if unreported:
+                with self._count_lock:
+                    self._unreported -= unreported
+
+    def stats(self) -> dict:
+        with self._count_lock:
+            return {"dropped": self.dropped}
+
+
+class BoundedQueueListener(QueueListener):
+
+    """
+    The QueueListener of a BoundedQueueHandler,
+    when stopped, a warning of the records dropped is logged (if any).
+    """
+
+    def __init__(self, handler: BoundedQueueHandler, *handlers,
+                 respect_handler_level: bool = False):
+        super().__init__(handler.queue, *handlers,
+                         respect_handler_level=respect_handler_level)
+        self.bounded = handler
+
+    def stop(self):
+        super().stop()
+        dropped = self.bounded.stats()["dropped"]
+        if dropped:
+            record = logging.LogRecord(
+                "NLMLayer", logging.WARNING, __file__, 0,
+                "%d log records dropped, the log queue was full",
+                (dropped,), None)
+            record.dropped = dropped
+            self.handle(record)
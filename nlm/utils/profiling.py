@@ -0,0 +1,145 @@
+"""
+Profiling
+====================================
+Profile the running server: a sampler of all the thread stacks,
+the top allocation sites, and cProfile of one request.
+"""
+
+from collections import Counter
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import List
+
+from schemes.error import ProfilingError
+
+
+_lock = threading.Lock()
+# only one cProfile can be enabled at a time
+_call_lock = threading.Lock()
+
+
+class StackSampler:
+
+    """
+    Sample the stacks of all the other threads every `interval` seconds.
+    The samples are counted as collapsed stacks, root first, e.g.
+    `server.py:NodeRecall;nlm.py:__call__;graph.py:run 12`,
+    the input of flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                self.stacks[_collapse(frame)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "\n".join("{} {}".format(stack, n)
+                         for stack, n in self.stacks.most_common())
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append("{}:{}".format(
+            os.path.basename(code.co_filename), code.co_name))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, top: int = 30) -> List[dict]:
+    """
+    The allocation sites of the most memory.
+    """
+    ret = []
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        ret.append({"site": "{}:{}".format(frame.filename, frame.lineno),
+                    "size": stat.size,
+                    "count": stat.count})
+    return ret
+
+
+def profile(seconds: float, top: int = 30,
+            interval: float = 0.005) -> dict:
+    """
+    Sample the stacks for `seconds`, and trace the allocations meanwhile
+    (if tracemalloc is not started yet, only the new ones).
+    One profile at a time, or ProfilingError is raised.
+
+    Returns
+    --------
+    out: {"collapsed": collapsed stacks, "samples": samples,
+          "allocations": top allocation sites}
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilingError
+    try:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        sampler = StackSampler(interval)
+        sampler.start()
+        try:
+            time.sleep(seconds)
+        finally:
+            sampler.stop()
+            snapshot = tracemalloc.take_snapshot()
+            if not tracing:
+                tracemalloc.stop()
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)])
+        return {"collapsed": sampler.collapsed(),
+                "samples": sampler.samples,
+                "allocations": top_allocations(snapshot, top)}
+    finally:
+        _lock.release()
+
+
+def profile_call(func, *args, top: int = 30, **kwargs) -> tuple:
+    """
+    Call func with cProfile.
+
+    Returns
+    --------
+    out: (the result, the top functions by cumulative time as text),
+        the text is empty if another call is being profiled.
+    """
+    if not _call_lock.acquire(blocking=False):
+        return func(*args, **kwargs), ""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        _call_lock.release()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(
+        "cumulative").print_stats(top)
+    return result, out.getvalue()
@@ -0,0 +1,170 @@
+"""
+Tracing
+====================================
+Spans across the client, the RPC and the Cypher statements,
+the context is propagated as the W3C `traceparent` metadata.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import json
+import os
+import re
+import threading
+import time
+from typing import List, Optional, Tuple
+
+
+PATTERN_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+
+@dataclass
+class Span:
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str = None
+    start: float = field(default_factory=time.time)
+    end: float = None
+    attributes: dict = field(default_factory=dict)
+    status: str = "ok"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> float:
+        return None if self.end is None else self.end - self.start
+
+    @property
+    def traceparent(self) -> str:
+        return "00-{}-{}-01".format(self.trace_id, self.span_id)
+
+    def to_dict(self) -> dict:
+        return {"name": self.name,
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent_id,
+                "start": self.start,
+                "duration": self.duration,
+                "attributes": self.attributes,
+                "status": self.status}
+
+
+class _NoopSpan:
+
+    """The span when tracing is disabled."""
+
+    def set(self, **attributes):
+        pass
+
+
+class InMemoryExporter:
+
+    """Keep the finished spans, for tests."""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+
+
+class FileExporter:
+
+    """Append the finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+class Tracer:
+
+    """
+    The spans started by a thread (or an asyncio task) are nested by
+    a context variable, the current span.
+    Tracing is disabled (spans are no-ops) when there is no exporter.
+    """
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+        self._current = ContextVar("nlm_span", default=None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def current(self) -> Optional[Span]:
+        return self._current.get()
+
+    @contextmanager
+    def span(self, name: str, traceparent: str = None, **attributes):
+        """
+        Start a span, the child of `traceparent` if given (from a remote
+        parent), or of the current span of the thread (or task).
+        """
+        if not self.enabled:
+            yield _NoopSpan()
+            return
+        parent = extract(traceparent)
+        if parent is None:
+            current = self.current()
+            if current is not None:
+                parent = (current.trace_id, current.span_id)
+        trace_id = parent[0] if parent else os.urandom(16).hex()
+        span = Span(name, trace_id, os.urandom(8).hex(),
+                    parent[1] if parent else None, attributes=attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.status = "error"
+            span.set(error=repr(e))
+            raise
+        finally:
+            span.end = time.time()
+            self._current.reset(token)
+            exporter = self.exporter
+            if exporter is not None:
+                exporter.export(span)
+
+    def metadata(self) -> List[Tuple[str, str]]:
+        """
+        The gRPC metadata carrying the current span, if any.
+        """
+        current = self.current()
+        return [("traceparent", current.traceparent)] if current else []
+
+
+def extract(traceparent: str) -> Optional[Tuple[str, str]]:
+    """
+    The (trace_id, parent span_id) of a traceparent, None if invalid.
+    """
+    if not traceparent:
+        return None
+    matched = PATTERN_TRACEPARENT.match(traceparent)
+    return matched.groups() if matched else None
+
+
+def statement_shape(cypher: str, max_chars: int = 200) -> str:
+    """The statement with its spaces normalized, truncated."""
+    return " ".join(cypher.split())[:max_chars]
+
+
+tracer = Tracer()
@@ -1,11 +1,13 @@
 from dataclasses import asdict
 from functools import wraps
 import json
-from protobuf_to_dict import protobuf_to_dict
-from dacite import from_dict
+import threading
 
-from schemes.graph import GraphNode, GraphRelation
+from schemes.graph import GraphNode, GraphRelation, LazyProps
+from schemes.error import Error
 from configs.config import logger
+from utils.tracing import tracer
+from utils.compression import decompress_props
 
 
 def raise_customized_error(capture, target):
@@ -14,6 +16,9 @@ def raise_customized_error(capture, target):
         def wapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
+            except Error:
+                # already customized, e.g. DeadlineError
+                raise
             except capture:
                 raise target
         return wapper
@@ -36,6 +41,108 @@ def raise_grpc_error(capture, grpc_status_code):
     return _raise_grpc_error
 
 
+def recall_options(request) -> dict:
+    """
+    The options set in the request (RecallOptions), as kwargs of NLMLayer.
+    """
+    if not request.HasField("options"):
+        return {}
+    options = {field.name: value
+               for field, value in request.options.ListFields()}
+    if "projection" in options:
+        # an empty repeated field is unset, ["none"] projects no props
+        projection = list(options["projection"])
+        options["projection"] = [] if projection == ["none"] else projection
+    return options
+
+
+def time_remaining(context) -> float:
+    """
+    The seconds left of the RPC, None if it has no deadline
+    (grpc gives a huge number then, too large to wait for).
+    """
+    remaining = context.time_remaining()
+    if remaining is None or remaining >= threading.TIMEOUT_MAX:
+        return None
+    return remaining
+
+
+def run_in_lane():
+    """
+    Run the RPC in the lane (read or write) the servicer classifies
+    the request to by `lane(request)`, within the RPC deadline.
+    """
+    def _run_in_lane(func):
+        @wraps(func)
+        def wrapper(self, request, context):
+            lane = self.lane(request)
+            with lane.slot(time_remaining(context)):
+                return func(self, request, context)
+        return wrapper
+    return _run_in_lane
+
+
+def revalidate():
+    """
+    Set the version (by the ChangeLog, `version_of`) of the response, and
+    answer only not_modified, without the recall, if the request has the
+    same version and may not write.
+    The servicer should have the NLMLayer as `mem`, the response is of
+    the type of the request.
+    Only the writes of this process change the version, the clients
+    bound how long they trust not_modified (NLMClient cache_max_age).
+    """
+    def _revalidate(func):
+        @wraps(func)
+        def wrapper(self, request, context):
+            # before the recall, a write meanwhile gives a newer one
+            version = self.mem.changes.version_of(request)
+            if (request.version == version and
+                    not self.mem.may_write(**recall_options(request))):
+                return type(request)(version=version, not_modified=True)
+            response = func(self, request, context)
+            response.version = version
+            return response
+        return wrapper
+    return _revalidate
+
+
+def propagate_deadline():
+    """
+    Run the RPC within its deadline, and cancel the running statement
+    when the RPC is cancelled.
+    The servicer should have the NLMLayer as `mem`.
+    """
+    def _propagate_deadline(func):
+        @wraps(func)
+        def wrapper(self, request, context, **kwargs):
+            with self.mem.deadline(time_remaining(context)) as deadline:
+                context.add_callback(deadline.cancel)
+                return func(self, request, context, **kwargs)
+        return wrapper
+    return _propagate_deadline
+
+
+def profile_request(key: str = "nlm-profile"):
+    """
+    Profile the RPC with cProfile if the request metadata has `key`,
+    the stats are sent back as the trailing metadata `key`-bin.
+    """
+    def _profile_request(func):
+        @wraps(func)
+        def wrapper(self, request, context):
+            metadata = dict(context.invocation_metadata() or ())
+            if not metadata.get(key):
+                return func(self, request, context)
+            from utils.profiling import profile_call
+            result, stats = profile_call(func, self, request, context)
+            if stats:
+                context.set_trailing_metadata(((key + "-bin", stats.encode()),))
+            return result
+        return wrapper
+    return _profile_request
+
+
 def deco_log_error(logger):
     def _deco_log_error(func):
         @wraps(func)
@@ -53,8 +160,11 @@ def deco_log_error(logger):
 
 def convert_node_to_graphnode(node):
     label = str(node.labels)[1:]
-    dct = dict(node)
+    dct = decompress_props(dict(node))
     name = dct.pop("name")
+    if getattr(node, "projected", False):
+        dct = LazyProps(dct, loader=lambda: _load_props(
+            node.source.nodes, node.identity, exclude="name"))
     gn = GraphNode(label, name, dct)
     return gn
 
@@ -63,11 +173,22 @@ def convert_relation_to_graph_relation(relation):
     start = convert_node_to_graphnode(relation.start_node)
     end = convert_node_to_graphnode(relation.end_node)
     kind = list(relation.types())[0]
-    props = dict(relation)
+    props = decompress_props(dict(relation))
+    if getattr(relation, "projected", False):
+        props = LazyProps(props, loader=lambda: _load_props(
+            relation.source.relationships, relation.identity))
     gr = GraphRelation(start, end, kind, props)
     return gr
 
 
+def _load_props(matcher, identity: int, exclude: str = None) -> dict:
+    """all the props of a node or relationship (by the matcher) of the id"""
+    entity = matcher.get(identity)
+    props = decompress_props(dict(entity)) if entity is not None else {}
+    props.pop(exclude, None)
+    return props
+
+
 def convert_query_to_scheme():
     def _convert_query_to_scheme(func):
         @wraps(func)
@@ -94,22 +215,30 @@ def convert_request_to(target):
     - GraphRelation
     - RawString
     - ExtractorInput
+
+    The recall options of the request are passed as kwargs.
     """
     def _convert_request_to(func):
         @wraps(func)
         def wrapper(self, request, context):
-            dctreq = protobuf_to_dict(request)
-            if "props" in dctreq:
-                req_props = dctreq["props"]
-                dctreq["props"] = json.loads(req_props)
-            if "start" in dctreq:
-                start_props = dctreq["start"]["props"]
-                dctreq["start"]["props"] = json.loads(start_props)
-            if "end" in dctreq:
-                end_props = dctreq["end"]["props"]
-                dctreq["end"]["props"] = json.loads(end_props)
-            request = from_dict(target, dctreq)
-            result = func(self, request, context)
+            # only RPC needs them, import when used.
+            from protobuf_to_dict import protobuf_to_dict
+            from dacite import from_dict
+            with tracer.span("convert_request_to", target=target.__name__):
+                dctreq = protobuf_to_dict(request)
+                if "props" in dctreq:
+                    req_props = dctreq["props"]
+                    dctreq["props"] = json.loads(req_props)
+                if "start" in dctreq:
+                    start_props = dctreq["start"]["props"]
+                    dctreq["start"]["props"] = json.loads(start_props)
+                if "end" in dctreq:
+                    end_props = dctreq["end"]["props"]
+                    dctreq["end"]["props"] = json.loads(end_props)
+                options = recall_options(request)
+                dctreq.pop("options", None)
+                request = from_dict(target, dctreq)
+            result = func(self, request, context, **options)
             return result
         return wrapper
     return _convert_request_to
@@ -119,13 +248,15 @@ def convert_graphobj_to_dict(graphobj):
     """
     A graphobj is a GraphNode or GraphRelation
     """
-    dct = asdict(graphobj)
-    if "props" in dct:
-        dct["props"] = json.dumps(dct["props"])
-    if "start" in dct:
-        start_props = dct["start"]["props"]
-        dct["start"]["props"] = json.dumps(start_props)
-    if "end" in dct:
-        end_props = dct["end"]["props"]
-        dct["end"]["props"] = json.dumps(end_props)
-    return dct
+    with tracer.span("convert_graphobj_to_dict",
+                     source=type(graphobj).__name__):
+        dct = asdict(graphobj)
+        if "props" in dct:
+            dct["props"] = json.dumps(dct["props"])
+        if "start" in dct:
+            start_props = dct["start"]["props"]
+            dct["start"]["props"] = json.dumps(start_props)
+        if "end" in dct:
+            end_props = dct["end"]["props"]
+            dct["end"]["props"] = json.dumps(end_props)
+        return dct